@@ -0,0 +1,221 @@
+"""
+本地替身后端 - 基准测试不访问外网，延迟可控、结果可复现。
+
+- DashScope：SDK 走 websocket，这里直接把同名模块注入 sys.modules，
+  识别耗时 = 固定延迟 + 音频时长 × rtf，每约 5 秒产出一句固定文本。
+- DeepSeek：本地 HTTP 服务实现 OpenAI 兼容的 /chat/completions（普通 JSON 与 SSE 流式），
+  首 token 延迟与输出速度可配置；通过 DEEPSEEK_BASE_URL 让总结器指向它。
+"""
+
+import json
+import sys
+import threading
+import time
+import types
+import wave
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 拼接识别文本用的短语，按句子序号轮换，保证同一音频的转录结果固定
+_PHRASES = [
+    "今天我们来聊一聊这个话题",
+    "首先需要说明的是背景",
+    "这里有几个关键的数据",
+    "大家可以看到这个趋势非常明显",
+    "接下来我们看第二个部分",
+    "这个结论其实有一些前提条件",
+    "最后简单总结一下今天的内容",
+]
+
+# 每句话的时长（秒）
+_SENTENCE_SECONDS = 5.0
+
+
+@dataclass
+class AsrProfile:
+    latency: float = 0.3          # 每次调用的固定延迟（秒）
+    rtf: float = 0.02             # 识别耗时 / 音频时长
+    chars_per_second: float = 4.0 # 语速（字 / 秒），决定转录文本长度
+
+
+@dataclass
+class LlmProfile:
+    first_token: float = 0.5      # 首 token 延迟（秒）
+    tokens_per_second: float = 200.0
+    output_tokens: int = 400      # 每次回复的 token 数（不超过请求的 max_tokens）
+
+
+def _sentences(duration: float, chars_per_second: float) -> list[dict]:
+    """把时长切成约 5 秒一句，时间单位与 SDK 一致（毫秒）"""
+    sentences = []
+    start = 0.0
+    index = 0
+    while start < duration:
+        end = min(start + _SENTENCE_SECONDS, duration)
+        phrase = _PHRASES[index % len(_PHRASES)]
+        length = max(1, int((end - start) * chars_per_second))
+        text = (phrase * (length // len(phrase) + 1))[:length]
+        sentences.append({
+            "begin_time": int(start * 1000),
+            "end_time": int(end * 1000),
+            "text": text,
+            "sentence_end": True,
+        })
+        start = end
+        index += 1
+    return sentences
+
+
+def install_fake_dashscope(profile: AsrProfile) -> None:
+    """注入 dashscope / dashscope.audio / dashscope.audio.asr 替身模块（仅影响当前进程）"""
+
+    class RecognitionResult:
+        def __init__(self, sentences, status_code=HTTPStatus.OK) -> None:
+            self.status_code = status_code
+            self.message = ""
+            self._sentences = sentences
+
+        def get_sentence(self):
+            return self._sentences
+
+        @staticmethod
+        def is_sentence_end(sentence: dict) -> bool:
+            return bool(sentence.get("sentence_end"))
+
+    class RecognitionCallback:
+        def on_event(self, result) -> None: ...
+        def on_error(self, result) -> None: ...
+        def on_complete(self) -> None: ...
+
+    class Recognition:
+        def __init__(self, model, format, sample_rate, language_hints=None, callback=None, **kwargs) -> None:
+            self.sample_rate = sample_rate
+            self.callback = callback
+            self._pcm_bytes = 0
+            self._emitted = 0.0
+            self._started = 0.0
+
+        def call(self, path: str) -> RecognitionResult:
+            with wave.open(path, "rb") as w:
+                duration = w.getnframes() / w.getframerate()
+            time.sleep(profile.latency + duration * profile.rtf)
+            return RecognitionResult(_sentences(duration, profile.chars_per_second))
+
+        # 回调模式：按送入的 PCM 时长逐句回调
+        def start(self) -> None:
+            self._started = time.monotonic()
+
+        def send_audio_frame(self, frame: bytes) -> None:
+            self._pcm_bytes += len(frame)
+            duration = self._pcm_bytes / (2 * self.sample_rate)
+            if duration - self._emitted >= _SENTENCE_SECONDS:
+                self._emit(duration)
+
+        def stop(self) -> None:
+            duration = self._pcm_bytes / (2 * self.sample_rate)
+            # 补足整段音频的识别耗时后再返回剩余结果
+            remaining = profile.latency + duration * profile.rtf - (time.monotonic() - self._started)
+            if remaining > 0:
+                time.sleep(remaining)
+            self._emit(duration)
+            self.callback.on_complete()
+
+        def _emit(self, duration: float) -> None:
+            offset = self._emitted
+            for sentence in _sentences(duration - offset, profile.chars_per_second):
+                sentence = dict(sentence)
+                sentence["begin_time"] += int(offset * 1000)
+                sentence["end_time"] += int(offset * 1000)
+                self.callback.on_event(RecognitionResult(sentence))
+            self._emitted = duration
+
+    asr = types.ModuleType("dashscope.audio.asr")
+    asr.Recognition = Recognition
+    asr.RecognitionCallback = RecognitionCallback
+    asr.RecognitionResult = RecognitionResult
+    audio = types.ModuleType("dashscope.audio")
+    audio.asr = asr
+    root = types.ModuleType("dashscope")
+    root.audio = audio
+    sys.modules.update({"dashscope": root, "dashscope.audio": audio, "dashscope.audio.asr": asr})
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    profile: LlmProfile
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        tokens = min(self.profile.output_tokens, int(request.get("max_tokens") or 2048))
+        model = request.get("model", "fake")
+        prompt_chars = sum(len(m.get("content", "")) for m in request.get("messages", []))
+
+        time.sleep(self.profile.first_token)
+        if request.get("stream"):
+            self._stream(model, tokens)
+        else:
+            time.sleep(tokens / self.profile.tokens_per_second)
+            self._send_json({
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "要点" * tokens},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_chars,
+                    "completion_tokens": tokens,
+                    "total_tokens": prompt_chars + tokens,
+                },
+            })
+
+    def _send_json(self, body: dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, model: str, tokens: int) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        # 每 20 个 token 一个分片
+        step = 20
+        for sent in range(0, tokens, step):
+            n = min(step, tokens - sent)
+            chunk = {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": "要点" * n}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(n / self.profile.tokens_per_second)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def start_fake_llm(profile: LlmProfile, host: str = "127.0.0.1") -> tuple[ThreadingHTTPServer, str]:
+    """在后台线程启动 OpenAI 兼容替身服务（随机端口），返回 (server, base_url)"""
+    handler = type("ChatHandler", (_ChatHandler,), {"profile": profile})
+    server = ThreadingHTTPServer((host, 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-llm", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
@@ -0,0 +1,409 @@
+"""
+StarSummary 基准测试 - 合成音频 + 本地替身后端，测量各阶段耗时、RTF、峰值内存与不同并发下的吞吐。
+
+    uv run python benchmarks/run.py run --lengths 60,600,1800 --concurrency 1,4
+    uv run python benchmarks/run.py compare benchmarks/results/base.json benchmarks/results/new.json
+
+每个场景（引擎 × 音频时长 × 并发）在独立子进程中运行，峰值 RSS 互不影响；结果写成 JSON，
+compare 按场景对比两次结果，超过阈值的退化以非零状态码退出，可直接用于 CI。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict
+
+from fake_backends import AsrProfile, LlmProfile, install_fake_dashscope, start_fake_llm
+from synth import ensure_audio
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_CACHE_DIR = os.path.join(_HERE, ".cache")
+_RESULTS_DIR = os.path.join(_HERE, "results")
+
+_STAGES = ("download", "convert", "transcribe", "summarize", "output")
+
+# 预热用的短音频时长（秒）：加载模型、建立连接等一次性开销不计入结果
+_WARMUP_SECONDS = 10
+
+# compare 时绝对变化小于这些值的指标视为噪声，不判定为退化
+_MIN_SECONDS = 0.05
+_MIN_RTF = 0.002
+_MIN_RSS_MB = 5.0
+
+
+# ── 单个任务 ──
+
+
+def _process_item(params: dict, audio_path: str, work_dir: str, index: int) -> dict:
+    """完整跑一遍 下载 → 转换 → 转录 → 总结 → 输出，返回各阶段耗时"""
+    from star_summary.audio import normalize_audio
+    from star_summary.cli import _save_results
+    from star_summary.downloader.local import LocalDownloader
+    from star_summary.models import SummaryResult
+    from star_summary.summarizer import get_summarizer
+    from star_summary.transcriber import get_transcriber
+
+    timings: dict[str, float] = {}
+
+    t0 = time.perf_counter()
+    downloader = LocalDownloader()
+    downloader.probe(audio_path)  # 本地文件的来源 ID 是内容哈希，属于下载阶段的真实开销
+    download = downloader.download(audio_path)
+    timings["download"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    wav_path = normalize_audio(download.audio_path, os.path.join(work_dir, f"item{index}.wav"))
+    timings["convert"] = time.perf_counter() - t0
+
+    transcriber = get_transcriber(
+        engine=params["engine"],
+        model=params["whisper_model"],
+        api_key="bench",
+        parallel=params["parallel"],
+        chunk_seconds=params["chunk_seconds"],
+    )
+    t0 = time.perf_counter()
+    transcript = transcriber.transcribe(wav_path)
+    timings["transcribe"] = time.perf_counter() - t0
+
+    summarizer = get_summarizer(api_key="bench")
+    t0 = time.perf_counter()
+    first_token = 0.0
+    parts = []
+    for delta in summarizer.summarize_transcript_stream(transcript):
+        if not parts:
+            first_token = time.perf_counter() - t0
+        parts.append(delta)
+    timings["summarize"] = time.perf_counter() - t0
+    summary = SummaryResult(text="".join(parts), model="bench", summarize_time=timings["summarize"])
+
+    t0 = time.perf_counter()
+    _save_results(transcript, summary, work_dir, f"item{index}", audio_path)
+    timings["output"] = time.perf_counter() - t0
+
+    os.remove(wav_path)
+    return {
+        "timings": timings,
+        "duration": transcript.duration,
+        "first_token": first_token,
+        "characters": len(transcript.text),
+    }
+
+
+# ── 场景（子进程内执行）──
+
+
+def _peak_rss_mb(who: int) -> float:
+    """ru_maxrss：Linux 单位为 KB，macOS 为字节"""
+    value = resource.getrusage(who).ru_maxrss
+    return value / (1024 * 1024) if sys.platform == "darwin" else value / 1024
+
+
+def _run_scenario(params: dict) -> dict:
+    install_fake_dashscope(AsrProfile(**params["asr"]))
+    os.environ["DEEPSEEK_BASE_URL"] = params["llm_url"]
+    os.environ["STAR_SUMMARY_METRICS_PORT"] = "0"
+    # 同一场景的任务内容相同，关闭缓存才能测到真实的总结耗时
+    os.environ["STAR_SUMMARY_CACHE"] = "0"
+
+    work_dir = tempfile.mkdtemp(prefix="starsummary_bench_")
+    log = io.StringIO()
+    items: list[dict] = []
+    errors: list[str] = []
+    wall = 0.0
+    try:
+        with contextlib.redirect_stdout(log if not params["verbose"] else sys.stdout):
+            if params["warmup"]:
+                _process_item(params, params["warmup"], work_dir, -1)
+
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=params["concurrency"]) as executor:
+                futures = [
+                    executor.submit(_process_item, params, params["audio"], work_dir, i)
+                    for i in range(params["items"])
+                ]
+                for future in futures:
+                    try:
+                        items.append(future.result())
+                    except Exception as e:
+                        errors.append(f"{type(e).__name__}: {e}")
+            wall = time.perf_counter() - t0
+    except Exception:
+        errors.append(traceback.format_exc())
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if errors and params["verbose"]:
+        print(log.getvalue())
+    return {
+        "items": items,
+        "errors": errors,
+        "wall": wall,
+        "peak_rss_mb": round(_peak_rss_mb(resource.RUSAGE_SELF), 1),
+        "peak_child_rss_mb": round(_peak_rss_mb(resource.RUSAGE_CHILDREN), 1),
+    }
+
+
+# ── 统计 ──
+
+
+def _stats(values: list[float]) -> dict[str, float]:
+    """mean / p50 / p95 / max（最近秩百分位，样本少时也稳定）"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def _pct(p: float) -> float:
+        rank = max(1, -(-len(ordered) * p // 100))
+        return ordered[int(rank) - 1]
+
+    return {
+        "mean": round(sum(ordered) / len(ordered), 4),
+        "p50": round(_pct(50), 4),
+        "p95": round(_pct(95), 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def _summarize_scenario(name: str, params: dict, raw: dict) -> dict:
+    items = raw["items"]
+    audio_seconds = sum(item["duration"] for item in items)
+    wall = raw["wall"]
+    return {
+        "name": name,
+        "engine": params["engine"],
+        "length": params["length"],
+        "concurrency": params["concurrency"],
+        "items": len(items),
+        "errors": raw["errors"],
+        "wall_seconds": round(wall, 4),
+        "throughput": {
+            "items_per_minute": round(len(items) * 60 / wall, 3) if wall else 0.0,
+            "audio_seconds_per_second": round(audio_seconds / wall, 3) if wall else 0.0,
+        },
+        "stages": {
+            stage: _stats([item["timings"][stage] for item in items]) for stage in _STAGES
+        },
+        "rtf": _stats([
+            item["timings"]["transcribe"] / item["duration"] for item in items if item["duration"]
+        ]),
+        "first_token": _stats([item["first_token"] for item in items]),
+        "peak_rss_mb": raw["peak_rss_mb"],
+        "peak_child_rss_mb": raw["peak_child_rss_mb"],
+    }
+
+
+# ── run ──
+
+
+def _git_revision() -> str:
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=_HERE, capture_output=True, text=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=_HERE,
+            capture_output=True, text=True,
+        ).stdout.strip()
+    except FileNotFoundError:
+        return ""
+    return f"{sha}-dirty" if sha and dirty else sha
+
+
+def _ffmpeg_version() -> str:
+    result = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True)
+    return result.stdout.splitlines()[0] if result.stdout else ""
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        print("ffmpeg / ffprobe not found; the convert stage needs them (brew install ffmpeg)")
+        return 2
+
+    asr = AsrProfile(latency=args.asr_latency, rtf=args.asr_rtf, chars_per_second=args.asr_cps)
+    llm = LlmProfile(
+        first_token=args.llm_first_token,
+        tokens_per_second=args.llm_tps,
+        output_tokens=args.llm_tokens,
+    )
+    server, llm_url = start_fake_llm(llm)
+
+    print(f"Generating synthetic audio in {_CACHE_DIR} ...")
+    audio = {length: ensure_audio(_CACHE_DIR, length, args.format, args.seed) for length in args.lengths}
+    warmup = ensure_audio(_CACHE_DIR, _WARMUP_SECONDS, args.format, args.seed) if args.warmup else ""
+
+    scenarios = []
+    ctx = multiprocessing.get_context("spawn")
+    header = f"{'scenario':<28}{'wall':>9}{'conv p50':>10}{'asr p50':>10}{'rtf':>8}{'sum p50':>10}{'audio s/s':>11}{'rss MB':>9}"
+    print(header)
+    for length in args.lengths:
+        for concurrency in args.concurrency:
+            name = f"{args.engine}-{length}s-c{concurrency}"
+            params = {
+                "engine": args.engine,
+                "whisper_model": args.whisper_model,
+                "parallel": args.parallel,
+                "chunk_seconds": args.chunk_seconds,
+                "length": length,
+                "concurrency": concurrency,
+                "items": args.items or concurrency,
+                "audio": audio[length],
+                "warmup": warmup,
+                "asr": asdict(asr),
+                "llm_url": llm_url,
+                "verbose": args.verbose,
+            }
+            # 每个场景一个全新进程：峰值 RSS 与模型缓存互不影响
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+                raw = executor.submit(_run_scenario, params).result()
+            result = _summarize_scenario(name, params, raw)
+            scenarios.append(result)
+
+            stages = result["stages"]
+            print(
+                f"{name:<28}{result['wall_seconds']:>9.2f}"
+                f"{stages['convert'].get('p50', 0):>10.2f}{stages['transcribe'].get('p50', 0):>10.2f}"
+                f"{result['rtf'].get('p50', 0):>8.3f}{stages['summarize'].get('p50', 0):>10.2f}"
+                f"{result['throughput']['audio_seconds_per_second']:>11.1f}{result['peak_rss_mb']:>9.0f}"
+            )
+            for error in result["errors"]:
+                print(f"  error: {error.strip().splitlines()[-1]}")
+    server.shutdown()
+
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "ffmpeg": _ffmpeg_version(),
+            "args": {k: v for k, v in vars(args).items() if k != "func"},
+            "asr_profile": asdict(asr),
+            "llm_profile": asdict(llm),
+        },
+        "scenarios": scenarios,
+    }
+    out = args.out or os.path.join(
+        _RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{report['meta']['revision'] or 'local'}.json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Results → {out}")
+    return 1 if any(s["errors"] for s in scenarios) else 0
+
+
+# ── compare ──
+
+
+def _flatten(scenario: dict) -> dict[str, tuple[float, bool, float]]:
+    """可比较的指标 → (值, 是否越大越好, 视为噪声的绝对变化量)"""
+    metrics: dict[str, tuple[float, bool, float]] = {
+        "wall_seconds": (scenario["wall_seconds"], False, _MIN_SECONDS),
+        "audio_seconds_per_second": (scenario["throughput"]["audio_seconds_per_second"], True, 0.0),
+        "peak_rss_mb": (scenario["peak_rss_mb"], False, _MIN_RSS_MB),
+    }
+    for stage, stats in scenario["stages"].items():
+        if stats:
+            metrics[f"{stage}.p50"] = (stats["p50"], False, _MIN_SECONDS)
+            metrics[f"{stage}.p95"] = (stats["p95"], False, _MIN_SECONDS)
+    if scenario["rtf"]:
+        metrics["rtf.p50"] = (scenario["rtf"]["p50"], False, _MIN_RTF)
+    if scenario["first_token"]:
+        metrics["first_token.p50"] = (scenario["first_token"]["p50"], False, _MIN_SECONDS)
+    return metrics
+
+
+def cmd_compare(args: argparse.Namespace) -> int:
+    with open(args.base, encoding="utf-8") as f:
+        base = {s["name"]: s for s in json.load(f)["scenarios"]}
+    with open(args.new, encoding="utf-8") as f:
+        new = {s["name"]: s for s in json.load(f)["scenarios"]}
+
+    regressions = 0
+    for name in sorted(base.keys() & new.keys()):
+        print(f"\n{name}")
+        old_metrics = _flatten(base[name])
+        for metric, (value, higher_better, min_delta) in _flatten(new[name]).items():
+            if metric not in old_metrics:
+                continue
+            old = old_metrics[metric][0]
+            change = (value - old) / old if old else 0.0
+            worse = -change if higher_better else change
+            flag = ""
+            significant = abs(value - old) >= min_delta
+            if worse > args.threshold and significant:
+                flag = "  REGRESSION"
+                regressions += 1
+            elif -worse > args.threshold and significant:
+                flag = "  improved"
+            print(f"  {metric:<28}{old:>12.3f} → {value:<12.3f}{change:>+8.1%}{flag}")
+
+    for name in sorted(base.keys() - new.keys()):
+        print(f"\n{name}: only in {args.base}")
+    for name in sorted(new.keys() - base.keys()):
+        print(f"\n{name}: only in {args.new}")
+
+    print(f"\n{regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="StarSummary 基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="运行基准测试并写出 JSON 结果")
+    run.add_argument("--lengths", type=_int_list, default=[60, 600, 1800], help="音频时长列表（秒），逗号分隔")
+    run.add_argument("--concurrency", type=_int_list, default=[1, 4], help="并发任务数列表，逗号分隔")
+    run.add_argument("--items", type=int, default=0, help="每个场景的任务数（默认等于并发数）")
+    run.add_argument("--engine", choices=["paraformer", "whisper"], default="paraformer",
+                     help="paraformer 使用本地替身；whisper 为真实本地模型（合成音频只用于计时）")
+    run.add_argument("--whisper-model", default="tiny", help="whisper 模型（默认 tiny）")
+    run.add_argument("--parallel", type=int, default=1, help="单个任务内的转录并行度")
+    run.add_argument("--chunk-seconds", type=float, default=300, help="并行转录的切块时长")
+    run.add_argument("--format", default="m4a", help="合成音频的容器格式（默认 m4a）")
+    run.add_argument("--seed", type=int, default=0, help="合成音频的随机种子")
+    run.add_argument("--no-warmup", dest="warmup", action="store_false", help="不做预热")
+    run.add_argument("--asr-latency", type=float, default=0.3, help="替身 ASR 每次调用的固定延迟（秒）")
+    run.add_argument("--asr-rtf", type=float, default=0.02, help="替身 ASR 的实时率")
+    run.add_argument("--asr-cps", type=float, default=4.0, help="替身 ASR 的语速（字/秒）")
+    run.add_argument("--llm-first-token", type=float, default=0.5, help="替身 LLM 首 token 延迟（秒）")
+    run.add_argument("--llm-tps", type=float, default=200.0, help="替身 LLM 输出速度（token/秒）")
+    run.add_argument("--llm-tokens", type=int, default=400, help="替身 LLM 每次回复的 token 数")
+    run.add_argument("-o", "--out", default="", help="结果文件（默认 benchmarks/results/<时间>-<提交>.json）")
+    run.add_argument("-v", "--verbose", action="store_true", help="显示流水线日志")
+    run.set_defaults(func=cmd_run)
+
+    compare = sub.add_parser("compare", help="对比两次结果，出现退化时以状态码 1 退出")
+    compare.add_argument("base", help="基线结果 JSON")
+    compare.add_argument("new", help="新结果 JSON")
+    compare.add_argument("--threshold", type=float, default=0.1, help="退化阈值（默认 0.1 即 10%%）")
+    compare.set_defaults(func=cmd_compare)
+
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""合成测试音频 - 固定随机种子生成"类语音"音频：音节节奏的谐波音团与长短不一的停顿交替"""
+
+import array
+import math
+import os
+import random
+import shutil
+import subprocess
+import wave
+
+# 接近真实下载结果的采样格式，转换阶段需要完整的解码 + 重采样 + 下混
+SAMPLE_RATE = 44100
+CHANNELS = 2
+
+# 预先生成的音团模板数量（每个 1 秒），拼接时随机挑选，避免逐样本计算长音频
+_TEMPLATES = 8
+
+
+def _burst_templates(rng: random.Random) -> list[bytes]:
+    """每个模板：基频 110–280Hz 的三次谐波，按约 4Hz 的音节包络调幅"""
+    templates = []
+    for _ in range(_TEMPLATES):
+        f0 = rng.uniform(110, 280)
+        syllable = rng.uniform(3.0, 5.5)
+        samples = array.array("h")
+        for i in range(SAMPLE_RATE):
+            t = i / SAMPLE_RATE
+            envelope = 0.5 - 0.5 * math.cos(2 * math.pi * syllable * t)
+            value = (
+                math.sin(2 * math.pi * f0 * t)
+                + 0.5 * math.sin(4 * math.pi * f0 * t)
+                + 0.25 * math.sin(6 * math.pi * f0 * t)
+            )
+            sample = int(9000 * envelope * value)
+            samples.extend((sample,) * CHANNELS)
+        templates.append(samples.tobytes())
+    return templates
+
+
+def write_speech_wav(path: str, seconds: float, seed: int = 0) -> str:
+    """生成时长为 seconds 的 wav：2–8 秒音团与 0.4–1.5 秒静音交替；相同参数输出完全相同"""
+    rng = random.Random(seed)
+    templates = _burst_templates(rng)
+    frame_bytes = 2 * CHANNELS
+    total = int(seconds * SAMPLE_RATE)
+    silence_second = bytes(SAMPLE_RATE * frame_bytes)
+
+    tmp_path = f"{path}.tmp"
+    with wave.open(tmp_path, "wb") as w:
+        w.setnchannels(CHANNELS)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        written = 0
+        speaking = True
+        while written < total:
+            if speaking:
+                length = min(int(rng.uniform(2, 8) * SAMPLE_RATE), total - written)
+                remaining = length
+                while remaining > 0:
+                    n = min(remaining, SAMPLE_RATE)
+                    w.writeframes(rng.choice(templates)[: n * frame_bytes])
+                    remaining -= n
+            else:
+                length = min(int(rng.uniform(0.4, 1.5) * SAMPLE_RATE), total - written)
+                w.writeframes(silence_second[: length * frame_bytes])
+            written += length
+            speaking = not speaking
+    os.replace(tmp_path, path)
+    return path
+
+
+def ensure_audio(cache_dir: str, seconds: float, fmt: str = "m4a", seed: int = 0) -> str:
+    """返回指定时长 / 格式的合成音频路径，已生成过则直接复用；非 wav 格式用 ffmpeg 编码"""
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = os.path.join(cache_dir, f"speech_{int(seconds)}s_seed{seed}")
+    target = f"{stem}.{fmt}"
+    if os.path.exists(target):
+        return target
+
+    wav_path = f"{stem}.wav"
+    if not os.path.exists(wav_path):
+        write_speech_wav(wav_path, seconds, seed)
+    if fmt == "wav":
+        return wav_path
+
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not installed, cannot encode synthetic audio")
+    tmp_path = f"{stem}.tmp.{fmt}"
+    subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", wav_path, "-vn", "-y", tmp_path],
+        check=True, capture_output=True,
+    )
+    os.replace(tmp_path, target)
+    return target
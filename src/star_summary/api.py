@@ -0,0 +1,207 @@
+"""HTTP 任务 API - 提交任务、查询状态、取回转录 / 总结、取消；实际处理由 starsummary-worker 完成"""
+
+import argparse
+import hmac
+import os
+import time
+from dataclasses import asdict
+from typing import Any
+from urllib.parse import urlparse
+
+from star_summary.config import Config
+from star_summary.downloader.local import SUPPORTED_FORMATS
+from star_summary.jobs import FINISHED, Job, JobStore, cancel_job, get_job_store, new_job_id
+from star_summary.metrics import JOBS_RUNNING, QUEUE_DEPTH, REGISTRY
+from star_summary.utils import format_time, log_error, log_info, log_step
+from star_summary.worker import API_OWNER
+
+
+def _require_fastapi() -> None:
+    try:
+        import fastapi  # noqa: F401
+        import uvicorn  # noqa: F401
+    except ImportError:
+        log_error("fastapi / uvicorn not installed")
+        log_info("Install them: uv add 'star-summary[api]'")
+        raise RuntimeError("fastapi not installed")
+
+
+def _job_status(store: JobStore, job: Job) -> dict[str, Any]:
+    fraction, desc = store.progress(job.id)
+    return {
+        "id": job.id,
+        "state": job.state,
+        "finished": job.finished,
+        "source": job.source,
+        "title": job.title,
+        "source_id": job.source_id,
+        "duration": job.duration,
+        "cached": job.cached,
+        "summarize": job.summarize,
+        "progress": fraction,
+        "progress_desc": desc,
+        "error": job.error,
+        "failed_stage": job.failed_stage,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
+
+def create_app(store: JobStore, token: str = ""):
+    """构建 FastAPI 应用；token 非空时所有请求需带 Authorization: Bearer <token>"""
+    from fastapi import APIRouter, Depends, FastAPI, File, Form, HTTPException, Request, UploadFile
+    from fastapi.responses import PlainTextResponse
+    from pydantic import BaseModel
+
+    class JobRequest(BaseModel):
+        source: str
+        engine: str = ""
+        language: str = ""
+        summarize: bool = False
+        system_prompt: str = ""
+
+    def _check_token(request: Request) -> None:
+        given = request.headers.get("authorization", "")
+        if token and not hmac.compare_digest(given, f"Bearer {token}"):
+            raise HTTPException(status_code=401, detail="invalid or missing token")
+
+    app = FastAPI(title="StarSummary API")
+    router = APIRouter(prefix="/v1", dependencies=[Depends(_check_token)])
+
+    def _get_job(job_id: str) -> Job:
+        job = store.get(job_id)
+        if job is None or job.owner != API_OWNER:
+            raise HTTPException(status_code=404, detail="job not found")
+        return job
+
+    # 路由函数为同步 def：FastAPI 在线程池中执行，SQLite 读写不阻塞事件循环
+
+    @router.post("/jobs", status_code=202)
+    def submit(body: JobRequest) -> dict[str, Any]:
+        # 只接受 http(s) 链接：其他字符串会被下载器当作服务器上的本地路径处理，本地文件请走上传接口
+        source = body.source.strip()
+        parsed = urlparse(source)
+        if parsed.scheme.lower() not in ("http", "https") or not parsed.netloc:
+            raise HTTPException(status_code=422, detail="source must be an http(s) URL")
+        job = store.create(
+            "url", source, API_OWNER,
+            engine=body.engine, language=body.language,
+            summarize=body.summarize, system_prompt=body.system_prompt,
+        )
+        return _job_status(store, job)
+
+    @router.post("/jobs/upload", status_code=202)
+    def upload(
+        file: UploadFile = File(...),
+        engine: str = Form(""),
+        language: str = Form(""),
+        summarize: bool = Form(False),
+        system_prompt: str = Form(""),
+    ) -> dict[str, Any]:
+        # 客户端文件名只用来取扩展名和标题；存为固定的 source<ext>，不会覆盖任务目录里的检查点
+        file_name = os.path.basename(file.filename or "")
+        ext = os.path.splitext(file_name)[1].lower()
+        if ext not in SUPPORTED_FORMATS:
+            raise HTTPException(
+                status_code=422,
+                detail=f"unsupported file type, expected one of: {' '.join(sorted(SUPPORTED_FORMATS))}",
+            )
+        # 先把文件写进任务目录再建任务，工作进程不会领到只上传了一半的任务
+        job_id = new_job_id()
+        local_path = os.path.join(store.job_dir(job_id), f"source{ext}")
+        os.makedirs(store.job_dir(job_id), exist_ok=True)
+        with open(local_path, "wb") as f:
+            while chunk := file.file.read(1024 * 1024):
+                f.write(chunk)
+        job = store.create(
+            "file", local_path, API_OWNER, job_id=job_id,
+            title=os.path.splitext(file_name)[0],
+            engine=engine, language=language, summarize=summarize, system_prompt=system_prompt,
+        )
+        return _job_status(store, job)
+
+    @router.get("/jobs/{job_id}")
+    def status(job_id: str) -> dict[str, Any]:
+        return _job_status(store, _get_job(job_id))
+
+    @router.get("/jobs/{job_id}/transcript", response_model=None)
+    def transcript(job_id: str, format: str = "json"):
+        """format: json（含分段时间戳）/ text / timed（每行 [开始 → 结束] 文本）"""
+        job = _get_job(job_id)
+        result = store.load_transcript(job)
+        if result is None:
+            raise HTTPException(status_code=409, detail=f"transcript not ready (state: {job.state})")
+        if format == "text":
+            return PlainTextResponse(result.text)
+        if format == "timed":
+            lines = [
+                f"[{format_time(seg.start)} → {format_time(seg.end)}]  {seg.text}"
+                for seg in result.segments
+            ]
+            return PlainTextResponse("\n".join(lines) + "\n")
+        if format != "json":
+            raise HTTPException(status_code=422, detail="format must be json, text or timed")
+        return asdict(result)
+
+    @router.get("/jobs/{job_id}/summary", response_model=None)
+    def summary(job_id: str, format: str = "json"):
+        job = _get_job(job_id)
+        result = store.load_summary(job)
+        if result is None:
+            detail = f"summary not ready (state: {job.state})" if job.summarize else "summary not requested"
+            raise HTTPException(status_code=409, detail=detail)
+        if format == "text":
+            return PlainTextResponse(result.text)
+        return asdict(result)
+
+    @router.post("/jobs/{job_id}/cancel")
+    def cancel(job_id: str) -> dict[str, Any]:
+        job = _get_job(job_id)
+        if job.state not in FINISHED and not store.request_cancel(job.id):
+            # 没有工作进程在处理（排队中或处理它的进程已崩溃），直接标记
+            job = cancel_job(store, job)
+        return _job_status(store, store.get(job.id) or job)
+
+    @app.get("/healthz")
+    def healthz() -> dict[str, Any]:
+        return {"ok": True, "time": time.time()}
+
+    QUEUE_DEPTH.set_function(lambda: store.counts(API_OWNER)[0], queue="api")
+    JOBS_RUNNING.set_function(lambda: store.counts(API_OWNER)[1], queue="api")
+
+    @app.get("/metrics")
+    def metrics() -> PlainTextResponse:
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+    app.include_router(router)
+    return app
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="starsummary-api",
+        description="StarSummary HTTP 任务 API（需同时运行 starsummary-worker）",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址（默认 127.0.0.1）")
+    parser.add_argument("--port", type=int, default=8000, help="监听端口（默认 8000）")
+    return parser.parse_args()
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    args = _parse_args()
+    _require_fastapi()
+    import uvicorn
+
+    token = os.environ.get("STAR_SUMMARY_API_TOKEN", "").strip()
+    store = get_job_store(Config())
+    if not token:
+        log_info("STAR_SUMMARY_API_TOKEN not set, API is unauthenticated")
+    log_step("🌐", f"API on http://{args.host}:{args.port}, jobs in {store.root}")
+    uvicorn.run(create_app(store, token), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
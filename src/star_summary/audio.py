@@ -0,0 +1,192 @@
+"""音频工具 - ffmpeg/ffprobe 封装：格式归一化、时长探测、静音检测、按静音切块"""
+
+import os
+import re
+import shutil
+import subprocess
+
+from star_summary.metrics import timed_stage
+from star_summary.utils import log_error, log_info
+
+# 归一化格式：16kHz 单声道 16bit PCM wav，两种引擎都可直接使用
+NORMALIZED_RATE = 16000
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+def require_ffmpeg() -> None:
+    """检查 ffmpeg 是否可用"""
+    if shutil.which("ffmpeg") is None:
+        log_error("ffmpeg not found, cannot convert audio format")
+        log_info("Install it: brew install ffmpeg")
+        raise RuntimeError("ffmpeg not installed")
+
+
+def is_normalized(path: str) -> bool:
+    """判断文件是否已经是 16kHz 单声道 PCM wav（已归一化的文件不再转码）"""
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name,sample_rate,channels",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        path,
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    except (subprocess.SubprocessError, FileNotFoundError):
+        return False
+    return result.stdout.split() == ["pcm_s16le", str(NORMALIZED_RATE), "1"]
+
+
+@timed_stage("convert")
+def normalize_audio(src: str, dst: str) -> str:
+    """
+    一次 ffmpeg 解码把任意音视频转成 16kHz 单声道 PCM wav 写入 dst，返回 dst。
+    PCM 无需编码，转换开销只有一次解码和重采样。
+    """
+    require_ffmpeg()
+
+    tmp_path = f"{dst}.{os.getpid()}.tmp"
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-i", src,
+        "-vn", "-ac", "1", "-ar", str(NORMALIZED_RATE), "-c:a", "pcm_s16le",
+        "-f", "wav", "-y", tmp_path,
+    ]
+    try:
+        subprocess.run(cmd, capture_output=True, text=True, timeout=600, check=True)
+        # 先写临时文件再原子替换，并发任务不会读到写了一半的文件
+        os.replace(tmp_path, dst)
+    except subprocess.CalledProcessError as e:
+        log_error(f"ffmpeg conversion failed: {e.stderr}")
+        raise RuntimeError("Audio format conversion failed")
+    except subprocess.TimeoutExpired:
+        log_error("ffmpeg conversion timed out")
+        raise RuntimeError("Audio format conversion timed out")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    log_info(f"Normalized to 16kHz mono wav: {dst}")
+    return dst
+
+
+def pcm_decode_cmd(src: str = "pipe:0") -> list[str]:
+    """ffmpeg 命令：把 src（文件或 stdin）解码为 16kHz 单声道 s16le PCM 写到 stdout"""
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-i", src,
+        "-vn", "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ar", str(NORMALIZED_RATE), "-ac", "1", "pipe:1",
+    ]
+
+
+def probe_duration(path: str) -> float:
+    """用 ffprobe 读取音频时长（秒），失败返回 0"""
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        path,
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        return float(result.stdout.strip())
+    except (subprocess.SubprocessError, FileNotFoundError, ValueError):
+        return 0.0
+
+
+def detect_silences(
+    path: str, noise_db: int = -35, min_silence: float = 0.5,
+) -> list[tuple[float, float]]:
+    """用 ffmpeg silencedetect 找出静音区间 [(start, end), ...]"""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats", "-i", path,
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}",
+        "-f", "null", "-",
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+    except subprocess.TimeoutExpired:
+        return []
+
+    silences: list[tuple[float, float]] = []
+    start: float | None = None
+    for line in result.stderr.splitlines():
+        if m := _SILENCE_START.search(line):
+            start = max(0.0, float(m.group(1)))
+        elif (m := _SILENCE_END.search(line)) and start is not None:
+            silences.append((start, float(m.group(1))))
+            start = None
+    return silences
+
+
+def plan_chunks(
+    duration: float,
+    silences: list[tuple[float, float]],
+    chunk_seconds: float,
+    overlap: float = 1.0,
+) -> list[tuple[float, float]]:
+    """
+    把 [0, duration] 切成约 chunk_seconds 长的块，返回 [(start, end), ...]。
+    切点优先落在目标位置前后 20% 范围内最近的静音中点；
+    找不到静音时在目标位置硬切，并让下一块向前重叠 overlap 秒，
+    重叠部分产生的重复片段由合并步骤去除。
+    """
+    if duration <= chunk_seconds * 1.5:
+        return [(0.0, duration)]
+
+    window = chunk_seconds * 0.2
+    chunks: list[tuple[float, float]] = []
+    start = 0.0
+    while duration - start > chunk_seconds * 1.5:
+        target = start + chunk_seconds
+        candidates = [
+            (a + b) / 2 for a, b in silences
+            if abs((a + b) / 2 - target) <= window
+        ]
+        if candidates:
+            cut = min(candidates, key=lambda c: abs(c - target))
+            chunks.append((start, cut))
+            start = cut
+        else:
+            chunks.append((start, target))
+            start = target - overlap
+    chunks.append((start, duration))
+    return chunks
+
+
+def cut_chunk(src: str, start: float, end: float, dst: str) -> str:
+    """无重编码截取 [start, end) 到 dst（同格式），返回 dst"""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{start:.3f}", "-to", f"{end:.3f}",
+        "-i", src, "-c", "copy", "-y", dst,
+    ]
+    try:
+        subprocess.run(cmd, capture_output=True, text=True, timeout=300, check=True)
+    except subprocess.CalledProcessError as e:
+        log_error(f"ffmpeg cut failed: {e.stderr}")
+        raise RuntimeError("Audio chunk extraction failed")
+    return dst
+
+
+def split_audio(
+    path: str, chunk_seconds: float, out_dir: str,
+) -> list[tuple[float, str]]:
+    """
+    在静音处把音频切成若干块写入 out_dir，返回 [(块起始偏移秒, 块文件路径), ...]。
+    音频不够长时返回原文件本身。
+    """
+    duration = probe_duration(path)
+    if duration <= chunk_seconds * 1.5:
+        return [(0.0, path)]
+
+    silences = detect_silences(path)
+    plan = plan_chunks(duration, silences, chunk_seconds)
+    ext = os.path.splitext(path)[1]
+    log_info(f"Split {duration:.0f}s audio into {len(plan)} chunks at silence boundaries")
+
+    chunks: list[tuple[float, str]] = []
+    for i, (start, end) in enumerate(plan):
+        dst = os.path.join(out_dir, f"chunk_{i:04d}{ext}")
+        chunks.append((start, cut_chunk(path, start, end, dst)))
+    return chunks
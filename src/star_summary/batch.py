@@ -0,0 +1,232 @@
+"""批量处理 - 下载 / 转录 / 总结三段流水线，各阶段独立并发，单条失败不影响其他条目"""
+
+import dataclasses
+import queue
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from star_summary.config import Config
+from star_summary.models import SummaryResult, TranscriptResult
+from star_summary.utils import log_error, log_info, log_step, with_log_context
+
+_STOP = object()
+
+
+@dataclass
+class BatchItem:
+    """批量任务中的一条输入及其处理结果"""
+    index: int                               # 输入中的序号（从 1 开始）
+    source: str                              # URL 或本地路径
+    title: str = ""
+    source_id: str = ""
+    transcript: TranscriptResult | None = None
+    summary: SummaryResult | None = None
+    cached: bool = False                     # 转录是否命中缓存
+    error: str = ""                          # 失败原因，空表示成功
+    failed_stage: str = ""                   # 失败的阶段：download / transcribe / summarize
+    started_at: float = 0.0
+    elapsed: float = 0.0
+    # 阶段间传递的中间状态
+    downloader: Any = field(default=None, repr=False)
+    audio_path: str = field(default="", repr=False)
+    pipe: bool = field(default=False, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+
+def read_input_list(lines: Iterator[str]) -> list[str]:
+    """解析输入列表：每行一个 URL / 路径，忽略空行和 # 开头的注释"""
+    inputs = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            inputs.append(line)
+    return inputs
+
+
+class BatchPipeline:
+    """
+    三段流水线：download_workers 个下载线程 → transcribe_workers 个转录线程
+    → summarize_workers 个总结线程。阶段之间用有界队列衔接，
+    下载不会无限超前于转录堆积临时文件；任一阶段出错的条目直接流到结果，不再进入后续阶段。
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        download_workers: int = 4,
+        transcribe_workers: int = 2,
+        summarize_workers: int = 4,
+    ) -> None:
+        self.config = config
+        self.download_workers = max(1, download_workers)
+        self.transcribe_workers = max(1, transcribe_workers)
+        self.summarize_workers = max(1, summarize_workers)
+
+        from star_summary.cache import get_transcript_cache
+        from star_summary.transcriber import get_transcriber
+
+        self._cache = get_transcript_cache(config)
+        self._transcriber = get_transcriber(
+            engine=config.engine,
+            model=config.whisper_model,
+            api_key=config.dashscope_api_key,
+            asr_model=config.asr_model,
+            parallel=config.parallel,
+            chunk_seconds=config.chunk_seconds,
+            whisper_threads=config.whisper_threads,
+        )
+        self._summarizer = None
+        if config.summarize and config.deepseek_api_key:
+            from star_summary.summarizer import get_summarizer
+            self._summarizer = get_summarizer(api_key=config.deepseek_api_key, config=config)
+
+    def run(
+        self,
+        sources: list[str],
+        on_done: Callable[[BatchItem], None] | None = None,
+    ) -> list[BatchItem]:
+        """处理全部输入，按完成顺序在调用线程回调 on_done，返回按输入顺序排列的结果"""
+        items = [BatchItem(index=i, source=s) for i, s in enumerate(sources, 1)]
+        log_step("📦", f"Batch: {len(items)} inputs, "
+                 f"{self.download_workers} downloaders → {self.transcribe_workers} transcribers"
+                 f" → {self.summarize_workers} summarizers")
+
+        inbox: queue.Queue = queue.Queue()
+        to_transcribe: queue.Queue = queue.Queue(maxsize=self.transcribe_workers * 2)
+        to_summarize: queue.Queue = queue.Queue()
+        done: queue.Queue = queue.Queue()
+
+        self._start_stage("download", self._download, self.download_workers, inbox, to_transcribe)
+        self._start_stage("transcribe", self._transcribe, self.transcribe_workers, to_transcribe, to_summarize)
+        self._start_stage("summarize", self._summarize, self.summarize_workers, to_summarize, done)
+
+        for item in items:
+            inbox.put(item)
+        for _ in range(self.download_workers):
+            inbox.put(_STOP)
+
+        for _ in items:
+            item = done.get()
+            item.elapsed = time.time() - item.started_at
+            if on_done is not None:
+                on_done(item)
+        return items
+
+    def _start_stage(
+        self,
+        name: str,
+        work: Callable[[BatchItem], None],
+        workers: int,
+        inbox: queue.Queue,
+        outbox: queue.Queue,
+    ) -> None:
+        """启动一个阶段的工作线程；全部退出后向下一阶段发送同样数量的结束标记"""
+        remaining = [workers]
+        lock = threading.Lock()
+        next_workers = {
+            "download": self.transcribe_workers,
+            "transcribe": self.summarize_workers,
+        }.get(name, 0)
+
+        def _worker() -> None:
+            while (item := inbox.get()) is not _STOP:
+                if item.ok:
+                    try:
+                        work(item)
+                    except Exception as e:
+                        item.error = str(e) or type(e).__name__
+                        item.failed_stage = name
+                        log_error(f"[{item.index}] {name} failed: {item.error}")
+                        self._cleanup(item)
+                outbox.put(item)
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                for _ in range(next_workers):
+                    outbox.put(_STOP)
+
+        for i in range(workers):
+            threading.Thread(
+                target=with_log_context(_worker), name=f"batch-{name}-{i}", daemon=True,
+            ).start()
+
+    # ── 各阶段 ──
+
+    def _download(self, item: BatchItem) -> None:
+        from star_summary.cache import prepare_audio
+        from star_summary.downloader import get_downloader
+        from star_summary.downloader.ytdlp import YtdlpDownloader
+
+        item.started_at = time.time()
+        config = dataclasses.replace(self.config, input=item.source)
+        item.downloader = get_downloader(
+            item.source,
+            cookies=config.cookies,
+            cookies_from_browser=config.cookies_from_browser,
+        )
+
+        if self._cache is not None:
+            info = item.downloader.probe(item.source)
+            item.title, item.source_id = info.title, info.source_id
+            item.transcript = self._cache.get(item.source_id, config)
+            if item.transcript is not None:
+                item.cached = True
+                self._cleanup(item)
+                return
+
+        if config.pipe and isinstance(item.downloader, YtdlpDownloader):
+            # 管道模式：下载与识别一起在转录阶段进行
+            info = item.downloader.probe(item.source)
+            item.title = item.title or info.title
+            item.source_id = item.source_id or info.source_id
+            item.pipe = True
+            return
+
+        result = item.downloader.download(item.source)
+        item.title = item.title or result.title
+        item.source_id = item.source_id or result.source_id
+        item.audio_path = prepare_audio(config, result.audio_path, item.source_id)
+        log_info(f"[{item.index}] Downloaded: {item.title or item.source}")
+
+    def _transcribe(self, item: BatchItem) -> None:
+        if item.transcript is not None:
+            return
+        try:
+            if item.pipe:
+                with item.downloader.open_pcm_stream(item.source) as pcm:
+                    item.transcript = self._transcriber.transcribe_pcm(
+                        pcm, language=self.config.language,
+                    )
+            else:
+                item.transcript = self._transcriber.transcribe(
+                    item.audio_path, language=self.config.language,
+                )
+        finally:
+            self._cleanup(item)
+        if self._cache is not None:
+            self._cache.put(item.source_id, self.config, item.transcript)
+        log_info(f"[{item.index}] Transcribed: {len(item.transcript.text)} characters")
+
+    def _summarize(self, item: BatchItem) -> None:
+        if self._summarizer is None:
+            return
+        summary = self._summarizer.summarize_transcript(item.transcript)
+        if not summary.text:
+            raise RuntimeError(summary.error or "summarizer returned empty result")
+        item.summary = summary
+        log_info(f"[{item.index}] Summarized: {len(summary.text)} characters")
+
+    @staticmethod
+    def _cleanup(item: BatchItem) -> None:
+        """删除 yt-dlp 临时目录（下载的原始音频）"""
+        from star_summary.downloader.ytdlp import YtdlpDownloader
+
+        if isinstance(item.downloader, YtdlpDownloader):
+            shutil.rmtree(item.downloader.tmp_dir, ignore_errors=True)
@@ -1,12 +1,13 @@
 """Telegram Bot for StarSummary"""
 
+import asyncio
 import io
 import os
 import re
-import shutil
-import tempfile
+import time
 
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ReplyParameters, Update
+from telegram.error import BadRequest, RetryAfter
 from telegram.ext import (
     Application,
     CallbackQueryHandler,
@@ -15,7 +16,13 @@ from telegram.ext import (
     filters,
 )
 from star_summary.config import Config
-from star_summary.utils import format_time
+from star_summary.jobs import (
+    DOWNLOADING, FAILED, QUEUED, TRANSCRIBING, Job, JobStore, advance_job, get_job_store,
+)
+from star_summary.metrics import CACHE_REQUESTS, JOBS_RUNNING, QUEUE_DEPTH, start_metrics_server
+from star_summary.models import TranscriptResult
+from star_summary.pool import QueueFullError, WorkerPool
+from star_summary.utils import format_time, log_context, log_error, log_info, log_step, log_success
 
 WELCOME_TEXT = """✦ StarSummary (星语) ✦
 
@@ -57,6 +64,21 @@ _URL_PATTERN = re.compile(r'https?://\S+')
 # Telegram 单条消息最大长度
 _MAX_MSG_LEN = 4000
 
+# 流式总结时两次 edit_text 的最小间隔（秒），避免触发 Telegram 频率限制
+_STREAM_EDIT_INTERVAL = 1.5
+
+# 转录中刷新状态消息（进度、最新识别的一句）的间隔（秒）
+_STATUS_EDIT_INTERVAL = 5.0
+
+# 已送达的任务及其转录保留天数
+_JOB_RETENTION_DAYS = 7
+
+# 预取的总结超过该时间（秒）未被取用即取消并丢弃
+_PREFETCH_TTL = 15 * 60
+
+# 全局同时进行的预取请求数，避免转录高峰时预取挤占 API 并发
+_PREFETCH_CONCURRENCY = 2
+
 
 def _get_allowed_users() -> set[int]:
     """读取 ALLOWED_TELEGRAM_USERS 环境变量，返回允许的用户 ID 集合。空集合表示不限制。"""
@@ -87,31 +109,66 @@ def _is_url(text: str) -> bool:
     return bool(_URL_PATTERN.match(text.strip()))
 
 
-def _run_transcribe(audio_path: str) -> tuple[str, str]:
+def _get_pool(context) -> WorkerPool:
+    return context.application.bot_data["pool"]
+
+
+def _get_job_store(context) -> JobStore:
+    return context.application.bot_data["jobs"]
+
+
+class _JobChat:
     """
-    执行转录流水线，返回 (转录文本, 状态信息)。
+    向任务所在会话回复：引用用户的原消息（已删除时照常发送）。
+    实时处理和重启后恢复的任务走同一条路径。
     """
-    config = Config()
-    from star_summary.transcriber import get_transcriber
 
-    transcriber = get_transcriber(
-        engine=config.engine,
-        model=config.whisper_model,
-        api_key=config.dashscope_api_key,
-    )
+    def __init__(self, bot, job: Job) -> None:
+        self.bot = bot
+        self.chat_id = job.chat_id
+        self._reply = ReplyParameters(message_id=job.message_id, allow_sending_without_reply=True)
+
+    async def reply_text(self, text: str, **kwargs):
+        return await self.bot.send_message(self.chat_id, text, reply_parameters=self._reply, **kwargs)
+
+    async def reply_document(self, document, **kwargs):
+        return await self.bot.send_document(
+            self.chat_id, document, reply_parameters=self._reply, **kwargs,
+        )
+
+
+def _queue_full_text(pool: WorkerPool) -> str:
+    return f"⚠️ 你已有 {pool.max_per_user} 个任务在处理或排队，请等待完成后再发送。"
+
 
-    transcript = transcriber.transcribe(audio_path, language=config.language)
+async def _acquire_slot(message, ticket, running_text: str, status_msg=None):
+    """排队时回复排队位置，拿到执行槽位后把状态更新为 running_text，返回状态消息"""
+    text = f"🕒 排队中（第 {ticket.position} 位）..." if ticket.position else running_text
+    if status_msg is None:
+        status_msg = await message.reply_text(text)
+    elif status_msg.text != text:
+        status_msg = await status_msg.edit_text(text)
 
+    await ticket.wait()
+    if text != running_text:
+        status_msg = await status_msg.edit_text(running_text)
+    return status_msg
+
+
+def _describe_transcript(transcript: TranscriptResult, cached: bool = False) -> str:
+    """生成状态信息行"""
     info_parts = [
         f"引擎: {transcript.engine}",
         f"语言: {transcript.language}",
     ]
     if transcript.duration > 0:
         info_parts.append(f"时长: {format_time(transcript.duration)}")
-    info_parts.append(f"耗时: {transcript.transcribe_time:.1f}s")
+    if cached:
+        info_parts.append("缓存命中")
+    else:
+        info_parts.append(f"耗时: {transcript.transcribe_time:.1f}s")
     info_parts.append(f"字符: {len(transcript.text)}")
-
-    return transcript.text, " | ".join(info_parts)
+    return " | ".join(info_parts)
 
 
 def _has_deepseek_key() -> bool:
@@ -122,12 +179,116 @@ def _has_deepseek_key() -> bool:
 # 总结风格预设
 _SUMMARY_STYLES: dict[str, str] = {
     "brief": "请用2-3句话概括这段内容的核心信息，简明扼要。",
-    "detailed": "请对以下内容进行详细总结：先概括主题，再分点列出关键内容，标注重要数据和结论。",
-    "keypoints": "请从以下内容中提取所有关键要点、数据、结论，用编号列表呈现。",
+    "detailed": "请对这段内容进行详细总结：先概括主题，再分点列出关键内容，标注重要数据和结论。",
+    "keypoints": "请从这段内容中提取所有关键要点、数据、结论，用编号列表呈现。",
+}
+
+# 各风格结果消息的标题
+_STYLE_TITLES: dict[str, str] = {
+    "brief": "简洁摘要",
+    "detailed": "详细总结",
+    "keypoints": "提取要点",
 }
 
 
-async def _send_transcript(update: Update, context, text: str, info: str) -> None:
+def _get_prefetch_styles() -> list[str]:
+    """读取 STAR_SUMMARY_PREFETCH_STYLES（逗号分隔的风格名，如 brief），返回有效的风格列表。空列表表示不预取。"""
+    raw = os.environ.get("STAR_SUMMARY_PREFETCH_STYLES", "")
+    styles = []
+    for part in raw.split(","):
+        part = part.strip()
+        if part in _SUMMARY_STYLES and part not in styles:
+            styles.append(part)
+    return styles
+
+
+_prefetch_slots = asyncio.Semaphore(_PREFETCH_CONCURRENCY)
+
+
+class _SummaryPrefetch:
+    """
+    一个会话最近一份转录的预取总结：system prompt → 后台任务（结果为总结全文）。
+    每个会话只保留一份，新转录送达或超过 _PREFETCH_TTL 未取用时取消剩余任务。
+    """
+
+    def __init__(self, transcript: str) -> None:
+        self.transcript = transcript
+        self.tasks: dict[str, asyncio.Task] = {}
+        self._expiry = asyncio.get_running_loop().call_later(_PREFETCH_TTL, self.cancel)
+
+    def take(self, transcript: str, system_prompt: str) -> asyncio.Task | None:
+        """取走与当前转录和风格对应的任务（之后不再随 cancel 取消）"""
+        if transcript != self.transcript:
+            return None
+        return self.tasks.pop(system_prompt, None)
+
+    def cancel(self) -> None:
+        self._expiry.cancel()
+        for task in self.tasks.values():
+            task.cancel()
+        self.tasks.clear()
+
+
+async def _prefetch_summary(transcript: str, system_prompt: str) -> str:
+    """在后台完整生成一份总结；结果同时写入总结缓存"""
+    from star_summary.summarizer import get_summarizer
+
+    async with _prefetch_slots:
+        summarizer = get_summarizer(api_key=os.environ.get("DEEPSEEK_API_KEY", "").strip())
+        parts = [delta async for delta in summarizer.asummarize_stream(transcript, system_prompt=system_prompt)]
+    return "".join(parts)
+
+
+def _log_prefetch_result(task: asyncio.Task) -> None:
+    # 取出异常，未被取用的失败任务不会在退出时报 "exception was never retrieved"
+    if not task.cancelled() and task.exception() is not None:
+        log_error(f"Summary prefetch failed: {task.exception()}")
+
+
+def _start_prefetch(chat_data: dict, transcript: str) -> None:
+    """
+    转录送达后在后台开始生成预设风格的总结，替换该会话上一份转录的预取。
+    按会话保存：总结按钮在转录所在的会话里点击，同一用户在别的会话中的转录不会把它顶掉
+    """
+    previous = chat_data.pop("summary_prefetch", None)
+    if previous is not None:
+        previous.cancel()
+
+    styles = _get_prefetch_styles()
+    if not styles or not _has_deepseek_key():
+        return
+    prefetch = _SummaryPrefetch(transcript)
+    for style in styles:
+        system_prompt = _SUMMARY_STYLES[style]
+        task = asyncio.create_task(_prefetch_summary(transcript, system_prompt))
+        task.add_done_callback(_log_prefetch_result)
+        prefetch.tasks[system_prompt] = task
+    chat_data["summary_prefetch"] = prefetch
+    log_info(f"Prefetching summaries: {', '.join(styles)}")
+
+
+async def _take_prefetched(chat_data: dict, transcript: str, system_prompt: str) -> str | None:
+    """
+    有对应的预取任务时等它完成并返回总结（已完成则立即返回）；
+    没有开启预取返回 None，预取未覆盖该风格或失败时返回空字符串。
+    """
+    prefetch: _SummaryPrefetch | None = chat_data.get("summary_prefetch")
+    if prefetch is None:
+        return None
+    task = prefetch.take(transcript, system_prompt)
+    text = ""
+    if task is not None:
+        # 用 wait 而不是直接 await：任务被取消时不把 CancelledError 带进当前 handler
+        await asyncio.wait({task})
+        if not task.cancelled() and task.exception() is None:
+            text = task.result()
+    CACHE_REQUESTS.inc(cache="prefetch", result="hit" if text else "miss")
+    return text
+
+
+async def _send_transcript(
+    chat: _JobChat, user_data: dict, chat_data: dict, text: str, info: str,
+) -> None:
     """发送转录结果，过长则以文件形式发送。配置了 DeepSeek 时显示总结按钮。"""
     # 构建 inline keyboard
     if _has_deepseek_key():
@@ -140,13 +301,14 @@ async def _send_transcript(update: Update, context, text: str, info: str) -> Non
                 InlineKeyboardButton("🎯 提取要点", callback_data="sum:keypoints"),
                 InlineKeyboardButton("✨ 自定义", callback_data="sum:custom"),
             ],
+            [InlineKeyboardButton("📚 全部风格", callback_data="sum:all")],
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
     else:
         reply_markup = None
 
     if len(text) <= _MAX_MSG_LEN:
-        await update.message.reply_text(
+        await chat.reply_text(
             f"{text}\n\n📊 {info}",
             reply_markup=reply_markup,
         )
@@ -154,15 +316,114 @@ async def _send_transcript(update: Update, context, text: str, info: str) -> Non
         # 以 txt 文件发送
         buf = io.BytesIO(text.encode("utf-8"))
         buf.name = "transcript.txt"
-        await update.message.reply_document(
+        await chat.reply_document(
             document=buf,
             caption=f"📝 转录完成（{len(text)} 字符）\n📊 {info}",
             reply_markup=reply_markup,
         )
 
     # 存储转录文本供后续总结/导出使用
-    context.user_data["last_transcript"] = text
-    context.user_data["last_info"] = info
+    user_data["last_transcript"] = text
+    user_data["last_info"] = info
+    _start_prefetch(chat_data, text)
+
+
+async def _process_job(app: Application, job: Job, status_msg=None) -> None:
+    """
+    在任务池中逐阶段推进任务（每阶段的产物都已落盘），结束后送达结果。
+    实时提交和重启恢复共用；已完成但未送达的任务直接补发。
+    """
+    with log_context(job_id=job.id, user_id=job.user_id):
+        await _run_job(app, job, status_msg)
+
+
+async def _advance(pool: WorkerPool, store: JobStore, job: Job, status_msg) -> Job:
+    """
+    在任务池中推进一个阶段。进度经任务库传回（进程池模式下回调无法跨进程），
+    转录期间定期把进度和最新识别的一句写进状态消息。
+    """
+    store.report(job.id, None, "")  # 清掉上一阶段的进度
+    task = asyncio.ensure_future(pool.run(advance_job, store.root, job.id, store.report))
+    shown = status_msg.text
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=_STATUS_EDIT_INTERVAL)
+        if done:
+            return task.result()
+        if job.state != TRANSCRIBING:
+            continue
+        fraction, desc = store.progress(job.id)
+        if not desc:
+            continue
+        percent = f"{fraction:.0%} · " if fraction is not None else ""
+        text = f"🎙️ 正在转录: {job.title or '未知标题'}\n{percent}{desc}"
+        if text != shown:
+            delay = await _edit_stream_preview(status_msg, text)
+            shown = text
+            if delay:
+                await asyncio.wait({task}, timeout=delay)
+
+
+async def _run_job(app: Application, job: Job, status_msg) -> None:
+    pool: WorkerPool = app.bot_data["pool"]
+    store: JobStore = app.bot_data["jobs"]
+    chat = _JobChat(app.bot, job)
+
+    if not job.finished:
+        downloading = job.kind == "url" and job.state in (QUEUED, DOWNLOADING)
+        running_text = "⏳ 正在下载音频..." if downloading else "🎙️ 正在转录..."
+        try:
+            async with pool.job(job.user_id) as ticket:
+                status_msg = await _acquire_slot(chat, ticket, running_text, status_msg)
+                while not job.finished:
+                    if job.state == TRANSCRIBING:
+                        text = f"🎙️ 正在转录: {job.title or '未知标题'}"
+                        if status_msg.text != text:
+                            status_msg = await status_msg.edit_text(text)
+                    job = await _advance(pool, store, job, status_msg)
+        except QueueFullError:
+            await chat.reply_text(_queue_full_text(pool))
+            store.mark_delivered(store.update(job, state=FAILED, error="queue full"))
+            return
+
+    if job.state == FAILED:
+        if job.failed_stage == DOWNLOADING:
+            text = (
+                f"❌ 下载失败: {job.error}\n\n"
+                "请检查链接是否正确，或尝试其他平台的链接。\n"
+                "支持：YouTube, Bilibili, 抖音, 西瓜视频, Twitter/X 等"
+            )
+        else:
+            text = f"❌ 转录失败: {job.error}\n\n请稍后重试。"
+        if status_msg is not None:
+            await status_msg.edit_text(text)
+        else:
+            await chat.reply_text(text)
+        store.mark_delivered(job)
+        return
+
+    transcript = store.load_transcript(job)
+    if transcript is None:
+        # 检查点丢失（手动清理过缓存目录等）：从头重新处理
+        await _process_job(app, store.update(job, state=QUEUED), status_msg)
+        return
+    if status_msg is not None:
+        await status_msg.delete()
+    info = _describe_transcript(transcript, cached=job.cached)
+    await _send_transcript(
+        chat, app.user_data[job.user_id], app.chat_data[job.chat_id], transcript.text, info,
+    )
+    store.mark_delivered(job)
+
+
+async def _resume_jobs(app: Application) -> None:
+    """启动时恢复上次未完成 / 未送达的任务"""
+    store: JobStore = app.bot_data["jobs"]
+    store.purge(_JOB_RETENTION_DAYS * 86400)
+    jobs = store.pending("telegram")
+    if jobs:
+        log_info(f"Resuming {len(jobs)} unfinished jobs")
+    for job in jobs:
+        app.create_task(_process_job(app, job))
 
 
 async def cmd_start(update: Update, context) -> None:
@@ -183,38 +444,19 @@ async def handle_url(update: Update, context) -> None:
     if not _is_url(url):
         return
 
-    status_msg = await update.message.reply_text("⏳ 正在下载音频...")
-
-    # 下载
-    from star_summary.downloader import get_downloader
-    from star_summary.downloader.ytdlp import YtdlpDownloader
-
-    downloader = get_downloader(url)
-    try:
-        download_result = downloader.download(url)
-    except Exception as e:
-        await status_msg.edit_text(
-            f"❌ 下载失败: {e}\n\n"
-            "请检查链接是否正确，或尝试其他平台的链接。\n"
-            "支持：YouTube, Bilibili, 抖音, 西瓜视频, Twitter/X 等"
-        )
-        return
-
-    title = download_result.title or "未知标题"
-    await status_msg.edit_text(f"🎙️ 正在转录: {title}")
-
-    # 转录
-    try:
-        text, info = _run_transcribe(download_result.audio_path)
-    except Exception as e:
-        await status_msg.edit_text(f"❌ 转录失败: {e}\n\n请稍后重试。")
+    pool = _get_pool(context)
+    user_id = update.effective_user.id if update.effective_user else 0
+    if pool.pending_for(user_id) >= pool.max_per_user:
+        await update.message.reply_text(_queue_full_text(pool))
         return
-    finally:
-        if isinstance(downloader, YtdlpDownloader):
-            shutil.rmtree(downloader.tmp_dir, ignore_errors=True)
 
-    await status_msg.delete()
-    await _send_transcript(update, context, text, info)
+    job = _get_job_store(context).create(
+        "url", url, "telegram",
+        user_id=user_id,
+        chat_id=update.effective_chat.id,
+        message_id=update.message.message_id,
+    )
+    await _process_job(context.application, job)
 
 
 async def handle_file(update: Update, context) -> None:
@@ -233,65 +475,116 @@ async def handle_file(update: Update, context) -> None:
         await message.reply_text("⚠️ 文件超过 20MB，Telegram 限制无法下载。\n请上传较小的文件或发送视频链接。")
         return
 
-    status_msg = await message.reply_text("⏳ 正在下载文件...")
+    pool = _get_pool(context)
+    user_id = update.effective_user.id if update.effective_user else 0
+    if pool.pending_for(user_id) >= pool.max_per_user:
+        await message.reply_text(_queue_full_text(pool))
+        return
 
-    # 下载文件到本地
-    tmp_dir = tempfile.mkdtemp(prefix="starsummary_tg_")
-    file_name = getattr(file_obj, "file_name", None) or "audio.mp3"
-    local_path = os.path.join(tmp_dir, file_name)
+    store = _get_job_store(context)
+    job = store.create(
+        "file", "", "telegram",
+        user_id=user_id,
+        chat_id=update.effective_chat.id,
+        message_id=message.message_id,
+    )
+    status_msg = await message.reply_text("⏳ 正在下载文件...")
 
+    # 下载文件到任务目录（异步 I/O，不占执行槽位），重启后可直接转录
+    file_name = os.path.basename(getattr(file_obj, "file_name", None) or "audio.mp3")
+    local_path = os.path.join(store.job_dir(job.id), file_name)
     try:
         tg_file = await file_obj.get_file()
         await tg_file.download_to_drive(local_path)
     except Exception as e:
         await status_msg.edit_text(f"❌ 文件下载失败: {e}")
-        shutil.rmtree(tmp_dir, ignore_errors=True)
-        return
-
-    await status_msg.edit_text("🎙️ 正在转录...")
-
-    # 转录
-    try:
-        text, info = _run_transcribe(local_path)
-    except Exception as e:
-        await status_msg.edit_text(f"❌ 转录失败: {e}\n\n请稍后重试。")
+        store.mark_delivered(store.update(job, state=FAILED, error=str(e)))
         return
-    finally:
-        shutil.rmtree(tmp_dir, ignore_errors=True)
 
-    await status_msg.delete()
-    await _send_transcript(update, context, text, info)
+    job = store.update(job, source=local_path, title=os.path.splitext(file_name)[0])
+    await _process_job(context.application, job, status_msg)
 
 
-async def _run_summary(query, context, system_prompt: str) -> None:
-    """执行总结并回复结果"""
+async def _edit_stream_preview(status_msg, text: str) -> float:
+    """更新流式预览，返回下次允许编辑前需要额外等待的秒数"""
+    try:
+        await status_msg.edit_text(text)
+    except RetryAfter as e:
+        # 触发 Telegram 频率限制：跳过本次，按服务端要求推迟下一次
+        retry_after = e.retry_after
+        return retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+    except BadRequest:
+        pass  # 内容未变化等，忽略
+    return 0.0
+
+
+async def _run_summary(message, context, system_prompt: str, title: str = "AI 总结") -> None:
+    """流式生成总结：边生成边编辑状态消息，完成后回复最终结果"""
     transcript = context.user_data.get("last_transcript", "")
     deepseek_key = os.environ.get("DEEPSEEK_API_KEY", "").strip()
 
-    status_msg = await query.message.reply_text("⏳ 正在生成总结...")
+    status_msg = await message.reply_text("⏳ 正在生成总结...")
+
+    from star_summary.summarizer import get_summarizer
+
+    summarizer = get_summarizer(api_key=deepseek_key)
+    t0 = time.monotonic()
+
+    # 预取已完成时直接使用；仍在生成时等它结束，不再重复请求；未命中则照常流式生成
+    summary_text = await _take_prefetched(context.chat_data, transcript, system_prompt)
+    if not summary_text:
+        parts: list[str] = []
+        next_edit = t0 + _STREAM_EDIT_INTERVAL
+        try:
+            with log_context(chat_id=message.chat_id):
+                async for delta in summarizer.asummarize_stream(transcript, system_prompt=system_prompt):
+                    parts.append(delta)
+                    now = time.monotonic()
+                    if now < next_edit:
+                        continue
+                    preview = "".join(parts)
+                    if len(preview) + 20 <= _MAX_MSG_LEN:
+                        preview = f"🤖 {title}（生成中）\n\n{preview} ▌"
+                    else:
+                        preview = f"⏳ 总结较长，完成后以文件发送（已生成 {len(preview)} 字符）..."
+                    delay = await _edit_stream_preview(status_msg, preview)
+                    next_edit = time.monotonic() + _STREAM_EDIT_INTERVAL + delay
+        except Exception as e:
+            await status_msg.edit_text(f"❌ 总结失败: {e}")
+            return
+        summary_text = "".join(parts)
+
+    if not summary_text:
+        await status_msg.edit_text("❌ 总结生成失败，请稍后重试。")
+        return
 
-    try:
-        from star_summary.summarizer import get_summarizer
-
-        summarizer = get_summarizer(api_key=deepseek_key)
-        result = summarizer.summarize(transcript, system_prompt=system_prompt)
-
-        if result.text:
-            summary_info = f"模型: {result.model} | 耗时: {result.summarize_time:.1f}s"
-            if len(result.text) <= _MAX_MSG_LEN:
-                await status_msg.edit_text(f"🤖 AI 总结\n\n{result.text}\n\n📊 {summary_info}")
-            else:
-                await status_msg.delete()
-                buf = io.BytesIO(result.text.encode("utf-8"))
-                buf.name = "summary.txt"
-                await query.message.reply_document(
-                    document=buf,
-                    caption=f"🤖 AI 总结（{len(result.text)} 字符）\n📊 {summary_info}",
-                )
-        else:
-            await status_msg.edit_text("❌ 总结生成失败，请稍后重试。")
-    except Exception as e:
-        await status_msg.edit_text(f"❌ 总结失败: {e}")
+    model = getattr(summarizer, "model", "")
+    summary_info = f"模型: {model} | 耗时: {time.monotonic() - t0:.1f}s"
+    if len(summary_text) <= _MAX_MSG_LEN:
+        await status_msg.edit_text(f"🤖 {title}\n\n{summary_text}\n\n📊 {summary_info}")
+    else:
+        await status_msg.delete()
+        buf = io.BytesIO(summary_text.encode("utf-8"))
+        buf.name = "summary.txt"
+        await message.reply_document(
+            document=buf,
+            caption=f"🤖 {title}（{len(summary_text)} 字符）\n📊 {summary_info}",
+        )
+
+
+async def _run_all_summaries(message, context) -> None:
+    """
+    生成全部预设风格。先完成一种（优先已预取的），服务端随之缓存了转录这段共同前缀，
+    其余风格再并发请求，只需处理各自的风格要求。
+    """
+    prefetched = _get_prefetch_styles()
+    styles = sorted(_SUMMARY_STYLES, key=lambda style: style not in prefetched)
+    first, rest = styles[0], styles[1:]
+    await _run_summary(message, context, _SUMMARY_STYLES[first], title=_STYLE_TITLES[first])
+    await asyncio.gather(*(
+        _run_summary(message, context, _SUMMARY_STYLES[style], title=_STYLE_TITLES[style])
+        for style in rest
+    ))
 
 
 async def handle_callback(update: Update, context) -> None:
@@ -324,11 +617,15 @@ async def handle_callback(update: Update, context) -> None:
         context.user_data["waiting_custom_style"] = True
         return
 
+    if style == "all":
+        await _run_all_summaries(query.message, context)
+        return
+
     system_prompt = _SUMMARY_STYLES.get(style)
     if not system_prompt:
         return
 
-    await _run_summary(query, context, system_prompt)
+    await _run_summary(query.message, context, system_prompt, title=_STYLE_TITLES[style])
 
 
 async def handle_custom_style(update: Update, context) -> None:
@@ -361,30 +658,7 @@ async def handle_custom_style(update: Update, context) -> None:
         await update.message.reply_text("⚠️ 未配置 DEEPSEEK_API_KEY，无法生成总结。")
         return
 
-    status_msg = await update.message.reply_text("⏳ 正在生成总结...")
-
-    try:
-        from star_summary.summarizer import get_summarizer
-
-        summarizer = get_summarizer(api_key=deepseek_key)
-        result = summarizer.summarize(transcript, system_prompt=text)
-
-        if result.text:
-            summary_info = f"模型: {result.model} | 耗时: {result.summarize_time:.1f}s"
-            if len(result.text) <= _MAX_MSG_LEN:
-                await status_msg.edit_text(f"🤖 AI 总结\n\n{result.text}\n\n📊 {summary_info}")
-            else:
-                await status_msg.delete()
-                buf = io.BytesIO(result.text.encode("utf-8"))
-                buf.name = "summary.txt"
-                await update.message.reply_document(
-                    document=buf,
-                    caption=f"🤖 AI 总结（{len(result.text)} 字符）\n📊 {summary_info}",
-                )
-        else:
-            await status_msg.edit_text("❌ 总结生成失败，请稍后重试。")
-    except Exception as e:
-        await status_msg.edit_text(f"❌ 总结失败: {e}")
+    await _run_summary(update.message, context, text)
 
 
 async def handle_unknown(update: Update, context) -> None:
@@ -405,13 +679,34 @@ def main() -> None:
 
     token = os.environ.get("TELEGRAM_BOT_TOKEN", "")
     if not token:
-        print("❌ TELEGRAM_BOT_TOKEN not set")
-        print("   Set it in .env or environment: export TELEGRAM_BOT_TOKEN='your-token'")
+        log_error("TELEGRAM_BOT_TOKEN not set")
+        log_info("Set it in .env or environment: export TELEGRAM_BOT_TOKEN='your-token'")
         return
 
-    print("✦ StarSummary Bot starting...")
+    log_step("✦", "StarSummary Bot starting...")
+
+    pool = WorkerPool.from_env()
+    log_info(f"Worker pool: {pool.workers} {pool.executor_kind} workers, {pool.max_per_user} jobs per user")
+
+    async def _shutdown_pool(_app: Application) -> None:
+        pool.shutdown()
+
+    # concurrent_updates: 允许多个用户的消息并行处理，重活交给 pool
+    app = (
+        Application.builder()
+        .token(token)
+        .concurrent_updates(True)
+        .post_init(_resume_jobs)
+        .post_shutdown(_shutdown_pool)
+        .build()
+    )
+    app.bot_data["pool"] = pool
+    config = Config()
+    app.bot_data["jobs"] = get_job_store(config)
 
-    app = Application.builder().token(token).build()
+    QUEUE_DEPTH.set_function(lambda: pool.queued, queue="bot")
+    JOBS_RUNNING.set_function(lambda: pool.running, queue="bot")
+    start_metrics_server(config.metrics_port, config.metrics_host)
 
     # 命令处理
     app.add_handler(CommandHandler("start", cmd_start))
@@ -435,7 +730,7 @@ def main() -> None:
     # 未知消息
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_unknown))
 
-    print("✦ Bot is running. Press Ctrl+C to stop.")
+    log_success("Bot is running. Press Ctrl+C to stop.")
     app.run_polling()
 
 
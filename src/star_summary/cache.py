@@ -0,0 +1,315 @@
+"""持久化缓存 - SQLite 索引 + 内容寻址 blob 存储、归一化音频文件，CLI / Web / Bot 共享"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+from typing import Any, Iterator
+
+from star_summary.audio import normalize_audio
+from star_summary.config import Config
+from star_summary.metrics import CACHE_REQUESTS
+from star_summary.models import TranscriptResult, transcript_from_dict
+from star_summary.utils import log_info, log_success
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    blob        TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at);
+"""
+
+
+def file_digest(path: str) -> str:
+    """计算文件内容的 sha256，作为本地文件 / 上传文件的来源 ID"""
+    with open(path, "rb") as f:
+        return "sha256:" + hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class BlobCache:
+    """
+    键值缓存：值以 JSON 存为 blobs/<hash[:2]>/<hash>.json，
+    索引记录 (namespace, key) → blob、大小和访问时间。
+    总大小超过 max_bytes 时按最久未访问淘汰，超过 ttl 的条目视为未命中。
+    多进程安全：每次操作独立连接，blob 先写临时文件再原子替换。
+    """
+
+    def __init__(self, root: str, max_bytes: int, ttl: float) -> None:
+        self.root = os.path.expanduser(root)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._blob_dir = os.path.join(self.root, "blobs")
+        os.makedirs(self._blob_dir, exist_ok=True)
+        self._db_path = os.path.join(self.root, "index.sqlite3")
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def get(self, namespace: str, key: str) -> dict[str, Any] | None:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT blob, created_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+            blob, created_at = row
+            if self.ttl > 0 and now - created_at > self.ttl:
+                self._delete_entry(conn, namespace, key, blob)
+                return None
+            try:
+                with open(self._blob_path(blob), encoding="utf-8") as f:
+                    value = json.load(f)
+            except (OSError, ValueError):
+                # blob 丢失或损坏：删掉索引，当作未命中
+                self._delete_entry(conn, namespace, key, blob)
+                return None
+            conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key),
+            )
+        return value
+
+    def put(self, namespace: str, key: str, value: dict[str, Any]) -> None:
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        blob = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(blob)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(namespace, key, blob, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, blob, len(data), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """先清理过期条目，再按 LRU 淘汰到 max_bytes 以内"""
+        if self.ttl > 0:
+            expired = conn.execute(
+                "SELECT namespace, key, blob FROM entries WHERE created_at < ?",
+                (now - self.ttl,),
+            ).fetchall()
+            for namespace, key, blob in expired:
+                self._delete_entry(conn, namespace, key, blob)
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT namespace, key, blob, size FROM entries ORDER BY accessed_at"
+        ).fetchall()
+        for namespace, key, blob, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._delete_entry(conn, namespace, key, blob)
+            total -= size
+
+    def _delete_entry(
+        self, conn: sqlite3.Connection, namespace: str, key: str, blob: str,
+    ) -> None:
+        conn.execute(
+            "DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key),
+        )
+        # 内容寻址：同一 blob 可能被多个 key 引用，无人引用时才删文件
+        still_used = conn.execute(
+            "SELECT 1 FROM entries WHERE blob = ? LIMIT 1", (blob,),
+        ).fetchone()
+        if still_used is None:
+            try:
+                os.remove(self._blob_path(blob))
+            except OSError:
+                pass
+
+    def _blob_path(self, blob: str) -> str:
+        return os.path.join(self._blob_dir, blob[:2], f"{blob}.json")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """短连接：成功时提交，结束时关闭"""
+        conn = sqlite3.connect(self._db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+class TranscriptCache:
+    """转录结果缓存，键为 (来源 ID, 引擎, 模型, 语言)"""
+
+    NAMESPACE = "transcript"
+
+    def __init__(self, store: BlobCache) -> None:
+        self.store = store
+
+    @staticmethod
+    def make_key(source_id: str, config: Config) -> str:
+        model = config.whisper_model if config.engine == "whisper" else config.asr_model
+        language = config.language or "auto"
+        return f"{source_id}|{config.engine}|{model}|{language}"
+
+    def get(self, source_id: str, config: Config) -> TranscriptResult | None:
+        if not source_id:
+            return None
+        value = self.store.get(self.NAMESPACE, self.make_key(source_id, config))
+        CACHE_REQUESTS.inc(cache="transcript", result="miss" if value is None else "hit")
+        if value is None:
+            return None
+        transcript = transcript_from_dict(value)
+        log_success(f"Transcript cache hit: {source_id}")
+        return transcript
+
+    def put(self, source_id: str, config: Config, transcript: TranscriptResult) -> None:
+        if not source_id:
+            return
+        try:
+            self.store.put(self.NAMESPACE, self.make_key(source_id, config), asdict(transcript))
+        except (OSError, sqlite3.Error) as e:
+            # 缓存写入失败不影响主流程
+            log_info(f"Failed to write transcript cache: {e}")
+
+
+def _blob_store(config: Config) -> BlobCache:
+    return BlobCache(
+        config.cache_dir,
+        max_bytes=config.cache_max_mb * 1024 * 1024,
+        ttl=config.cache_ttl_days * 86400,
+    )
+
+
+def get_transcript_cache(config: Config) -> TranscriptCache | None:
+    """根据配置创建转录缓存，未启用时返回 None"""
+    if not config.cache:
+        return None
+    return TranscriptCache(_blob_store(config))
+
+
+class SummaryCache:
+    """
+    LLM 补全结果缓存，键为 (system + user 消息的哈希, 模型, max_tokens, temperature)。
+    消息里已包含转录文本和总结风格，同一转录重复点同一风格直接返回；
+    长转录的分段要点也各自缓存，换风格时只需重新请求合并这一步。
+    """
+
+    NAMESPACE = "summary"
+
+    def __init__(self, store: BlobCache) -> None:
+        self.store = store
+
+    @staticmethod
+    def make_key(system: str, prompt: str, model: str, max_tokens: int, temperature: float) -> str:
+        digest = hashlib.sha256(f"{system}\0{prompt}".encode("utf-8")).hexdigest()
+        return f"{digest}|{model}|{max_tokens}|{temperature}"
+
+    def get(self, key: str) -> str | None:
+        value = self.store.get(self.NAMESPACE, key)
+        CACHE_REQUESTS.inc(cache="summary", result="miss" if value is None else "hit")
+        if value is None:
+            return None
+        log_success("Summary cache hit")
+        return value.get("text", "")
+
+    def put(self, key: str, text: str) -> None:
+        if not text:
+            return
+        try:
+            self.store.put(self.NAMESPACE, key, {"text": text})
+        except (OSError, sqlite3.Error) as e:
+            log_info(f"Failed to write summary cache: {e}")
+
+
+def get_summary_cache(config: Config) -> SummaryCache | None:
+    """根据配置创建总结缓存（与转录缓存共用存储和大小上限），未启用时返回 None"""
+    if not config.cache:
+        return None
+    return SummaryCache(_blob_store(config))
+
+
+class AudioCache:
+    """
+    归一化音频缓存：按来源 ID 保存 16kHz 单声道 wav，
+    换引擎 / 模型 / 语言重新转录同一来源时无需再次转码。
+    总大小超过 max_bytes 时按修改时间（命中时刷新）淘汰最旧的文件。
+    """
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = os.path.expanduser(root)
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def normalize(self, source_id: str, src: str) -> str:
+        """返回 src 归一化后的缓存路径，未命中时转码写入"""
+        name = hashlib.sha256(source_id.encode("utf-8")).hexdigest()
+        path = os.path.join(self.root, f"{name}.wav")
+        if os.path.exists(path):
+            os.utime(path)
+            CACHE_REQUESTS.inc(cache="audio", result="hit")
+            log_success("Normalized audio loaded from cache")
+            return path
+
+        CACHE_REQUESTS.inc(cache="audio", result="miss")
+        normalize_audio(src, path)
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: str) -> None:
+        files = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(".wav") and entry.is_file():
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+def get_audio_cache(config: Config) -> AudioCache | None:
+    """根据配置创建归一化音频缓存，未启用时返回 None"""
+    if not config.cache or config.audio_cache_mb <= 0:
+        return None
+    return AudioCache(
+        os.path.join(config.cache_dir, "audio"),
+        max_bytes=config.audio_cache_mb * 1024 * 1024,
+    )
+
+
+def prepare_audio(config: Config, audio_path: str, source_id: str) -> str:
+    """
+    转录前的归一化阶段：有来源 ID 且启用缓存时返回缓存的 16kHz 单声道 wav，
+    否则原样返回，由转录器自行归一化。失败时同样退回原文件。
+    """
+    cache = get_audio_cache(config)
+    if cache is None or not source_id:
+        return audio_path
+    try:
+        return cache.normalize(source_id, audio_path)
+    except (OSError, RuntimeError) as e:
+        log_info(f"Audio normalization cache unavailable: {e}")
+        return audio_path
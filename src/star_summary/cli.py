@@ -1,19 +1,28 @@
 """CLI 入口 - argparse 参数解析与流程编排"""
 
 import argparse
+import json
 import os
 import re
 import shutil
 import subprocess
 import sys
 from datetime import datetime
+from typing import Callable
 
 from star_summary import __version__
+from star_summary.batch import BatchItem, BatchPipeline, read_input_list
 from star_summary.config import Config
-from star_summary.models import TranscriptResult, SummaryResult
+from star_summary.downloader.base import AbstractDownloader
+from star_summary.downloader.ytdlp import YtdlpDownloader
+from star_summary.metrics import timed_stage
+from star_summary.models import (
+    DownloadResult, PlaylistEntry, Segment, SourceInfo, SummaryResult, TranscriptResult,
+)
+from star_summary.transcriber.base import AbstractTranscriber, SegmentCallback, drain
 from star_summary.utils import (
     _Colors as _C,
-    log_step, log_info, log_success, log_warn, log_error, format_time,
+    flush_logs, log_step, log_info, log_success, log_warn, log_error, format_time,
 )
 
 
@@ -50,6 +59,36 @@ def _build_output_dir(base_dir: str, title: str) -> tuple[str, str]:
     return output_dir, file_prefix
 
 
+def _timed_line(segment: Segment) -> str:
+    return f"[{format_time(segment.start)} → {format_time(segment.end)}]  {segment.text}\n"
+
+
+class _LiveTimed:
+    """转录时把识别出的片段逐行追加到 _timed.txt，长音频不必等全部识别完就能查看；保存结果时整体重写"""
+
+    def __init__(self, base_dir: str) -> None:
+        self.base_dir = base_dir
+        self.target: tuple[str, str] | None = None  # (output_dir, file_prefix)
+        self._file = None
+
+    def start(self, title: str) -> SegmentCallback:
+        output_dir, file_prefix = self.target = _build_output_dir(self.base_dir, title or "untitled")
+        path = os.path.join(output_dir, f"{file_prefix}_timed.txt")
+        self._file = open(path, "w", encoding="utf-8")
+        log_info(f"Writing segments to {os.path.abspath(path)} as they are recognized")
+        return self._write
+
+    def _write(self, segment: Segment) -> None:
+        self._file.write(_timed_line(segment))
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@timed_stage("output")
 def _save_results(
     transcript: TranscriptResult,
     summary: SummaryResult | None,
@@ -80,9 +119,7 @@ def _save_results(
     timed_path = os.path.join(output_dir, f"{file_prefix}_timed.txt")
     with open(timed_path, "w", encoding="utf-8") as f:
         for seg in transcript.segments:
-            start = format_time(seg.start)
-            end = format_time(seg.end)
-            f.write(f"[{start} → {end}]  {seg.text}\n")
+            f.write(_timed_line(seg))
     log_success(f"Timed transcript → {os.path.abspath(timed_path)}")
 
     # 3. summary.txt - AI 总结（仅 --summarize 时）
@@ -116,17 +153,19 @@ def _print_preview(transcript: TranscriptResult, summary: SummaryResult | None)
     preview = transcript.text[:500]
     if len(transcript.text) > 500:
         preview += f"\n... ({len(transcript.text) - 500} more characters)"
+    flush_logs()
     print(f"\n{_C.DIM}{preview}{_C.RESET}")
 
     if summary and summary.text:
         log_step("📋", "Summary:")
+        flush_logs()
         print(f"\n{summary.text}")
 
 
 def _build_config_from_args(args: argparse.Namespace) -> Config:
     """从 argparse 结果构建 Config"""
-    return Config(
-        input=args.input,
+    config = Config(
+        input=args.input[0] if len(args.input) == 1 else "",
         engine=args.engine,
         whisper_model=args.model,
         language=args.lang,
@@ -138,11 +177,19 @@ def _build_config_from_args(args: argparse.Namespace) -> Config:
         keep_audio=args.keep_audio,
         copy=args.copy,
     )
+    if args.no_cache:
+        config.cache = False
+    if args.parallel:
+        config.parallel = args.parallel
+    if args.pipe:
+        config.pipe = True
+    return config
 
 
 def _prompt(icon: str, msg: str, default: str = "") -> str:
     """带图标的交互提示，支持默认值"""
     hint = f" ({default})" if default else ""
+    flush_logs()
     try:
         return input(f"  {icon} {msg}{hint}: ").strip()
     except (EOFError, KeyboardInterrupt):
@@ -180,8 +227,8 @@ def _interactive_mode() -> Config:
     )
 
 
-def _parse_args() -> argparse.Namespace:
-    """解析命令行参数"""
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """解析命令行参数（argv 为空时读取 sys.argv）"""
     parser = argparse.ArgumentParser(
         description="StarSummary (星语) - Video/Audio → Transcript → Summary",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -194,12 +241,23 @@ Examples:
   %(prog)s "https://..." -s -o ~/summaries/
   %(prog)s "https://v.douyin.com/xxx" -cb chrome
   %(prog)s audio.mp3 --copy
+  %(prog)s URL1 URL2 URL3 -s                 (batch)
+  %(prog)s -i links.txt --download-workers 8  (batch)
+  cat links.txt | %(prog)s -                  (batch)
+  %(prog)s daemon                             (warm daemon, see README)
         """,
     )
 
     parser.add_argument(
         "input",
-        help="Video/audio URL (YouTube, Bilibili, etc.) or local file path",
+        nargs="*",
+        help="Video/audio URLs (YouTube, Bilibili, etc.) or local file paths; "
+             "'-' reads a list from stdin. More than one input runs batch mode",
+    )
+    parser.add_argument(
+        "-i", "--input-file",
+        default=None,
+        help="Read inputs from a file, one URL/path per line (# for comments)",
     )
     parser.add_argument(
         "-e", "--engine",
@@ -218,6 +276,14 @@ Examples:
         default=None,
         help="Language code, e.g. zh, en, ja (default: auto-detect)",
     )
+    parser.add_argument(
+        "-j", "--parallel",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Split long audio at silences and transcribe N chunks in parallel "
+             "(default: STAR_SUMMARY_ASR_PARALLEL or 1)",
+    )
     parser.add_argument(
         "-s", "--summarize",
         action="store_true",
@@ -254,41 +320,63 @@ Examples:
         action="store_true",
         help="Copy transcript to clipboard (macOS pbcopy)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore the transcript cache and always download/transcribe",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Treat inputs as playlists/channels and only process entries not synced before",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=0,
+        help="Sync mode: process at most N new entries per run (default: all)",
+    )
+    parser.add_argument(
+        "--download-workers",
+        type=int,
+        default=4,
+        help="Batch mode: concurrent downloads (default: 4)",
+    )
+    parser.add_argument(
+        "--transcribe-workers",
+        type=int,
+        default=2,
+        help="Batch mode: concurrent transcriptions (default: 2)",
+    )
+    parser.add_argument(
+        "--summarize-workers",
+        type=int,
+        default=4,
+        help="Batch mode: concurrent summaries (default: 4)",
+    )
+    parser.add_argument(
+        "--pipe",
+        action="store_true",
+        help="Stream URL audio through yt-dlp | ffmpeg straight into ASR, no temp files",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Run in this process even if a `starsummary daemon` is running",
+    )
 
-    return parser.parse_args()
-
-
-def _print_banner() -> None:
-    print(f"""
-{_C.MAGENTA}{_C.BOLD}  ✦ StarSummary (星语) ✦{_C.RESET}
-{_C.DIM}  Video/Audio → Transcript → Summary{_C.RESET}
-    """)
-
-
-def main() -> None:
-    from dotenv import load_dotenv
-    load_dotenv()
-
-    _print_banner()
-
-    # 无参数 → 交互模式，有参数 → CLI 模式
-    if len(sys.argv) == 1:
-        config = _interactive_mode()
-    else:
-        args = _parse_args()
-        config = _build_config_from_args(args)
-
-    # ── 检查系统依赖 ──
-    _check_system_deps()
+    return parser.parse_args(argv)
 
-    # ── Step 1: 下载/获取音频 ──
-    from star_summary.downloader import get_downloader
 
-    downloader = get_downloader(
-        config.input,
-        cookies=config.cookies,
-        cookies_from_browser=config.cookies_from_browser,
-    )
+def _download_and_transcribe(
+    config: Config,
+    downloader: AbstractDownloader,
+    source_id: str = "",
+    live: _LiveTimed | None = None,
+) -> tuple[DownloadResult, TranscriptResult]:
+    """下载（或读取本地文件）、归一化并转录，失败时直接退出；给出 live 时边识别边写出片段"""
+    if config.pipe and isinstance(downloader, YtdlpDownloader):
+        return _pipe_and_transcribe(config, downloader, live)
 
     try:
         download_result = downloader.download(config.input)
@@ -296,26 +384,28 @@ def main() -> None:
         log_error(str(e))
         sys.exit(1)
 
-    # ── Step 2: 转录 ──
-    from star_summary.transcriber import get_transcriber
+    # 归一化为 16kHz 单声道 wav（按来源缓存）
+    from star_summary.cache import prepare_audio
 
-    transcriber = get_transcriber(
-        engine=config.engine,
-        model=config.whisper_model,
-        api_key=config.dashscope_api_key,
+    audio_path = prepare_audio(
+        config, download_result.audio_path, source_id or download_result.source_id,
     )
 
+    # 转录
+    transcriber = _build_transcriber(config)
+    on_segment = live.start(download_result.title) if live is not None else None
+
     try:
-        transcript = transcriber.transcribe(
-            download_result.audio_path,
-            language=config.language,
+        transcript = drain(
+            transcriber.transcribe_iter(audio_path, language=config.language), on_segment,
         )
     except RuntimeError as e:
         log_error(str(e))
         sys.exit(1)
     finally:
+        if live is not None:
+            live.close()
         # 清理临时文件（yt-dlp 下载的音频）
-        from star_summary.downloader.ytdlp import YtdlpDownloader
         if isinstance(downloader, YtdlpDownloader):
             if config.keep_audio:
                 for f in os.listdir(downloader.tmp_dir):
@@ -326,6 +416,283 @@ def main() -> None:
                 log_info(f"Audio kept in {config.output_dir}/")
             shutil.rmtree(downloader.tmp_dir, ignore_errors=True)
 
+    return download_result, transcript
+
+
+def _pipe_and_transcribe(
+    config: Config, downloader: YtdlpDownloader, live: _LiveTimed | None = None,
+) -> tuple[DownloadResult, TranscriptResult]:
+    """管道模式：yt-dlp → ffmpeg → 流式识别，音频不落盘，失败时直接退出"""
+    info = downloader.probe(config.input)
+    transcriber = _build_transcriber(config)
+    if config.keep_audio:
+        log_warn("--keep-audio is ignored in pipe mode")
+
+    on_segment = live.start(info.title) if live is not None else None
+
+    try:
+        with downloader.open_pcm_stream(config.input) as pcm:
+            transcript = transcriber.transcribe_pcm(
+                pcm, language=config.language, on_segment=on_segment,
+            )
+    except RuntimeError as e:
+        log_error(str(e))
+        sys.exit(1)
+    finally:
+        if live is not None:
+            live.close()
+        shutil.rmtree(downloader.tmp_dir, ignore_errors=True)
+
+    download_result = DownloadResult(
+        audio_path="",
+        title=info.title,
+        duration=info.duration,
+        source_id=info.source_id,
+    )
+    return download_result, transcript
+
+
+def _build_transcriber(config: Config) -> AbstractTranscriber:
+    from star_summary.transcriber import get_transcriber
+
+    return get_transcriber(
+        engine=config.engine,
+        model=config.whisper_model,
+        api_key=config.dashscope_api_key,
+        asr_model=config.asr_model,
+        parallel=config.parallel,
+        chunk_seconds=config.chunk_seconds,
+        whisper_threads=config.whisper_threads,
+    )
+
+
+def _collect_inputs(args: argparse.Namespace) -> list[str]:
+    """合并位置参数、--input-file 和 stdin（'-'）中的输入"""
+    inputs: list[str] = []
+    for item in args.input:
+        if item == "-":
+            inputs.extend(read_input_list(sys.stdin))
+        else:
+            inputs.append(item)
+    if args.input_file:
+        try:
+            with open(args.input_file, encoding="utf-8") as f:
+                inputs.extend(read_input_list(f))
+        except OSError as e:
+            log_error(f"Cannot read input file: {e}")
+            sys.exit(1)
+    return inputs
+
+
+def _run_sync(config: Config, sources: list[str], args: argparse.Namespace) -> None:
+    """同步模式：平铺列出各播放列表 / 频道，跳过已处理的条目，新条目走批量流水线"""
+    from star_summary.sync import get_sync_store
+
+    store = get_sync_store(config)
+    pending: dict[str, tuple[PlaylistEntry, str]] = {}  # 条目链接 → (条目, 列表 ID)
+    failed_listings = 0
+    for source in sources:
+        downloader = YtdlpDownloader(
+            cookies=config.cookies,
+            cookies_from_browser=config.cookies_from_browser,
+        )
+        try:
+            playlist = downloader.list_entries(source)
+        except RuntimeError as e:
+            log_error(str(e))
+            failed_listings += 1
+            continue
+        finally:
+            shutil.rmtree(downloader.tmp_dir, ignore_errors=True)
+
+        playlist_id = playlist.playlist_id or source
+        new_entries = store.pending(playlist)
+        log_info(f"{len(new_entries)} new, {store.count(playlist_id)} already synced")
+        for entry in new_entries:
+            pending.setdefault(entry.url, (entry, playlist_id))
+
+    urls = list(pending)
+    if args.limit > 0 and len(urls) > args.limit:
+        log_info(f"Limiting this run to {args.limit} of {len(urls)} new entries")
+        urls = urls[:args.limit]
+    if not urls:
+        if failed_listings:
+            sys.exit(1)
+        log_success("Nothing new to sync")
+        return
+
+    def _mark_synced(item: BatchItem) -> None:
+        if not item.ok:
+            return  # 失败的条目不标记，下次同步重试
+        entry, playlist_id = pending[item.source]
+        # 按列表里的条目标记（没有 ID 时按链接），与下次 pending() 的判断一致
+        store.mark(entry, playlist_id)
+
+    _run_batch(config, urls, args, on_item=_mark_synced)
+    if failed_listings:
+        sys.exit(1)
+
+
+def _run_batch(
+    config: Config,
+    inputs: list[str],
+    args: argparse.Namespace,
+    on_item: Callable[[BatchItem], None] | None = None,
+) -> None:
+    """
+    批量模式：流水线处理全部输入，逐条保存结果，最后输出汇总和 JSON 报告。
+    on_item 在每条结果保存后调用（同步模式用来记录已处理条目）。
+    """
+    if config.keep_audio:
+        log_warn("--keep-audio is ignored in batch mode")
+    if config.copy:
+        log_warn("--copy is ignored in batch mode")
+    if config.summarize and not config.deepseek_api_key:
+        log_warn("No DeepSeek API key found, skipping summarization.")
+
+    report: list[dict] = []
+
+    def _on_done(item: BatchItem) -> None:
+        entry = {
+            "index": item.index,
+            "source": item.source,
+            "title": item.title,
+            "status": "ok" if item.ok else "failed",
+            "cached": item.cached,
+            "elapsed": round(item.elapsed, 1),
+        }
+        if item.ok:
+            title = item.title or "untitled"
+            output_dir, file_prefix = _build_output_dir(config.output_dir, title)
+            entry["transcript"] = _save_results(
+                item.transcript, item.summary, output_dir,
+                f"{file_prefix}_{item.index:03d}", item.title or item.source,
+            )
+            log_success(f"[{item.index}/{len(inputs)}] Done: {title} ({item.elapsed:.1f}s)")
+        else:
+            entry["stage"] = item.failed_stage
+            entry["error"] = item.error
+            log_error(f"[{item.index}/{len(inputs)}] Failed at {item.failed_stage}: {item.source}")
+        report.append(entry)
+        if on_item is not None:
+            on_item(item)
+
+    pipeline = BatchPipeline(
+        config,
+        download_workers=args.download_workers,
+        transcribe_workers=args.transcribe_workers,
+        summarize_workers=args.summarize_workers,
+    )
+    items = pipeline.run(inputs, on_done=_on_done)
+
+    report.sort(key=lambda e: e["index"])
+    report_dir, report_prefix = _build_output_dir(config.output_dir, "batch")
+    report_path = os.path.join(report_dir, f"{report_prefix}.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    failed = [item for item in items if not item.ok]
+    log_step("📦", f"Batch finished: {len(items) - len(failed)} succeeded, {len(failed)} failed")
+    for item in failed:
+        log_error(f"[{item.index}] {item.source} — {item.failed_stage}: {item.error}")
+    log_success(f"Report → {os.path.abspath(report_path)}")
+    if failed:
+        sys.exit(1)
+
+
+def _print_banner() -> None:
+    print(f"""
+{_C.MAGENTA}{_C.BOLD}  ✦ StarSummary (星语) ✦{_C.RESET}
+{_C.DIM}  Video/Audio → Transcript → Summary{_C.RESET}
+    """)
+
+
+# 带协议头（https://、file:// 等）的输入视为 URL，其余都按路径处理
+_URL_SCHEME = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*://")
+
+
+def _resolve_input(item: str, cwd: str) -> str:
+    """带协议头的输入原样返回，其余展开 ~ 后解析为相对 cwd 的绝对路径（www. 开头的也按路径处理）"""
+    if item == "-" or _URL_SCHEME.match(item):
+        return item
+    return os.path.join(cwd, os.path.expanduser(item))
+
+
+def _resolve_paths(args: argparse.Namespace, cwd: str) -> None:
+    """把路径参数展开 ~ 后解析为相对 cwd 的绝对路径（守护进程代调用方执行时使用）"""
+    args.input = [_resolve_input(item, cwd) for item in args.input]
+    for name in ("input_file", "cookies", "output"):
+        value = getattr(args, name)
+        if value:
+            setattr(args, name, os.path.join(cwd, os.path.expanduser(value)))
+    if not args.output:
+        args.output = os.path.join(cwd, "star_summary_output")
+
+
+def run_args(args: argparse.Namespace, inputs: list[str] | None = None) -> None:
+    """
+    按解析后的参数执行：同步 / 批量 / 单个输入。失败时 sys.exit(1)。
+    inputs 为已收集好的输入列表（守护进程收到的由调用方读取并解析过路径），None 时从 args 收集
+    """
+    config = _build_config_from_args(args)
+    if inputs is None:
+        inputs = _collect_inputs(args)
+    if not inputs:
+        log_error("No input given")
+        sys.exit(1)
+    if args.sync:
+        _check_system_deps()
+        _run_sync(config, inputs, args)
+        return
+    if len(inputs) > 1 or args.input_file or args.input == ["-"]:
+        _check_system_deps()
+        _run_batch(config, inputs, args)
+        return
+    config.input = inputs[0]
+    _run_single(config)
+
+
+def _run_single(config: Config) -> None:
+    """处理单个输入：缓存 → 下载转录 → 可选总结 → 保存、预览"""
+    # ── 检查系统依赖 ──
+    _check_system_deps()
+
+    # ── Step 1 & 2: 查询转录缓存，未命中时下载并转录 ──
+    from star_summary.cache import get_transcript_cache
+    from star_summary.downloader import get_downloader
+
+    downloader = get_downloader(
+        config.input,
+        cookies=config.cookies,
+        cookies_from_browser=config.cookies_from_browser,
+    )
+
+    cache = get_transcript_cache(config)
+    source_info = SourceInfo()
+    transcript = None
+    live = _LiveTimed(config.output_dir)
+    if cache is not None:
+        try:
+            source_info = downloader.probe(config.input)
+        except (FileNotFoundError, ValueError) as e:
+            log_error(str(e))
+            sys.exit(1)
+        transcript = cache.get(source_info.source_id, config)
+
+    if transcript is not None:
+        if isinstance(downloader, YtdlpDownloader):
+            shutil.rmtree(downloader.tmp_dir, ignore_errors=True)
+        if config.keep_audio:
+            log_warn("Transcript loaded from cache, no audio downloaded")
+        title = source_info.title
+    else:
+        download_result, transcript = _download_and_transcribe(
+            config, downloader, source_info.source_id, live,
+        )
+        if cache is not None:
+            cache.put(source_info.source_id, config, transcript)
+        title = download_result.title
+
     # ── Step 3: 可选总结 ──
     summary = None
     if config.summarize:
@@ -336,13 +703,14 @@ def main() -> None:
         else:
             from star_summary.summarizer import get_summarizer
 
-            summarizer = get_summarizer(api_key=config.deepseek_api_key)
-            summary = summarizer.summarize(transcript.text)
+            summarizer = get_summarizer(api_key=config.deepseek_api_key, config=config)
+            summary = summarizer.summarize_transcript(transcript)
 
     # ── Step 4: 保存结果 ──
-    title = download_result.title or "untitled"
-    source = download_result.title or config.input
-    output_dir, file_prefix = _build_output_dir(config.output_dir, title)
+    source = title or config.input
+    title = title or "untitled"
+    # 转录时已开始写出片段的，沿用同一目录和文件名
+    output_dir, file_prefix = live.target or _build_output_dir(config.output_dir, title)
     transcript_path = _save_results(transcript, summary, output_dir, file_prefix, source)
 
     # ── Step 5: 复制到剪贴板 ──
@@ -353,8 +721,39 @@ def main() -> None:
     _print_preview(transcript, summary)
 
     # ── Done ──
+    flush_logs()
     print(f"\n{_C.GREEN}{_C.BOLD}  ✦ All done! Files saved to: {os.path.abspath(output_dir)}/ ✦{_C.RESET}\n")
 
 
+def main() -> None:
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    if len(sys.argv) > 1 and sys.argv[1] == "daemon":
+        from star_summary.daemon import main as daemon_main
+        daemon_main(sys.argv[2:])
+        return
+
+    # 无参数 → 交互模式，有参数 → CLI 模式
+    if len(sys.argv) == 1:
+        _print_banner()
+        _run_single(_interactive_mode())
+        return
+
+    args = _parse_args()
+    _print_banner()
+    inputs = _collect_inputs(args)
+    if not args.no_daemon and "-" not in args.input:
+        # 守护进程在运行时交给它执行（模型、连接都已就绪）；连不上或配置不同则在本进程执行。
+        # 列表文件在这里读取，其中的相对路径按本进程的当前目录解析
+        from star_summary.daemon import forward
+
+        cwd = os.getcwd()
+        code = forward(sys.argv[1:], [_resolve_input(item, cwd) for item in inputs])
+        if code is not None:
+            sys.exit(code)
+    run_args(args, inputs)
+
+
 if __name__ == "__main__":
     main()
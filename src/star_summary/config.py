@@ -4,6 +4,18 @@ import os
 from dataclasses import dataclass, field
 
 
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name, "").strip()
+    return int(raw) if raw.isdigit() else default
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.environ.get(name, "").strip().lower()
+    if not raw:
+        return default
+    return raw not in ("0", "false", "no", "off")
+
+
 @dataclass
 class Config:
     """统一配置，CLI 解析完参数后构造"""
@@ -14,11 +26,28 @@ class Config:
     engine: str = "paraformer"         # paraformer / whisper
     whisper_model: str = "small"       # tiny/base/small/medium/large-v2/large-v3
     language: str | None = None        # zh/en/ja，None 为自动检测
+    asr_model: str = "fun-asr-realtime"  # paraformer 引擎使用的百炼模型
+    # 长音频分块并行转录：>1 时在静音处切块并发识别，1 为整段识别
+    parallel: int = field(default_factory=lambda: _env_int("STAR_SUMMARY_ASR_PARALLEL", 1))
+    chunk_seconds: int = field(default_factory=lambda: _env_int("STAR_SUMMARY_ASR_CHUNK_SECONDS", 300))
+    # whisper 并行时每个工作进程的线程数，0 为按核心数平均分配
+    whisper_threads: int = field(default_factory=lambda: _env_int("STAR_SUMMARY_WHISPER_THREADS", 0))
+    # 管道模式：链接音频经 yt-dlp → ffmpeg → 流式识别，边下载边转录，不写临时文件
+    pipe: bool = field(default_factory=lambda: _env_flag("STAR_SUMMARY_PIPE", False))
 
     # 总结
     summarize: bool = False
     deepseek_api_key: str = ""
 
+    # AI 总结请求：读超时（秒）、失败后的重试次数、对冲阈值（毫秒，非流式请求超过该时长未返回时再发一份，0 为关闭）
+    summary_timeout: int = field(default_factory=lambda: _env_int("STAR_SUMMARY_SUMMARY_TIMEOUT", 120))
+    summary_retries: int = field(default_factory=lambda: _env_int("STAR_SUMMARY_SUMMARY_RETRIES", 3))
+    summary_hedge_ms: int = field(default_factory=lambda: _env_int("STAR_SUMMARY_SUMMARY_HEDGE_MS", 0))
+    # 提示词把转录放在前、风格要求放在后，同一转录的多种风格共用前缀，命中服务端上下文缓存
+    summary_prefix_cache: bool = field(default_factory=lambda: _env_flag("STAR_SUMMARY_PREFIX_CACHE", True))
+    # 提交前压缩转录（去掉 ASR 复读和语气词、合并短片段），按 token 预算决定是否分段
+    summary_compact: bool = field(default_factory=lambda: _env_flag("STAR_SUMMARY_COMPACT", True))
+
     # 下载
     cookies: str | None = None
     cookies_from_browser: str | None = None
@@ -28,6 +57,27 @@ class Config:
     keep_audio: bool = False
     copy: bool = False
 
+    # 转录缓存（SQLite 索引 + blob，CLI / Web / Bot 共享）
+    cache: bool = field(default_factory=lambda: _env_flag("STAR_SUMMARY_CACHE", True))
+    cache_dir: str = field(
+        default_factory=lambda: os.environ.get("STAR_SUMMARY_CACHE_DIR", "") or "~/.cache/star_summary"
+    )
+    cache_max_mb: int = field(default_factory=lambda: _env_int("STAR_SUMMARY_CACHE_MAX_MB", 1024))
+    cache_ttl_days: int = field(default_factory=lambda: _env_int("STAR_SUMMARY_CACHE_TTL_DAYS", 30))
+    # 归一化音频（16kHz 单声道 wav）缓存上限，0 为不缓存
+    audio_cache_mb: int = field(default_factory=lambda: _env_int("STAR_SUMMARY_AUDIO_CACHE_MB", 2048))
+
+    # Web UI：同时执行的任务数，及排队上限（超出时新提交直接提示繁忙）
+    web_concurrency: int = field(default_factory=lambda: _env_int("STAR_SUMMARY_WEB_CONCURRENCY", 2))
+    web_queue_size: int = field(default_factory=lambda: _env_int("STAR_SUMMARY_WEB_QUEUE_SIZE", 20))
+
+    # Prometheus /metrics 端口（Bot / Web / 工作进程各自监听），0 为不开启；
+    # 默认只监听本机，需要被其他主机抓取时设为 0.0.0.0
+    metrics_port: int = field(default_factory=lambda: _env_int("STAR_SUMMARY_METRICS_PORT", 0))
+    metrics_host: str = field(
+        default_factory=lambda: os.environ.get("STAR_SUMMARY_METRICS_HOST", "").strip() or "127.0.0.1"
+    )
+
     # API Keys (从环境变量读取)
     dashscope_api_key: str = ""
 
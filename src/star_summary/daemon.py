@@ -0,0 +1,334 @@
+"""常驻守护进程 - 已导入的模块、Whisper 模型和 HTTP 连接常驻，CLI 经 Unix socket 把任务交给它执行"""
+
+import argparse
+import contextvars
+import hashlib
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from star_summary.cli import _parse_args, _resolve_paths, run_args
+from star_summary.config import Config
+from star_summary.metrics import start_metrics_server
+from star_summary.utils import log_error, log_info, log_step, log_success, log_warn, setup_logging
+
+# 协议：每个连接一条请求，之后是若干条响应，都是一行一个 JSON 对象
+#   请求  {"cmd": "run", "argv": [...], "inputs": [...], "cwd": "...", "tty": true, "env": {...}}
+#         / {"cmd": "status"} / {"cmd": "stop"}
+#   响应  {"out": "..."}（调用方原样写到 stdout），最后一条 {"exit": 退出码}；
+#         调用方配置与守护进程不同时只回 {"refused": "原因"}，调用方改在本进程执行
+
+# 连接守护进程的超时（秒）；连不上时 CLI 在本进程执行
+_CONNECT_TIMEOUT = 1.0
+# accept 的轮询间隔（秒），用于及时响应 stop
+_ACCEPT_INTERVAL = 0.5
+
+# 影响处理结果的环境变量：API Key 和 STAR_SUMMARY_* 配置（只影响守护进程自身的几项除外）
+_SETTINGS_ENV = ("DASHSCOPE_API_KEY", "DEEPSEEK_API_KEY", "DEEPSEEK_BASE_URL")
+_DAEMON_ONLY_ENV = (
+    "STAR_SUMMARY_DAEMON_SOCKET", "STAR_SUMMARY_LOG_FORMAT",
+    "STAR_SUMMARY_METRICS_HOST", "STAR_SUMMARY_METRICS_PORT",
+)
+
+
+class _RequestOutput:
+    """一个请求的输出通道：写入即发给调用方；调用方断开后写入抛 OSError，任务随之中止"""
+
+    def __init__(self, conn: socket.socket, tty: bool) -> None:
+        self.conn = conn
+        self.tty = tty
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> int:
+        if text:
+            with self._lock:
+                _send(self.conn, {"out": text})
+        return len(text)
+
+
+# 当前请求的输出通道；请求派生的线程经 with_log_context 继承
+_request_output: contextvars.ContextVar[_RequestOutput | None] = contextvars.ContextVar(
+    "star_summary_request_output", default=None,
+)
+
+
+class _RoutedStdout:
+    """替换 sys.stdout：请求上下文中的 print 和日志发往对应调用方，其余写到守护进程自己的 stdout"""
+
+    def __init__(self, real) -> None:
+        self._real = real
+
+    def write(self, text: str) -> int:
+        target = _request_output.get()
+        return target.write(text) if target is not None else self._real.write(text)
+
+    def flush(self) -> None:
+        if _request_output.get() is None:
+            self._real.flush()
+
+    def isatty(self) -> bool:
+        target = _request_output.get()
+        return target.tty if target is not None else self._real.isatty()
+
+    def __getattr__(self, name: str):
+        return getattr(self._real, name)
+
+
+def socket_path() -> str:
+    """STAR_SUMMARY_DAEMON_SOCKET，默认为缓存目录下的 daemon.sock"""
+    path = os.environ.get("STAR_SUMMARY_DAEMON_SOCKET", "").strip()
+    return os.path.expanduser(path or os.path.join(Config().cache_dir, "daemon.sock"))
+
+
+def settings_env() -> dict[str, str]:
+    """
+    当前进程（已加载 .env）中影响处理结果的环境变量：名称 → 值的 sha256。
+    守护进程不能按请求切换环境变量（进程内共享），调用方与它不一致时拒绝转发；只传摘要，不经 socket 传密钥
+    """
+    return {
+        name: hashlib.sha256(value.encode("utf-8")).hexdigest()
+        for name, value in os.environ.items()
+        if value and (name in _SETTINGS_ENV or name.startswith("STAR_SUMMARY_"))
+        and name not in _DAEMON_ONLY_ENV
+    }
+
+
+def _env_mismatch(env: dict[str, str]) -> list[str]:
+    """与守护进程取值不同（含只有一方设置）的变量名"""
+    own = settings_env()
+    return sorted(name for name in own.keys() | env.keys() if own.get(name) != env.get(name))
+
+
+def _send(conn: socket.socket, message: dict) -> None:
+    conn.sendall((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+def _connect(path: str) -> socket.socket | None:
+    """连接守护进程；没有在运行（socket 不存在或已失效）时返回 None"""
+    if not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(_CONNECT_TIMEOUT)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def _request(sock: socket.socket, message: dict) -> int | None:
+    """发送请求，把输出转写到本进程 stdout，返回守护进程给出的退出码；守护进程拒绝执行时返回 None"""
+    with sock:
+        _send(sock, message)
+        try:
+            for line in sock.makefile("rb"):
+                reply = json.loads(line)
+                if "refused" in reply:
+                    log_warn(f"Daemon declined the job, running here instead: {reply['refused']}")
+                    return None
+                if "out" in reply:
+                    sys.stdout.write(reply["out"])
+                    sys.stdout.flush()
+                elif "exit" in reply:
+                    return int(reply["exit"])
+        except KeyboardInterrupt:
+            # 断开连接后守护进程在下一次输出时中止该任务
+            return 130
+    log_error("Daemon closed the connection unexpectedly")
+    return 1
+
+
+def forward(argv: list[str], inputs: list[str]) -> int | None:
+    """
+    守护进程在运行时把这次调用交给它执行并返回退出码；没有守护进程、或本进程的配置
+    （环境变量和 .env）与守护进程不同时返回 None。inputs 为已解析成绝对路径 / URL 的输入列表
+    """
+    sock = _connect(socket_path())
+    if sock is None:
+        return None
+    log_info("Running in starsummary daemon")
+    return _request(sock, {
+        "cmd": "run", "argv": argv, "inputs": inputs, "cwd": os.getcwd(),
+        "tty": sys.stdout.isatty(), "env": settings_env(),
+    })
+
+
+class _Daemon:
+    def __init__(self, path: str, jobs: int) -> None:
+        self.path = path
+        self.jobs = max(1, jobs)
+        self._slots = threading.Semaphore(self.jobs)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._running = 0
+        self._served = 0
+        self._started = time.time()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def serve_forever(self) -> None:
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        os.chmod(self.path, 0o600)  # 只有本用户能提交任务
+        server.listen()
+        server.settimeout(_ACCEPT_INTERVAL)
+        log_success(f"Daemon listening on {self.path} ({self.jobs} job slot(s))")
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            server.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            log_info("Daemon stopped")
+
+    def _handle(self, conn: socket.socket) -> None:
+        with conn:
+            try:
+                request = json.loads(conn.makefile("rb").readline() or b"{}")
+            except (OSError, ValueError):
+                return
+            cmd = request.get("cmd")
+            if cmd == "run":
+                mismatch = _env_mismatch(request.get("env") or {})
+                if mismatch:
+                    _send(conn, {"refused": f"settings differ from the daemon's ({', '.join(mismatch)})"})
+                    return
+                code = self._run(conn, request)
+            elif cmd == "status":
+                _send(conn, {"out": self._status()})
+                code = 0
+            elif cmd == "stop":
+                _send(conn, {"out": "Daemon stopping after running jobs finish\n"})
+                self.stop()
+                code = 0
+            else:
+                _send(conn, {"out": f"Unknown command: {cmd}\n"})
+                code = 2
+            try:
+                _send(conn, {"exit": code})
+            except OSError:
+                pass  # 调用方已断开
+
+    def _run(self, conn: socket.socket, request: dict) -> int:
+        token = _request_output.set(_RequestOutput(conn, bool(request.get("tty"))))
+        try:
+            if not self._slots.acquire(blocking=False):
+                log_info("Waiting for a free daemon slot...")
+                self._slots.acquire()
+            with self._lock:
+                self._running += 1
+            try:
+                args = _parse_args(request.get("argv") or [])
+                _resolve_paths(args, request.get("cwd") or os.getcwd())
+                # 输入列表（含 --input-file 的内容）由调用方读取并解析路径，守护进程不读自己的 stdin
+                run_args(args, list(request.get("inputs") or []))
+                return 0
+            except SystemExit as e:
+                return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except OSError as e:
+                if isinstance(e, (BrokenPipeError, ConnectionResetError)):
+                    _request_output.set(None)
+                    log_info("Client disconnected, job aborted")
+                else:
+                    log_error(str(e))
+                return 1
+            except Exception as e:
+                log_error(f"Job failed: {e}")
+                return 1
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._served += 1
+                self._slots.release()
+        finally:
+            _request_output.reset(token)
+
+    def _status(self) -> str:
+        from star_summary.transcriber import get_model_cache
+
+        stats = get_model_cache().stats()
+        with self._lock:
+            running, served = self._running, self._served
+        return (
+            f"Daemon pid {os.getpid()} on {self.path}\n"
+            f"  uptime {time.time() - self._started:.0f}s, {running}/{self.jobs} running, {served} served\n"
+            f"  whisper models resident: {stats.resident_models} (~{stats.resident_mb} MB)\n"
+        )
+
+
+def _parse_daemon_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="starsummary daemon",
+        description="常驻守护进程：保持模型与连接就绪，之后的 starsummary 调用自动交给它执行",
+    )
+    parser.add_argument(
+        "action", nargs="?", default="run", choices=["run", "status", "stop"],
+        help="run（默认，前台运行）/ status / stop",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="同时执行的任务数，其余排队（默认 1）",
+    )
+    parser.add_argument(
+        "--preload", action="append", default=[], metavar="MODEL",
+        help="启动时预先加载的 Whisper 模型，可重复（如 --preload small）",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> None:
+    args = _parse_daemon_args(argv)
+    path = socket_path()
+
+    if args.action != "run":
+        sock = _connect(path)
+        if sock is None:
+            log_error("Daemon is not running")
+            sys.exit(1)
+        sys.exit(_request(sock, {"cmd": args.action}))
+
+    sock = _connect(path)
+    if sock is not None:
+        sock.close()
+        log_error(f"Daemon already running on {path}")
+        sys.exit(1)
+    if os.path.exists(path):
+        os.remove(path)  # 上次异常退出留下的 socket
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # 请求的日志必须在调用线程里同步写出才能按请求转发，固定使用 pretty 格式
+    sys.stdout = _RoutedStdout(sys.stdout)
+    setup_logging(fmt="pretty")
+
+    log_step("✦", "StarSummary daemon starting...")
+    # 先导入各流水线模块，第一个请求不再付导入开销
+    import star_summary.cache  # noqa: F401
+    import star_summary.summarizer  # noqa: F401
+    from star_summary.transcriber.whisper_local import WhisperLocalTranscriber
+
+    for model in args.preload:
+        try:
+            WhisperLocalTranscriber(model_size=model)._load_model()
+        except RuntimeError as e:
+            log_error(f"Failed to preload whisper {model}: {e}")
+
+    config = Config()
+    start_metrics_server(config.metrics_port, config.metrics_host)
+    daemon = _Daemon(path, args.jobs)
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
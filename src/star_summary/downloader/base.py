@@ -2,7 +2,7 @@
 
 from abc import ABC, abstractmethod
 
-from star_summary.models import DownloadResult
+from star_summary.models import DownloadResult, SourceInfo
 
 
 class AbstractDownloader(ABC):
@@ -10,3 +10,7 @@ class AbstractDownloader(ABC):
     def download(self, source: str) -> DownloadResult:
         """下载音频，返回 DownloadResult"""
         ...
+
+    def probe(self, source: str) -> SourceInfo:
+        """下载前探测来源 ID 和标题（用于缓存查询），默认无法识别"""
+        return SourceInfo()
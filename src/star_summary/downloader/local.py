@@ -4,7 +4,7 @@ import os
 from pathlib import Path
 
 from star_summary.downloader.base import AbstractDownloader
-from star_summary.models import DownloadResult
+from star_summary.models import DownloadResult, SourceInfo
 from star_summary.utils import log_step, log_info, log_error
 
 SUPPORTED_FORMATS = {
@@ -14,7 +14,24 @@ SUPPORTED_FORMATS = {
 
 
 class LocalDownloader(AbstractDownloader):
+    def probe(self, source: str) -> SourceInfo:
+        """本地文件以内容哈希作为来源 ID，改名或移动后仍能命中缓存"""
+        from star_summary.cache import file_digest
+
+        path = self._validate(source)
+        return SourceInfo(source_id=file_digest(path), title=Path(path).stem)
+
     def download(self, source: str) -> DownloadResult:
+        path = self._validate(source)
+
+        log_step("📂", "Using local file")
+        log_info(f"File: {path}")
+
+        title = Path(path).stem
+        return DownloadResult(audio_path=path, title=title)
+
+    def _validate(self, source: str) -> str:
+        """检查文件存在且格式受支持，返回绝对路径"""
         path = os.path.abspath(source)
 
         if not os.path.isfile(path):
@@ -27,8 +44,4 @@ class LocalDownloader(AbstractDownloader):
             log_info(f"Supported formats: {', '.join(sorted(SUPPORTED_FORMATS))}")
             raise ValueError(f"Unsupported format: {ext}")
 
-        log_step("📂", "Using local file")
-        log_info(f"File: {path}")
-
-        title = Path(path).stem
-        return DownloadResult(audio_path=path, title=title)
+        return path
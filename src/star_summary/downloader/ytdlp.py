@@ -1,28 +1,78 @@
 """yt-dlp 下载器实现"""
 
+import importlib.util
+import json
 import os
+import shutil
 import subprocess
+import sys
 import tempfile
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, Iterator
 
+from star_summary.audio import pcm_decode_cmd, require_ffmpeg
 from star_summary.downloader.base import AbstractDownloader
-from star_summary.models import DownloadResult
+from star_summary.metrics import timed_stage
+from star_summary.models import DownloadResult, PlaylistEntry, PlaylistInfo, SourceInfo
 from star_summary.utils import log_step, log_info, log_success, log_error
 
 
+def _source_info(info: dict[str, Any]) -> SourceInfo:
+    """从 yt-dlp 的 info dict 提取来源信息；来源 ID 形如 BiliBili:BV1xx，与链接写法无关"""
+    extractor, video_id = info.get("extractor_key"), info.get("id")
+    return SourceInfo(
+        source_id=f"{extractor}:{video_id}" if extractor and video_id else "",
+        title=info.get("title") or "",
+        duration=float(info.get("duration") or 0),
+    )
+
+
+def _flat_entries(info: dict[str, Any]) -> Iterator[PlaylistEntry]:
+    """展开平铺提取结果中的条目；频道页的子列表（如各个 tab）递归展开"""
+    for entry in info.get("entries") or []:
+        if not entry:
+            continue
+        if entry.get("_type") == "playlist":
+            yield from _flat_entries(entry)
+            continue
+        url = entry.get("url") or entry.get("webpage_url")
+        if not url:
+            continue
+        extractor = entry.get("ie_key") or entry.get("extractor_key")
+        video_id = entry.get("id")
+        yield PlaylistEntry(
+            url=url,
+            source_id=f"{extractor}:{video_id}" if extractor and video_id else "",
+            title=entry.get("title") or "",
+            duration=float(entry.get("duration") or 0),
+        )
+
+
 class YtdlpDownloader(AbstractDownloader):
+    """
+    优先在进程内调用 yt_dlp Python API：probe 时提取一次元数据，download 直接复用，
+    整个流程只访问一次站点页面。未安装 yt_dlp 包时退回 yt-dlp 命令行，
+    probe 的 JSON 通过 --load-info-json 交给下载进程，同样不重复提取。
+    """
+
     def __init__(
         self,
         cookies: str | None = None,
         cookies_from_browser: str | None = None,
+        on_progress: Callable[[float], None] | None = None,
     ) -> None:
         self.cookies = cookies
         self.cookies_from_browser = cookies_from_browser
+        # 下载进度回调（0~1），仅进程内 API 支持；回调抛出的异常会中止下载
+        self.on_progress = on_progress
         self._tmp_dir = tempfile.mkdtemp(prefix="starsummary_")
+        self._extracted: dict[str, dict[str, Any]] = {}  # source → info dict
 
     @property
     def tmp_dir(self) -> str:
         return self._tmp_dir
 
+    @timed_stage("download")
     def download(self, source: str) -> DownloadResult:
         log_step("📥", "Downloading audio...")
         log_info(f"URL: {source}")
@@ -31,27 +81,262 @@ class YtdlpDownloader(AbstractDownloader):
         elif self.cookies:
             log_info(f"Using cookies file: {self.cookies}")
 
-        # 先尝试获取标题
-        title = self._get_title(source)
+        try:
+            import yt_dlp  # noqa: F401
+        except ImportError:
+            info = self._download_cli(source)
+        else:
+            info = self._download_api(source)
 
-        # 下载音频
-        output_template = os.path.join(self._tmp_dir, "audio.%(ext)s")
-        cmd = [
-            "yt-dlp",
-            "-x",
-            "--audio-format", "mp3",
-            "--audio-quality", "3",
-            "-o", output_template,
-            "--no-playlist",
-            "--no-warnings",
-        ]
+        # 查找下载的文件
+        audio_path = self._find_audio()
+        size_mb = os.path.getsize(audio_path) / (1024 * 1024)
+        log_success(f"Audio downloaded: {size_mb:.1f} MB")
+
+        meta = _source_info(info)
+        return DownloadResult(
+            audio_path=audio_path,
+            title=meta.title,
+            duration=meta.duration,
+            source_id=meta.source_id,
+        )
+
+    @contextmanager
+    def open_pcm_stream(self, source: str) -> Iterator[BinaryIO]:
+        """
+        管道模式：yt-dlp 把音频写到 stdout，ffmpeg 从 stdin 解码为 16kHz 单声道 s16le PCM，
+        产出 ffmpeg 的 stdout。下载、解码与识别同时进行，全程不写临时音频文件。
+        probe 过的来源通过 --load-info-json 复用元数据，不重复提取。
+        yt-dlp 总是作为子进程运行（Python API 不能把下载内容写到管道）；没有 yt-dlp 命令但装了
+        yt_dlp 包时用 `python -m yt_dlp` 启动同一个包。
+        """
+        require_ffmpeg()
+        log_step("📥", "Streaming audio (pipe mode)...")
+        log_info(f"URL: {source}")
+
+        cmd = self._pipe_cli_base() + ["-f", "bestaudio/best", "-o", "-", "--quiet"]
+        info = self._extracted.get(source)
+        if info is not None:
+            info_path = os.path.join(self._tmp_dir, "info.json")
+            with open(info_path, "w", encoding="utf-8") as f:
+                json.dump(info, f)
+            cmd.extend(["--load-info-json", info_path])
+        else:
+            cmd.append(source)
+
+        try:
+            ytdlp = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except FileNotFoundError:
+            log_error("yt-dlp not found. Install it: brew install yt-dlp")
+            raise RuntimeError("yt-dlp not installed")
+        # ffmpeg 只输出 error 级别日志，写到临时文件，失败时再读出来报告
+        ffmpeg_log = tempfile.TemporaryFile(dir=self._tmp_dir)
+        ffmpeg = subprocess.Popen(
+            pcm_decode_cmd("pipe:0"),
+            stdin=ytdlp.stdout, stdout=subprocess.PIPE, stderr=ffmpeg_log,
+        )
+        ytdlp.stdout.close()  # ffmpeg 提前退出时 yt-dlp 能收到 SIGPIPE
+
+        try:
+            yield ffmpeg.stdout
+            try:
+                ytdlp.wait(timeout=30)
+                ffmpeg.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                log_error("yt-dlp / ffmpeg did not exit within 30s after the stream ended")
+                raise RuntimeError("Pipe stream did not finish")
+            if ytdlp.returncode != 0:
+                log_error(f"yt-dlp failed:\n{ytdlp.stderr.read().decode(errors='replace')}")
+                raise RuntimeError("yt-dlp download failed")
+            if ffmpeg.returncode != 0:
+                ffmpeg_log.seek(0)
+                log_error(f"ffmpeg failed (exit {ffmpeg.returncode}):\n"
+                          f"{ffmpeg_log.read().decode(errors='replace')}")
+                raise RuntimeError("ffmpeg decoding failed")
+        finally:
+            for proc in (ffmpeg, ytdlp):
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+            ffmpeg.stdout.close()
+            ytdlp.stderr.close()
+            ffmpeg_log.close()
+
+    @timed_stage("probe")
+    def probe(self, source: str) -> SourceInfo:
+        """只提取元数据不下载；结果会被随后的 download 复用"""
+        try:
+            info = self._extract(source)
+        except RuntimeError:
+            return SourceInfo()
+        meta = _source_info(info)
+        if meta.title:
+            log_info(f"Title: {meta.title}")
+        return meta
+
+    def list_entries(self, source: str) -> PlaylistInfo:
+        """
+        平铺提取播放列表 / 频道：一次请求列出全部条目的 ID、标题和链接，
+        不解析各个视频页面。失败抛 RuntimeError。
+        """
+        log_step("📃", "Listing playlist entries...")
+        log_info(f"URL: {source}")
+        try:
+            import yt_dlp
+        except ImportError:
+            info = self._list_cli(source)
+        else:
+            params = self._ydl_params()
+            params.update({"noplaylist": False, "extract_flat": "in_playlist"})
+            try:
+                with yt_dlp.YoutubeDL(params) as ydl:
+                    info = ydl.sanitize_info(ydl.extract_info(source, download=False))
+            except yt_dlp.utils.DownloadError as e:
+                log_error(f"yt-dlp listing failed:\n{e}")
+                raise RuntimeError("yt-dlp playlist listing failed")
+
+        entries = list(_flat_entries(info))
+        meta = _source_info(info)
+        log_success(f"Playlist: {meta.title or source} ({len(entries)} entries)")
+        return PlaylistInfo(playlist_id=meta.source_id, title=meta.title, entries=entries)
+
+    def _extract(self, source: str) -> dict[str, Any]:
+        """提取（并缓存）单个视频的 info dict，失败抛 RuntimeError"""
+        if source in self._extracted:
+            return self._extracted[source]
 
+        try:
+            import yt_dlp
+        except ImportError:
+            info = self._extract_cli(source)
+        else:
+            try:
+                with yt_dlp.YoutubeDL(self._ydl_params()) as ydl:
+                    info = ydl.sanitize_info(ydl.extract_info(source, download=False))
+            except yt_dlp.utils.DownloadError as e:
+                raise RuntimeError(f"yt-dlp extraction failed: {e}")
+
+        self._extracted[source] = info
+        return info
+
+    # ── 进程内 API ──
+
+    def _ydl_params(self) -> dict[str, Any]:
+        params: dict[str, Any] = {
+            "quiet": True,
+            "no_warnings": True,
+            "noprogress": True,
+            "noplaylist": True,
+            "socket_timeout": 30,
+        }
+        if self.cookies_from_browser:
+            # 命令行写法 BROWSER[:PROFILE]
+            browser, _, profile = self.cookies_from_browser.partition(":")
+            params["cookiesfrombrowser"] = (browser, profile or None, None, None)
+        elif self.cookies:
+            params["cookiefile"] = self.cookies
+        return params
+
+    def _download_api(self, source: str) -> dict[str, Any]:
+        import yt_dlp
+
+        params = self._ydl_params()
+        params.update({
+            # 直接保存原始音频流，不转 mp3；转码统一在归一化阶段一次完成
+            "format": "bestaudio/best",
+            "outtmpl": {"default": os.path.join(self._tmp_dir, "audio.%(ext)s")},
+        })
+        if self.on_progress is not None:
+            params["progress_hooks"] = [self._progress_hook]
+
+        try:
+            info = self._extract(source)
+            with yt_dlp.YoutubeDL(params) as ydl:
+                # 直接处理已提取的 info，不再请求视频页面
+                ydl.process_ie_result(dict(info), download=True)
+        except (RuntimeError, yt_dlp.utils.DownloadError) as e:
+            log_error(f"yt-dlp failed:\n{e}")
+            log_info("Try downloading the file manually and use the local file path instead.")
+            raise RuntimeError("yt-dlp download failed")
+        return info
+
+    def _progress_hook(self, status: dict[str, Any]) -> None:
+        if status.get("status") != "downloading":
+            return
+        total = status.get("total_bytes") or status.get("total_bytes_estimate")
+        if total:
+            self.on_progress(min(1.0, status.get("downloaded_bytes", 0) / total))
+
+    # ── 命令行回退 ──
+
+    def _cli_base(self) -> list[str]:
+        cmd = ["yt-dlp", "--no-warnings", "--no-playlist"]
         if self.cookies_from_browser:
             cmd.extend(["--cookies-from-browser", self.cookies_from_browser])
         elif self.cookies:
             cmd.extend(["--cookies", self.cookies])
+        return cmd
 
-        cmd.append(source)
+    def _pipe_cli_base(self) -> list[str]:
+        cmd = self._cli_base()
+        if shutil.which(cmd[0]) is None and importlib.util.find_spec("yt_dlp") is not None:
+            cmd[:1] = [sys.executable, "-m", "yt_dlp"]
+        return cmd
+
+    def _extract_cli(self, source: str) -> dict[str, Any]:
+        cmd = self._cli_base() + ["-J", source]
+        try:
+            result = subprocess.run(
+                cmd, capture_output=True, text=True, timeout=60,
+            )
+        except subprocess.TimeoutExpired:
+            raise RuntimeError("yt-dlp extraction timed out")
+        except FileNotFoundError:
+            raise RuntimeError("yt-dlp not installed")
+        if result.returncode != 0:
+            raise RuntimeError(f"yt-dlp extraction failed: {result.stderr.strip()}")
+        try:
+            return json.loads(result.stdout)
+        except json.JSONDecodeError:
+            raise RuntimeError("yt-dlp returned invalid JSON")
+
+    def _list_cli(self, source: str) -> dict[str, Any]:
+        cmd = self._cli_base() + ["--yes-playlist", "--flat-playlist", "-J", source]
+        try:
+            result = subprocess.run(
+                cmd, capture_output=True, text=True, timeout=300,
+            )
+        except subprocess.TimeoutExpired:
+            log_error("Playlist listing timed out (5 min limit)")
+            raise RuntimeError("yt-dlp playlist listing timed out")
+        except FileNotFoundError:
+            log_error("yt-dlp not found. Install it: brew install yt-dlp")
+            raise RuntimeError("yt-dlp not installed")
+        if result.returncode != 0:
+            log_error(f"yt-dlp listing failed:\n{result.stderr}")
+            raise RuntimeError("yt-dlp playlist listing failed")
+        try:
+            return json.loads(result.stdout)
+        except json.JSONDecodeError:
+            raise RuntimeError("yt-dlp returned invalid JSON")
+
+    def _download_cli(self, source: str) -> dict[str, Any]:
+        output_template = os.path.join(self._tmp_dir, "audio.%(ext)s")
+        cmd = self._cli_base() + [
+            "-f", "bestaudio/best",
+            "-o", output_template,
+        ]
+
+        info = self._extracted.get(source)
+        if info is not None:
+            # probe 过：把元数据交给 yt-dlp，跳过第二次提取
+            info_path = os.path.join(self._tmp_dir, "info.json")
+            with open(info_path, "w", encoding="utf-8") as f:
+                json.dump(info, f)
+            cmd.extend(["--load-info-json", info_path])
+        else:
+            # 没 probe 过：下载的同时输出元数据，仍然只调用一次
+            cmd.extend(["-j", "--no-simulate", source])
 
         try:
             result = subprocess.run(
@@ -68,42 +353,18 @@ class YtdlpDownloader(AbstractDownloader):
             log_error("yt-dlp not found. Install it: brew install yt-dlp")
             raise RuntimeError("yt-dlp not installed")
 
-        # 查找下载的文件
-        audio_path = self._find_audio()
-        size_mb = os.path.getsize(audio_path) / (1024 * 1024)
-        log_success(f"Audio downloaded: {size_mb:.1f} MB")
-
-        return DownloadResult(audio_path=audio_path, title=title)
-
-    def _get_title(self, source: str) -> str:
-        """尝试获取视频标题"""
-        cmd = ["yt-dlp", "--print", "title", "--no-warnings", "--no-playlist"]
-        if self.cookies_from_browser:
-            cmd.extend(["--cookies-from-browser", self.cookies_from_browser])
-        elif self.cookies:
-            cmd.extend(["--cookies", self.cookies])
-        cmd.append(source)
-
-        try:
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=30,
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                title = result.stdout.strip()
-                log_info(f"Title: {title}")
-                return title
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            pass
-        return ""
+        if info is None:
+            try:
+                info = json.loads(result.stdout.strip().splitlines()[-1])
+            except (IndexError, json.JSONDecodeError):
+                info = {}
+            self._extracted[source] = info
+        return info
 
     def _find_audio(self) -> str:
         """查找下载目录中的音频文件"""
-        audio_file = os.path.join(self._tmp_dir, "audio.mp3")
-        if os.path.exists(audio_file):
-            return audio_file
-
         for f in os.listdir(self._tmp_dir):
-            if f.startswith("audio."):
+            if f.startswith("audio.") and not f.endswith((".part", ".ytdl")):
                 return os.path.join(self._tmp_dir, f)
 
         log_error("Failed to find downloaded audio file")
@@ -0,0 +1,509 @@
+"""持久化任务队列 - SQLite 记录任务状态，中间产物落盘，重启后从最后完成的阶段继续"""
+
+import json
+import os
+import shutil
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, fields, replace
+from typing import Callable, Iterator
+
+from star_summary.config import Config
+from star_summary.models import SummaryResult, TranscriptResult, transcript_from_dict
+from star_summary.utils import log_context, log_error, log_info, log_success
+
+# 任务状态：queued → downloading → transcribing → (summarizing) → done，
+# 任一阶段出错 → failed，用户取消 → cancelled
+QUEUED = "queued"
+DOWNLOADING = "downloading"
+TRANSCRIBING = "transcribing"
+SUMMARIZING = "summarizing"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+# 阶段进度回调：(完成比例 0~1，未知时为 None, 说明文字)；回调抛出 JobCancelled 可中止当前阶段
+ProgressCallback = Callable[[float | None, str], None]
+
+
+class JobCancelled(Exception):
+    """由进度回调抛出，中止正在执行的阶段"""
+
+
+class LeaseLost(Exception):
+    """由工作进程的进度回调抛出：租约已被其他工作进程接管，中止阶段且不再写任务状态"""
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    owner       TEXT NOT NULL,
+    state       TEXT NOT NULL,
+    delivered   INTEGER NOT NULL DEFAULT 0,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_pending ON jobs (owner, delivered, created_at);
+"""
+
+# 由工作进程和 API 分别读写的列，不随 data 整体覆盖（旧库启动时自动补上）
+_WORKER_COLUMNS = {
+    "worker": "TEXT NOT NULL DEFAULT ''",
+    "lease_until": "REAL NOT NULL DEFAULT 0",
+    "cancel_requested": "INTEGER NOT NULL DEFAULT 0",
+    "progress": "REAL",
+    "progress_desc": "TEXT NOT NULL DEFAULT ''",
+}
+
+
+@dataclass
+class Job:
+    """
+    一个转录任务；kind 为 url（链接或本地路径，经下载器获取）
+    或 file（已保存到任务目录的上传文件）
+    """
+    id: str
+    kind: str
+    source: str                 # 链接或本地文件路径
+    owner: str                  # 提交方：telegram / web
+    user_id: int = 0
+    chat_id: int = 0
+    message_id: int = 0         # 用户发来的原消息，重启后回复到这里
+    state: str = QUEUED
+    title: str = ""
+    source_id: str = ""
+    duration: float = 0.0       # 音频时长（秒），未知为 0
+    audio_path: str = ""        # 检查点：已下载到任务目录的音频
+    cached: bool = False        # 转录是否命中缓存
+    summarize: bool = False     # 是否在转录后生成总结
+    system_prompt: str = ""
+    engine: str = ""            # 转录引擎 / 语言，空表示使用环境变量配置
+    language: str = ""
+    pipe: bool = False          # 管道模式：不下载音频，转录阶段直接流式识别
+    error: str = ""
+    failed_stage: str = ""
+    delivered: bool = False     # 结果是否已送达用户
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+class JobStore:
+    """
+    任务表存于 <root>/jobs.sqlite3，每个任务的产物（音频、转录、总结）存于 <root>/<id>/。
+    每次读写独立短连接，Bot 的线程池 / 进程池、Web 和多个工作进程可同时使用。
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = os.path.expanduser(root)
+        os.makedirs(self.root, exist_ok=True)
+        self._db_path = os.path.join(self.root, "jobs.sqlite3")
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, decl in _WORKER_COLUMNS.items():
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {decl}")
+
+    def create(self, kind: str, source: str, owner: str, job_id: str = "", **kwargs) -> Job:
+        """新建任务；job_id 可预先用 new_job_id() 生成，以便提交前把文件放进任务目录"""
+        job = Job(id=job_id or new_job_id(), kind=kind, source=source, owner=owner, **kwargs)
+        os.makedirs(self.job_dir(job.id), exist_ok=True)
+        self._save(job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._load(row[0]) if row else None
+
+    def update(self, job: Job, **changes) -> Job:
+        job = replace(job, **changes, updated_at=time.time())
+        self._save(job)
+        return job
+
+    def pending(self, owner: str) -> list[Job]:
+        """尚未送达的任务（含未完成的），按提交顺序"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT data FROM jobs WHERE owner = ? AND delivered = 0 ORDER BY created_at",
+                (owner,),
+            ).fetchall()
+        return [self._load(row[0]) for row in rows]
+
+    def mark_delivered(self, job: Job) -> Job:
+        """结果已送达：删除音频等大文件，只保留转录和总结"""
+        job_dir = self.job_dir(job.id)
+        for name in os.listdir(job_dir) if os.path.isdir(job_dir) else []:
+            if name not in ("transcript.json", "summary.json"):
+                try:
+                    os.remove(os.path.join(job_dir, name))
+                except OSError:
+                    pass
+        return self.update(job, delivered=True, audio_path="")
+
+    def purge(self, max_age: float) -> int:
+        """删除送达超过 max_age 秒的任务及其目录，返回删除数量"""
+        cutoff = time.time() - max_age
+        with self._connect() as conn:
+            ids = [row[0] for row in conn.execute(
+                "SELECT id FROM jobs WHERE delivered = 1 AND updated_at < ?", (cutoff,),
+            )]
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in ids])
+        for job_id in ids:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+        return len(ids)
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id)
+
+    # ── 工作进程租约 ──
+
+    def claim(self, owner: str, worker: str, lease_seconds: float) -> Job | None:
+        """
+        原子地领取一个未完成、且没有有效租约的任务（按提交顺序）。
+        工作进程崩溃后租约过期，任务会被其他工作进程领走并从检查点继续。
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                f"SELECT id, data FROM jobs WHERE owner = ? AND delivered = 0 "
+                f"AND state NOT IN ({', '.join('?' * len(FINISHED))}) AND lease_until < ? "
+                f"ORDER BY created_at LIMIT 1",
+                (owner, *FINISHED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET worker = ?, lease_until = ? WHERE id = ?",
+                (worker, now + lease_seconds, row[0]),
+            )
+        return self._load(row[1])
+
+    def renew(self, job_id: str, worker: str, lease_seconds: float) -> bool:
+        """续租；返回 False 表示租约已被其他工作进程接管"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ?",
+                (time.time() + lease_seconds, job_id, worker),
+            )
+        return cursor.rowcount > 0
+
+    def release(self, job_id: str, worker: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_until = 0 WHERE id = ? AND worker = ?", (job_id, worker),
+            )
+
+    def report(self, job_id: str, fraction: float | None, desc: str) -> bool:
+        """记录阶段进度，返回是否已被请求取消"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, progress_desc = ? WHERE id = ?",
+                (fraction, desc, job_id),
+            )
+            row = conn.execute(
+                "SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,),
+            ).fetchone()
+        return bool(row and row[0])
+
+    def progress(self, job_id: str) -> tuple[float | None, str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT progress, progress_desc FROM jobs WHERE id = ?", (job_id,),
+            ).fetchone()
+        return (row[0], row[1]) if row else (None, "")
+
+    def counts(self, owner: str) -> tuple[int, int]:
+        """(等待领取, 正在处理) 的任务数，供工作进程模式的队列指标使用"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT SUM(lease_until < ?), SUM(lease_until >= ?) FROM jobs "
+                f"WHERE owner = ? AND delivered = 0 AND state NOT IN ({', '.join('?' * len(FINISHED))})",
+                (now, now, owner, *FINISHED),
+            ).fetchone()
+        return int(row[0] or 0), int(row[1] or 0)
+
+    def request_cancel(self, job_id: str) -> bool:
+        """请求取消；返回 True 表示任务正被工作进程处理，会在下一次进度回调时中止"""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            row = conn.execute(
+                "SELECT lease_until FROM jobs WHERE id = ?", (job_id,),
+            ).fetchone()
+        return bool(row and row[0] >= time.time())
+
+    # ── 检查点 ──
+
+    def save_transcript(self, job: Job, transcript: TranscriptResult) -> None:
+        self._write_json(job, "transcript.json", asdict(transcript))
+
+    def load_transcript(self, job: Job) -> TranscriptResult | None:
+        value = self._read_json(job, "transcript.json")
+        return transcript_from_dict(value) if value is not None else None
+
+    def save_summary(self, job: Job, summary: SummaryResult) -> None:
+        self._write_json(job, "summary.json", asdict(summary))
+
+    def load_summary(self, job: Job) -> SummaryResult | None:
+        value = self._read_json(job, "summary.json")
+        return SummaryResult(**value) if value is not None else None
+
+    def _write_json(self, job: Job, name: str, value: dict) -> None:
+        path = os.path.join(self.job_dir(job.id), name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _read_json(self, job: Job, name: str) -> dict | None:
+        try:
+            with open(os.path.join(self.job_dir(job.id), name), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, job: Job) -> None:
+        with self._connect() as conn:
+            # 不用 INSERT OR REPLACE：保留工作进程 / API 单独维护的租约、进度和取消标记
+            conn.execute(
+                "INSERT INTO jobs (id, owner, state, delivered, created_at, updated_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET state = excluded.state, "
+                "delivered = excluded.delivered, updated_at = excluded.updated_at, "
+                "data = excluded.data",
+                (job.id, job.owner, job.state, int(job.delivered),
+                 job.created_at, job.updated_at, json.dumps(asdict(job), ensure_ascii=False)),
+            )
+
+    @staticmethod
+    def _load(data: str) -> Job:
+        known = {f.name for f in fields(Job)}
+        return Job(**{k: v for k, v in json.loads(data).items() if k in known})
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """短连接：成功时提交，结束时关闭"""
+        conn = sqlite3.connect(self._db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+def get_job_store(config: Config) -> JobStore:
+    return JobStore(os.path.join(config.cache_dir, "jobs"))
+
+
+def _job_config(job: Job) -> Config:
+    """环境变量配置，叠加任务提交时选择的引擎和语言"""
+    config = Config()
+    if job.engine:
+        config.engine = job.engine
+    if job.language:
+        config.language = None if job.language == "auto" else job.language
+    return config
+
+
+def advance_job(root: str, job_id: str, on_progress: ProgressCallback | None = None) -> Job:
+    """
+    执行任务的当前阶段，把产物和新状态落盘后返回。在工作线程 / 进程中调用，
+    只传可序列化的参数。重启后对未完成的任务反复调用即可从断点继续。
+    on_progress 用于报告下载百分比和已转录的片段数（总结阶段不报告）。
+    """
+    store = JobStore(root)
+    job = store.get(job_id)
+    if job is None:
+        raise KeyError(f"Job not found: {job_id}")
+    if job.finished:
+        return job
+
+    with log_context(job_id=job.id, user_id=job.user_id or None):
+        return _run_stage(store, job, on_progress)
+
+
+def _run_stage(store: JobStore, job: Job, on_progress: ProgressCallback | None) -> Job:
+    """执行当前阶段；取消和失败都落盘为对应的终态"""
+    stage = job.state
+    try:
+        if job.state in (QUEUED, DOWNLOADING):
+            return _download_stage(store, store.update(job, state=DOWNLOADING), on_progress)
+        if job.state == TRANSCRIBING:
+            return _transcribe_stage(store, job, on_progress)
+        return _summarize_stage(store, job)
+    except JobCancelled:
+        log_info(f"Job {job.id} cancelled at {stage}")
+        return cancel_job(store, store.get(job.id) or job)
+    except LeaseLost:
+        # 任务已归其他工作进程，由它落盘状态
+        raise
+    except Exception as e:
+        log_error(f"Job {job.id} failed at {stage}: {e}")
+        return store.update(
+            store.get(job.id) or job,
+            state=FAILED, error=str(e) or type(e).__name__,
+            failed_stage=DOWNLOADING if stage == QUEUED else stage,
+        )
+
+
+def cancel_job(store: JobStore, job: Job) -> Job:
+    """标记为已取消并清理音频；已完成的任务保持原状"""
+    if job.finished:
+        return job
+    return store.mark_delivered(store.update(job, state=CANCELLED))
+
+
+def _download_stage(store: JobStore, job: Job, on_progress: ProgressCallback | None) -> Job:
+    """探测来源、查询转录缓存，未命中时把音频下载到任务目录"""
+    from star_summary.cache import file_digest, get_transcript_cache
+    from star_summary.downloader import get_downloader
+    from star_summary.downloader.ytdlp import YtdlpDownloader
+
+    config = _job_config(job)
+    cache = get_transcript_cache(config)
+    after_transcribe = SUMMARIZING if job.summarize else DONE
+
+    if job.kind == "file":
+        # 上传文件提交时已保存在任务目录
+        source_id = job.source_id or (file_digest(job.source) if cache is not None else "")
+        transcript = cache.get(source_id, config) if cache is not None else None
+        if transcript is not None:
+            store.save_transcript(job, transcript)
+            return store.update(job, state=after_transcribe, source_id=source_id, cached=True)
+        return store.update(job, state=TRANSCRIBING, source_id=source_id, audio_path=job.source)
+
+    downloader = get_downloader(
+        job.source, cookies=config.cookies, cookies_from_browser=config.cookies_from_browser,
+    )
+    if on_progress is not None and isinstance(downloader, YtdlpDownloader):
+        downloader.on_progress = lambda fraction: on_progress(fraction, "下载音频")
+    try:
+        info = downloader.probe(job.source)
+        job = store.update(job, title=info.title, source_id=info.source_id, duration=info.duration)
+        transcript = cache.get(info.source_id, config) if cache is not None else None
+        if transcript is not None:
+            store.save_transcript(job, transcript)
+            return store.update(job, state=after_transcribe, cached=True)
+
+        if config.pipe and isinstance(downloader, YtdlpDownloader):
+            # 管道模式没有音频检查点，重启后从头流式识别
+            return store.update(job, state=TRANSCRIBING, pipe=True)
+
+        result = downloader.download(job.source)
+        audio_path = result.audio_path
+        if isinstance(downloader, YtdlpDownloader):
+            # 从临时目录移入任务目录，作为检查点保留到转录完成
+            audio_path = shutil.move(
+                audio_path, os.path.join(store.job_dir(job.id), os.path.basename(audio_path)),
+            )
+        return store.update(
+            job,
+            state=TRANSCRIBING,
+            title=job.title or result.title,
+            source_id=job.source_id or result.source_id,
+            duration=job.duration or result.duration,
+            audio_path=audio_path,
+        )
+    finally:
+        if isinstance(downloader, YtdlpDownloader):
+            shutil.rmtree(downloader.tmp_dir, ignore_errors=True)
+
+
+def _clip(text: str, limit: int = 40) -> str:
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def _transcribe_stage(store: JobStore, job: Job, on_progress: ProgressCallback | None) -> Job:
+    from star_summary.audio import probe_duration
+    from star_summary.cache import get_transcript_cache, prepare_audio
+    from star_summary.downloader.ytdlp import YtdlpDownloader
+    from star_summary.transcriber import get_transcriber
+    from star_summary.transcriber.base import drain
+
+    config = _job_config(job)
+    next_state = SUMMARIZING if job.summarize else DONE
+    if store.load_transcript(job) is not None:
+        return store.update(job, state=next_state)
+
+    transcriber = get_transcriber(
+        engine=config.engine,
+        model=config.whisper_model,
+        api_key=config.dashscope_api_key,
+        asr_model=config.asr_model,
+        parallel=config.parallel,
+        chunk_seconds=config.chunk_seconds,
+        whisper_threads=config.whisper_threads,
+    )
+    on_segment = None
+    if on_progress is not None:
+        duration = job.duration or (0.0 if job.pipe else probe_duration(job.audio_path))
+        count = 0
+
+        def on_segment(segment) -> None:
+            nonlocal count
+            count += 1
+            fraction = min(1.0, segment.end / duration) if duration else None
+            on_progress(fraction, f"转录中：已识别 {count} 段｜{_clip(segment.text)}")
+
+    if job.pipe:
+        downloader = YtdlpDownloader(
+            cookies=config.cookies, cookies_from_browser=config.cookies_from_browser,
+        )
+        try:
+            with downloader.open_pcm_stream(job.source) as pcm:
+                transcript = transcriber.transcribe_pcm(
+                    pcm, language=config.language, on_segment=on_segment,
+                )
+        finally:
+            shutil.rmtree(downloader.tmp_dir, ignore_errors=True)
+    else:
+        audio_path = prepare_audio(config, job.audio_path, job.source_id)
+        # 逐段取出识别结果，进度随每段更新（Bot 状态消息、网页进度条据此显示最新一句）
+        transcript = drain(
+            transcriber.transcribe_iter(audio_path, language=config.language), on_segment,
+        )
+
+    store.save_transcript(job, transcript)
+    cache = get_transcript_cache(config)
+    if cache is not None:
+        cache.put(job.source_id, config, transcript)
+    log_success(f"Job {job.id} transcribed")
+    return store.update(job, state=next_state)
+
+
+def _summarize_stage(store: JobStore, job: Job) -> Job:
+    """非流式总结；未配置 DeepSeek Key 时直接完成"""
+    config = _job_config(job)
+    if not config.deepseek_api_key or store.load_summary(job) is not None:
+        return store.update(job, state=DONE)
+
+    from star_summary.summarizer import get_summarizer
+
+    transcript = store.load_transcript(job)
+    if transcript is None:
+        # 转录检查点丢失：回到转录阶段
+        log_info(f"Job {job.id} transcript checkpoint missing, re-transcribing")
+        return store.update(job, state=TRANSCRIBING)
+
+    summarizer = get_summarizer(api_key=config.deepseek_api_key, config=config)
+    summary = summarizer.summarize_transcript(transcript, system_prompt=job.system_prompt or None)
+    if not summary.text:
+        raise RuntimeError(summary.error or "summarizer returned empty result")
+    store.save_summary(job, summary)
+    return store.update(job, state=DONE)
@@ -0,0 +1,284 @@
+"""进程内指标 - 各阶段耗时直方图、计数器、仪表，以 Prometheus 文本格式导出"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterator, TypeVar
+
+from star_summary.utils import log_error, log_info
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+# 阶段耗时的默认分桶（秒）：覆盖从缓存命中到小时级长音频
+_DEFAULT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = labels
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        return lines + self._samples()
+
+    @abstractmethod
+    def _samples(self) -> list[str]:
+        """指标的样本行（不含 HELP / TYPE）"""
+        ...
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        self._values: dict[tuple[str, ...], float] = {}
+        super().__init__(name, help_text, labels)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """可直接 set，也可注册回调在抓取时读取当前值（如队列长度）"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        self._values: dict[tuple[str, ...], float] = {}
+        self._functions: dict[tuple[str, ...], Callable[[], float]] = {}
+        super().__init__(name, help_text, labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, fn: Callable[[], float], **labels: str) -> None:
+        with self._lock:
+            self._functions[self._key(labels)] = fn
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, fn in functions.items():
+            try:
+                values[key] = float(fn())
+            except Exception as e:
+                log_error(f"Gauge {self.name} callback failed: {e}")
+        return [
+            f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}"
+            for k, v in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = _DEFAULT_BUCKETS,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # 每组标签：[各桶计数..., 总和, 总数]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+        super().__init__(name, help_text, labels)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, row in items:
+            for bound, count in zip(self.buckets, row):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {_format_value(count)}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(row[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(row[-1])}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ── 指标定义 ──
+
+STAGE_SECONDS = Histogram(
+    "starsummary_stage_seconds",
+    "Duration of each pipeline stage (probe, download, convert, transcribe, summarize, output)",
+    labels=("stage",),
+)
+ASR_REALTIME_FACTOR = Histogram(
+    "starsummary_asr_realtime_factor",
+    "ASR processing time divided by audio duration (lower is faster)",
+    labels=("engine",),
+    buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5),
+)
+SUMMARY_FIRST_TOKEN_SECONDS = Histogram(
+    "starsummary_summary_first_token_seconds",
+    "Time from summary request to the first streamed token",
+    buckets=(0.25, 0.5, 1, 2, 3, 5, 10, 20, 30, 60),
+)
+SUMMARY_COMPACTION_RATIO = Histogram(
+    "starsummary_summary_compaction_ratio",
+    "Transcript tokens sent to the LLM divided by the raw transcript tokens (lower is smaller)",
+    buckets=(0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98, 1),
+)
+QUEUE_DEPTH = Gauge(
+    "starsummary_queue_depth",
+    "Jobs waiting for an execution slot",
+    labels=("queue",),
+)
+JOBS_RUNNING = Gauge(
+    "starsummary_jobs_running",
+    "Jobs currently being processed",
+    labels=("queue",),
+)
+CACHE_REQUESTS = Counter(
+    "starsummary_cache_requests_total",
+    "Cache lookups by cache and result (hit / miss)",
+    labels=("cache", "result"),
+)
+SUMMARY_PROMPT_TOKENS = Counter(
+    "starsummary_summary_prompt_tokens_total",
+    "LLM input tokens by provider context-cache result (hit / miss)",
+    labels=("cache",),
+)
+SUMMARY_RETRIES = Counter(
+    "starsummary_summary_retries_total",
+    "Retried LLM requests by reason (status code / timeout / connection)",
+    labels=("reason",),
+)
+SUMMARY_HEDGES = Counter(
+    "starsummary_summary_hedges_total",
+    "Hedged LLM requests by which copy answered first (primary / hedge)",
+    labels=("winner",),
+)
+ERRORS = Counter(
+    "starsummary_errors_total",
+    "Failed pipeline stages",
+    labels=("stage",),
+)
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """记录阶段耗时（仅成功时）；阶段抛出异常时计入 errors_total 后原样抛出"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.inc(stage=stage)
+        raise
+    STAGE_SECONDS.observe(time.perf_counter() - t0, stage=stage)
+
+
+def timed_stage(stage: str) -> Callable[[_F], _F]:
+    """装饰器版 track_stage，用于整个函数就是一个阶段的情况"""
+    def decorator(fn: _F) -> _F:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with track_stage(stage):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def record_realtime_factor(engine: str, elapsed: float, duration: float) -> None:
+    """转录完成：记录处理耗时与音频时长之比"""
+    if duration > 0 and elapsed > 0:
+        ASR_REALTIME_FACTOR.observe(elapsed / duration, engine=engine)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # 抓取请求很频繁，不打日志
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> None:
+    """在后台线程启动 /metrics HTTP 服务；port 为 0 时不启动，端口被占用时只记录错误"""
+    if port <= 0:
+        return
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        log_error(f"Failed to start metrics server on port {port}: {e}")
+        return
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    log_info(f"Metrics on http://{host}:{port}/metrics")
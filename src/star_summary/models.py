@@ -23,12 +23,45 @@ class TranscriptResult:
     engine: str = ""                   # 使用的引擎名称
 
 
+def transcript_from_dict(value: dict) -> TranscriptResult:
+    """从 asdict() 得到的字典还原 TranscriptResult（缓存、任务检查点共用）"""
+    value = dict(value)
+    segments = [Segment(**seg) for seg in value.pop("segments", [])]
+    return TranscriptResult(segments=segments, **value)
+
+
+@dataclass
+class SourceInfo:
+    """下载前探测到的来源信息"""
+    source_id: str = ""   # 稳定来源 ID（extractor:视频 ID 或 sha256:内容哈希），空表示无法识别
+    title: str = ""       # 视频标题（如果能获取到）
+    duration: float = 0.0 # 时长（秒）
+
+
+@dataclass
+class PlaylistEntry:
+    """播放列表 / 频道中的一个条目（平铺提取，未解析视频详情）"""
+    url: str              # 条目链接
+    source_id: str = ""   # 同 SourceInfo.source_id
+    title: str = ""
+    duration: float = 0.0
+
+
+@dataclass
+class PlaylistInfo:
+    """播放列表 / 频道的条目清单"""
+    playlist_id: str = ""                 # extractor:列表 ID
+    title: str = ""
+    entries: list[PlaylistEntry] = field(default_factory=list)
+
+
 @dataclass
 class DownloadResult:
     """下载结果"""
     audio_path: str       # 音频文件路径
     title: str = ""       # 视频标题（如果能获取到）
     duration: float = 0.0 # 时长（秒）
+    source_id: str = ""   # 同 SourceInfo.source_id
 
 
 @dataclass
@@ -37,3 +70,4 @@ class SummaryResult:
     text: str                  # 总结文本
     model: str = ""            # 使用的模型
     summarize_time: float = 0.0  # 耗时
+    error: str = ""            # 失败原因（text 为空时）
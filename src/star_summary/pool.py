@@ -0,0 +1,153 @@
+"""异步任务池 - 把阻塞的下载/转录放到线程池或进程池执行，限制全局并发与每用户排队数"""
+
+import asyncio
+import os
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable
+
+
+class QueueFullError(RuntimeError):
+    """用户排队任务数已达上限"""
+
+
+def _get_int_env(name: str, default: int) -> int:
+    raw = os.environ.get(name, "").strip()
+    if raw.isdigit() and int(raw) > 0:
+        return int(raw)
+    return default
+
+
+class WorkerPool:
+    """
+    全局最多 workers 个任务同时执行，其余按提交顺序排队；
+    单个用户最多 max_per_user 个任务（执行中 + 排队中）。
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_per_user: int = 3,
+        executor: str = "thread",
+    ) -> None:
+        self.workers = workers
+        self.max_per_user = max_per_user
+        self.executor_kind = executor
+        self._executor: Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._per_user: Counter[int] = Counter()
+        self._waiting: list[object] = []
+        self._running = 0  # 已取得执行槽位的任务数
+
+    @classmethod
+    def from_env(cls) -> "WorkerPool":
+        """
+        STAR_SUMMARY_WORKERS        同时执行的任务数（默认 2）
+        STAR_SUMMARY_USER_QUEUE     每用户最多排队任务数（默认 3）
+        STAR_SUMMARY_EXECUTOR       thread / process（默认 thread）
+        """
+        executor = os.environ.get("STAR_SUMMARY_EXECUTOR", "thread").strip().lower()
+        if executor not in ("thread", "process"):
+            executor = "thread"
+        return cls(
+            workers=_get_int_env("STAR_SUMMARY_WORKERS", 2),
+            max_per_user=_get_int_env("STAR_SUMMARY_USER_QUEUE", 3),
+            executor=executor,
+        )
+
+    @property
+    def queued(self) -> int:
+        """正在等待执行槽位的任务数"""
+        return len(self._waiting)
+
+    @property
+    def running(self) -> int:
+        """正在执行（已取得执行槽位）的任务数"""
+        return self._running
+
+    def pending_for(self, user_id: int) -> int:
+        return self._per_user[user_id]
+
+    @asynccontextmanager
+    async def job(self, user_id: int) -> AsyncIterator["_JobTicket"]:
+        """
+        登记一个任务。进入时检查每用户上限（超出抛 QueueFullError），
+        返回的 ticket 记录排队位置，await ticket.wait() 获取执行槽位。
+        """
+        if self._per_user[user_id] >= self.max_per_user:
+            raise QueueFullError(f"user {user_id} has {self._per_user[user_id]} pending jobs")
+
+        self._per_user[user_id] += 1
+        ticket = _JobTicket(self)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+            self._per_user[user_id] -= 1
+            if self._per_user[user_id] <= 0:
+                del self._per_user[user_id]
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """在执行器中运行阻塞函数（进程池模式下 fn 和参数须可 pickle）"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="starsummary",
+                )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # 延迟创建，确保绑定到 Application 运行的事件循环
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        return self._semaphore
+
+
+class _JobTicket:
+    """WorkerPool.job() 返回的排队凭证"""
+
+    def __init__(self, pool: WorkerPool) -> None:
+        self._pool = pool
+        self._acquired = False
+        semaphore = pool._get_semaphore()
+        # 有空闲槽位且无人排队时直接执行，否则排到队尾
+        if semaphore.locked() or pool._waiting:
+            pool._waiting.append(self)
+
+    @property
+    def position(self) -> int:
+        """排队位置（1 起），0 表示无需排队"""
+        try:
+            return self._pool._waiting.index(self) + 1
+        except ValueError:
+            return 0
+
+    async def wait(self) -> None:
+        """等待执行槽位"""
+        try:
+            await self._pool._get_semaphore().acquire()
+        finally:
+            if self in self._pool._waiting:
+                self._pool._waiting.remove(self)
+        self._acquired = True
+        self._pool._running += 1
+
+    def release(self) -> None:
+        if self in self._pool._waiting:
+            self._pool._waiting.remove(self)
+        if self._acquired:
+            self._acquired = False
+            self._pool._running -= 1
+            self._pool._get_semaphore().release()
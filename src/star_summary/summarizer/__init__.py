@@ -1,9 +1,31 @@
 """总结模块"""
 
+import os
+
+from star_summary.cache import get_summary_cache
+from star_summary.config import Config
 from star_summary.summarizer.base import AbstractSummarizer
 from star_summary.summarizer.deepseek import DeepSeekSummarizer
 
 
-def get_summarizer(api_key: str) -> AbstractSummarizer:
-    """创建 DeepSeek 总结器"""
-    return DeepSeekSummarizer(api_key=api_key)
+def get_summarizer(
+    api_key: str, max_concurrency: int | None = None, config: Config | None = None,
+) -> AbstractSummarizer:
+    """
+    创建 DeepSeek 总结器。max_concurrency 为长文本分段总结时的并发请求数。
+    config 决定总结缓存、请求超时、重试和对冲（默认按环境变量配置）。
+    """
+    if max_concurrency is None:
+        raw = os.environ.get("STAR_SUMMARY_SUMMARY_CONCURRENCY", "").strip()
+        max_concurrency = int(raw) if raw.isdigit() else 4
+    config = config or Config()
+    return DeepSeekSummarizer(
+        api_key=api_key,
+        max_concurrency=max_concurrency,
+        cache=get_summary_cache(config),
+        timeout=config.summary_timeout,
+        retries=config.summary_retries,
+        hedge_after=config.summary_hedge_ms / 1000,
+        prefix_cache=config.summary_prefix_cache,
+        compact=config.summary_compact,
+    )
@@ -1,8 +1,11 @@
 """总结器抽象基类"""
 
+import asyncio
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Iterator
 
-from star_summary.models import SummaryResult
+from star_summary.models import SummaryResult, TranscriptResult
+from star_summary.utils import iterate_in_thread
 
 
 class AbstractSummarizer(ABC):
@@ -10,3 +13,39 @@ class AbstractSummarizer(ABC):
     def summarize(self, text: str, system_prompt: str | None = None) -> SummaryResult:
         """总结文本，返回 SummaryResult。可选自定义 system_prompt。"""
         ...
+
+    def summarize_transcript(
+        self, transcript: TranscriptResult, system_prompt: str | None = None,
+    ) -> SummaryResult:
+        """总结转录结果。默认只用纯文本，子类可利用片段时间轴。"""
+        return self.summarize(transcript.text, system_prompt=system_prompt)
+
+    def summarize_stream(self, text: str, system_prompt: str | None = None) -> Iterator[str]:
+        """流式总结，逐段产出新增文本。默认一次性产出完整结果，失败时抛 RuntimeError。"""
+        result = self.summarize(text, system_prompt=system_prompt)
+        if not result.text:
+            raise RuntimeError(result.error or "summarizer returned empty result")
+        yield result.text
+
+    def summarize_transcript_stream(
+        self, transcript: TranscriptResult, system_prompt: str | None = None,
+    ) -> Iterator[str]:
+        """流式总结转录结果"""
+        return self.summarize_stream(transcript.text, system_prompt=system_prompt)
+
+    async def asummarize(self, text: str, system_prompt: str | None = None) -> SummaryResult:
+        """summarize 的异步版本。默认在后台线程执行，子类可直接用异步客户端实现"""
+        return await asyncio.to_thread(self.summarize, text, system_prompt)
+
+    async def asummarize_transcript(
+        self, transcript: TranscriptResult, system_prompt: str | None = None,
+    ) -> SummaryResult:
+        """summarize_transcript 的异步版本"""
+        return await asyncio.to_thread(self.summarize_transcript, transcript, system_prompt)
+
+    async def asummarize_stream(
+        self, text: str, system_prompt: str | None = None,
+    ) -> AsyncIterator[str]:
+        """summarize_stream 的异步版本：在后台线程消费同步迭代器，不阻塞事件循环"""
+        async for delta in iterate_in_thread(self.summarize_stream(text, system_prompt)):
+            yield delta
@@ -0,0 +1,58 @@
+"""长文本切分 - 按时间轴把转录切成若干块，供分段总结使用"""
+
+from dataclasses import dataclass
+
+from star_summary.models import Segment
+from star_summary.utils import format_time
+
+
+@dataclass
+class Chunk:
+    """一段连续的转录文本"""
+    text: str
+    start: float = 0.0    # 开始时间（秒），纯文本切分时为 0
+    end: float = 0.0      # 结束时间（秒）
+
+    @property
+    def label(self) -> str:
+        """时间范围标签，无时间信息时为空"""
+        if self.end <= 0:
+            return ""
+        return f"{format_time(self.start)} → {format_time(self.end)}"
+
+
+def chunk_segments(segments: list[Segment], max_chars: int) -> list[Chunk]:
+    """按片段边界切分，每块不超过 max_chars（单个超长片段自成一块）"""
+    chunks: list[Chunk] = []
+    parts: list[str] = []
+    size = 0
+    start = 0.0
+    end = 0.0
+
+    for seg in segments:
+        if parts and size + len(seg.text) + 1 > max_chars:
+            chunks.append(Chunk(text="\n".join(parts), start=start, end=end))
+            parts, size = [], 0
+        if not parts:
+            start = seg.start
+        parts.append(seg.text)
+        size += len(seg.text) + 1
+        end = seg.end
+
+    if parts:
+        chunks.append(Chunk(text="\n".join(parts), start=start, end=end))
+    return chunks
+
+
+def chunk_text(text: str, max_chars: int) -> list[Chunk]:
+    """无时间轴时按行切分；超长的行按 max_chars 硬切"""
+    lines: list[str] = []
+    for line in text.splitlines():
+        while len(line) > max_chars:
+            lines.append(line[:max_chars])
+            line = line[max_chars:]
+        if line.strip():
+            lines.append(line)
+
+    segments = [Segment(start=0.0, end=0.0, text=line) for line in lines]
+    return chunk_segments(segments, max_chars)
@@ -0,0 +1,304 @@
+"""
+OpenAI 兼容接口的调用封装 - 进程内共享同步 / 异步客户端（keep-alive 连接池常驻），
+统一超时；429 / 5xx / 连接错误按带抖动的指数退避重试；可选对冲请求压低长尾延迟。
+"""
+
+import asyncio
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Callable, Iterator
+
+from star_summary.metrics import SUMMARY_HEDGES, SUMMARY_PROMPT_TOKENS, SUMMARY_RETRIES
+from star_summary.utils import log_error, log_info, log_warn, with_log_context
+
+# 建连超时（秒）；读超时由调用方配置，流式请求即两个分片之间的最长间隔
+_CONNECT_TIMEOUT = 10.0
+
+# 第 n 次重试前等待 [0, min(_BACKOFF_MAX, _BACKOFF_BASE × 2^n)) 内的随机时长（full jitter），
+# 避免大量请求同时失败后又同时重试；服务端给出 Retry-After 时照办
+_BACKOFF_BASE = 0.5
+_BACKOFF_MAX = 8.0
+
+# 同步对冲请求的线程数上限
+_HEDGE_WORKERS = 32
+
+# (api_key, base_url, timeout) → OpenAI 客户端（线程安全，可跨线程共用）
+_clients: dict[tuple[str, str, float], Any] = {}
+# 事件循环 → {(api_key, base_url, timeout): AsyncOpenAI}；异步客户端的连接绑定在创建它的事件循环上
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+_hedge_executor: ThreadPoolExecutor | None = None
+
+
+def _openai():
+    try:
+        import openai
+    except ImportError:
+        log_error("openai package not installed")
+        log_info("Install it: uv add openai")
+        raise RuntimeError("openai not installed")
+    return openai
+
+
+def _timeout(seconds: float):
+    import httpx  # openai 的依赖
+
+    return httpx.Timeout(seconds, connect=min(_CONNECT_TIMEOUT, seconds))
+
+
+def _retry_reason(error: Exception) -> str:
+    """可重试的错误返回原因（状态码 / timeout / connection），否则返回空字符串"""
+    openai = _openai()
+    if isinstance(error, openai.APITimeoutError):
+        return "timeout"
+    if isinstance(error, openai.APIConnectionError):
+        return "connection"
+    if isinstance(error, openai.APIStatusError):
+        status = error.status_code
+        if status in (408, 429) or status >= 500:
+            return str(status)
+    return ""
+
+
+def _backoff(attempt: int, error: Exception) -> float:
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after", "") if response is not None else ""
+    try:
+        return min(max(float(retry_after), 0.0), _BACKOFF_MAX)
+    except ValueError:
+        return random.uniform(0, min(_BACKOFF_MAX, _BACKOFF_BASE * 2 ** attempt))
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    with _clients_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=_HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+        return _hedge_executor
+
+
+def _record_usage(usage) -> None:
+    """
+    记录输入 token 中命中服务端上下文缓存（前缀相同的部分）的数量。
+    DeepSeek 返回 prompt_cache_hit_tokens，OpenAI 兼容服务返回 prompt_tokens_details.cached_tokens
+    """
+    if usage is None:
+        return
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    hit = getattr(usage, "prompt_cache_hit_tokens", None)
+    if hit is None:
+        hit = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0)
+    hit = min(hit or 0, prompt)
+    SUMMARY_PROMPT_TOKENS.inc(hit, cache="hit")
+    SUMMARY_PROMPT_TOKENS.inc(prompt - hit, cache="miss")
+    if prompt:
+        log_info(f"Prompt tokens: {prompt} ({hit} from context cache, {hit / prompt:.0%})")
+
+
+def _reply_text(response) -> str:
+    _record_usage(getattr(response, "usage", None))
+    return response.choices[0].message.content or ""
+
+
+def _delta_text(chunk) -> str:
+    # 设置了 include_usage 时最后一个分片不带 choices，只带本次用量
+    if getattr(chunk, "usage", None) is not None:
+        _record_usage(chunk.usage)
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+
+class ChatClient:
+    """
+    一组连接参数对应的 chat completions 调用入口，同步和异步接口行为一致。
+    底层客户端按 (api_key, base_url, timeout) 在进程内共享，连接池跨请求复用。
+    retries 为失败后的最多重试次数；hedge_after > 0 时，非流式请求超过该秒数仍未返回
+    就再发一份相同的请求，取先成功的结果。
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        timeout: float = 120.0,
+        retries: int = 3,
+        hedge_after: float = 0.0,
+    ) -> None:
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = float(timeout)
+        self.retries = max(0, retries)
+        self.hedge_after = max(0.0, hedge_after)
+
+    @property
+    def _key(self) -> tuple[str, str, float]:
+        return (self.api_key, self.base_url, self.timeout)
+
+    def _sync_client(self):
+        openai = _openai()
+        with _clients_lock:
+            client = _clients.get(self._key)
+            if client is None:
+                # 重试统一在这里处理（带抖动、计入指标），关闭 SDK 自带的重试
+                client = _clients[self._key] = openai.OpenAI(
+                    api_key=self.api_key, base_url=self.base_url,
+                    timeout=_timeout(self.timeout), max_retries=0,
+                )
+        return client
+
+    def _async_client(self):
+        openai = _openai()
+        loop = asyncio.get_running_loop()
+        with _clients_lock:
+            clients = _async_clients.setdefault(loop, {})
+            client = clients.get(self._key)
+            if client is None:
+                client = clients[self._key] = openai.AsyncOpenAI(
+                    api_key=self.api_key, base_url=self.base_url,
+                    timeout=_timeout(self.timeout), max_retries=0,
+                )
+        return client
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float | None:
+        """可以重试时记录并返回等待秒数，否则返回 None"""
+        reason = _retry_reason(error)
+        if not reason or attempt >= self.retries:
+            return None
+        delay = _backoff(attempt, error)
+        SUMMARY_RETRIES.inc(reason=reason)
+        log_warn(f"LLM request failed ({reason}), retry {attempt + 1}/{self.retries} in {delay:.1f}s")
+        return delay
+
+    # ── 同步 ──
+
+    def complete(self, **params) -> str:
+        """非流式请求，返回回复文本；params 原样传给 chat.completions.create"""
+        attempt = 0
+        while True:
+            try:
+                return self._hedged(params)
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    def _create(self, params: dict) -> str:
+        return _reply_text(self._sync_client().chat.completions.create(**params))
+
+    def _hedged(self, params: dict) -> str:
+        if self.hedge_after <= 0:
+            return self._create(params)
+        # 同步请求无法中途取消，落败的一份在后台跑完后丢弃
+        executor = _get_hedge_executor()
+        create: Callable[[dict], str] = with_log_context(self._create)
+        primary = executor.submit(create, params)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+        log_info(f"LLM request slower than {self.hedge_after:.1f}s, sending hedged request")
+        pending: dict[Future, str] = {primary: "primary", executor.submit(create, params): "hedge"}
+        error: BaseException | None = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                if future.exception() is None:
+                    SUMMARY_HEDGES.inc(winner=name)
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def stream(self, **params) -> Iterator[str]:
+        """流式请求，逐段产出新增文本。首个分片之前失败按同样规则重试；已产出内容后失败直接抛出"""
+        attempt = 0
+        while True:
+            started = False
+            try:
+                with self._sync_client().chat.completions.create(
+                    stream=True, stream_options={"include_usage": True}, **params,
+                ) as stream:
+                    for chunk in stream:
+                        delta = _delta_text(chunk)
+                        if delta:
+                            started = True
+                            yield delta
+                return
+            except Exception as e:
+                delay = None if started else self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    # ── 异步 ──
+
+    async def acomplete(self, **params) -> str:
+        """complete 的异步版本，直接在事件循环中发请求"""
+        attempt = 0
+        while True:
+            try:
+                return await self._ahedged(params)
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _acreate(self, params: dict) -> str:
+        return _reply_text(await self._async_client().chat.completions.create(**params))
+
+    async def _ahedged(self, params: dict) -> str:
+        if self.hedge_after <= 0:
+            return await self._acreate(params)
+        primary = asyncio.ensure_future(self._acreate(params))
+        pending: dict[asyncio.Future, str] = {primary: "primary"}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_after)
+            if done:
+                return primary.result()
+            log_info(f"LLM request slower than {self.hedge_after:.1f}s, sending hedged request")
+            pending[asyncio.ensure_future(self._acreate(params))] = "hedge"
+            error: BaseException | None = None
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = pending.pop(task)
+                    if task.exception() is None:
+                        SUMMARY_HEDGES.inc(winner=name)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # 落败或因调用方取消而未完成的请求直接取消，连接归还连接池
+            for task in pending:
+                task.cancel()
+
+    async def astream(self, **params) -> AsyncIterator[str]:
+        """stream 的异步版本"""
+        attempt = 0
+        while True:
+            started = False
+            try:
+                stream = await self._async_client().chat.completions.create(
+                    stream=True, stream_options={"include_usage": True}, **params,
+                )
+                async with stream:
+                    async for chunk in stream:
+                        delta = _delta_text(chunk)
+                        if delta:
+                            started = True
+                            yield delta
+                return
+            except Exception as e:
+                delay = None if started else self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
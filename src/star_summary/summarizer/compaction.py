@@ -0,0 +1,172 @@
+"""
+转录压缩 - 提交给 LLM 之前去掉 ASR 循环重复、语气词和逐句换行，并按 token 计数。
+
+token 计数优先用 STAR_SUMMARY_TOKENIZER 指定的分词器（tokenizer.json 路径或 Hugging Face 模型名，
+需安装 tokenizers），否则按 DeepSeek 文档给出的比例估算：中文字符约 0.6 token，其他字符约 0.3 token。
+"""
+
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+from star_summary.metrics import SUMMARY_COMPACTION_RATIO
+from star_summary.models import Segment, TranscriptResult
+from star_summary.utils import log_info, log_warn
+
+# 相邻片段间隔小于该值（秒）时并入同一段落
+_PARAGRAPH_GAP = 1.5
+# 段落长度上限（字符），超过后另起一段
+_PARAGRAPH_CHARS = 300
+# 片段内同一短语连续出现 5 次及以上（Whisper 的复读），保留两次
+_REPEAT = re.compile(r"(.{1,12}?)\1{4,}", re.S)
+# 句首 / 标点后的独立语气词，必须紧跟标点、空白或结尾。
+# 不含"额"：它同时是实词（"额，总额是多少"里的"额"无法与语气词区分）
+_ZH_FILLER = re.compile(r"(?:^|(?<=[\s，。！？、,.!?]))(?:嗯|呃|唔)+(?:[\s，。！？、,.!?]+|$)")
+_EN_FILLER = re.compile(r"\b(?:u+h+|u+m+|e+r+m+|h+m+)\b[,.]?\s*", re.I)
+_SPACES = re.compile(r"[ \t　]+")
+_CJK = re.compile(r"[⺀-鿿가-힯豈-﫿＀-￯]")
+# 这些字符结尾时直接拼接下一片段，否则用空格隔开以保留原来的断句
+_SENTENCE_END = "，。！？；：、,.!?;:"
+
+_tokenizer_lock = threading.Lock()
+_tokenizer: Callable[[str], int] | None = None
+_tokenizer_loaded = False
+
+
+@dataclass
+class Compaction:
+    """压缩结果；segments 为合并后的段落（纯文本输入时为空）"""
+    text: str
+    segments: list[Segment]
+    original_tokens: int
+    tokens: int
+
+    @property
+    def ratio(self) -> float:
+        """压缩后 / 压缩前的 token 数"""
+        return self.tokens / self.original_tokens if self.original_tokens else 1.0
+
+
+def _load_tokenizer() -> Callable[[str], int] | None:
+    name = os.environ.get("STAR_SUMMARY_TOKENIZER", "").strip()
+    if not name:
+        return None
+    try:
+        from tokenizers import Tokenizer
+    except ImportError:
+        log_warn("tokenizers package not installed, estimating token counts")
+        log_info("Install it: uv add tokenizers")
+        return None
+    try:
+        if os.path.isfile(os.path.expanduser(name)):
+            tokenizer = Tokenizer.from_file(os.path.expanduser(name))
+        else:
+            tokenizer = Tokenizer.from_pretrained(name)
+    except Exception as e:
+        log_warn(f"Failed to load tokenizer {name}: {e}, estimating token counts")
+        return None
+    log_info(f"Counting tokens with {name}")
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def _estimate_tokens(text: str) -> int:
+    cjk = len(_CJK.findall(text))
+    return math.ceil(cjk * 0.6 + (len(text) - cjk) * 0.3)
+
+
+def count_tokens(text: str) -> int:
+    """text 的 token 数：配置了分词器时精确计数，否则估算"""
+    global _tokenizer, _tokenizer_loaded
+    if not _tokenizer_loaded:
+        with _tokenizer_lock:
+            if not _tokenizer_loaded:
+                _tokenizer = _load_tokenizer()
+                _tokenizer_loaded = True
+    if _tokenizer is not None:
+        return _tokenizer(text)
+    return _estimate_tokens(text)
+
+
+def _collapse_repeat(match: re.Match) -> str:
+    unit = match.group(1)
+    # 数字串（0000、1111）是内容不是复读
+    if unit.isdigit() or not unit.strip():
+        return match.group(0)
+    return unit * 2
+
+
+def _clean(text: str) -> str:
+    """去掉语气词和片段内复读，合并多余空白"""
+    text = _REPEAT.sub(_collapse_repeat, text)
+    text = _ZH_FILLER.sub("", text)
+    text = _EN_FILLER.sub("", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def _dedupe_key(text: str) -> str:
+    return re.sub(r"[\W_]+", "", text).lower()
+
+
+def _join(left: str, right: str) -> str:
+    if left[-1] in _SENTENCE_END and (_CJK.match(left[-1]) or _CJK.match(right[0])):
+        return left + right
+    return f"{left} {right}"
+
+
+def compact_segments(segments: list[Segment]) -> list[Segment]:
+    """
+    清理每个片段，丢弃 ASR 循环产生的重复片段，再把间隔很短的相邻片段合并成段落。
+    只丢弃与上一个片段完全相同的片段（ASR 复读的形态）；隔了其他内容再出现的同一句话是说话人
+    真的重复，予以保留。片段没有时间信息（end 为 0）时只按长度合并。
+    """
+    kept: list[Segment] = []
+    previous = ""
+    for seg in segments:
+        text = _clean(seg.text)
+        key = _dedupe_key(text)
+        if not key or key == previous:
+            continue
+        previous = key
+        kept.append(Segment(start=seg.start, end=seg.end, text=text))
+
+    paragraphs: list[Segment] = []
+    for seg in kept:
+        if paragraphs:
+            last = paragraphs[-1]
+            close = seg.end <= 0 or seg.start - last.end < _PARAGRAPH_GAP
+            if close and len(last.text) + len(seg.text) < _PARAGRAPH_CHARS:
+                paragraphs[-1] = Segment(start=last.start, end=seg.end, text=_join(last.text, seg.text))
+                continue
+        paragraphs.append(seg)
+    return paragraphs
+
+
+def _report(original: str, text: str, segments: list[Segment]) -> Compaction:
+    result = Compaction(
+        text=text, segments=segments,
+        original_tokens=count_tokens(original), tokens=count_tokens(text),
+    )
+    SUMMARY_COMPACTION_RATIO.observe(result.ratio)
+    log_info(
+        f"Compacted transcript: {result.original_tokens} → {result.tokens} tokens "
+        f"({result.ratio:.0%}, {len(original)} → {len(text)} chars)"
+    )
+    return result
+
+
+def compact_transcript(transcript: TranscriptResult) -> Compaction:
+    """按片段压缩转录，保留时间轴供分段总结标注"""
+    if not transcript.segments:
+        return compact_text(transcript.text)
+    segments = compact_segments(transcript.segments)
+    return _report(transcript.text, "\n".join(seg.text for seg in segments), segments)
+
+
+def compact_text(text: str) -> Compaction:
+    """压缩没有时间轴的纯文本，每行视为一个片段"""
+    lines = [Segment(start=0.0, end=0.0, text=line) for line in text.splitlines()]
+    segments = compact_segments(lines)
+    return _report(text, "\n".join(seg.text for seg in segments), [])
@@ -1,15 +1,55 @@
 """DeepSeek API 总结实现"""
 
+import asyncio
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterator
 
-from star_summary.models import SummaryResult
+from star_summary.cache import SummaryCache
+from star_summary.metrics import ERRORS, STAGE_SECONDS, SUMMARY_FIRST_TOKEN_SECONDS, track_stage
+from star_summary.models import SummaryResult, TranscriptResult
 from star_summary.summarizer.base import AbstractSummarizer
-from star_summary.utils import log_step, log_info, log_success, log_error, log_warn
+from star_summary.summarizer.chunking import Chunk, chunk_segments, chunk_text
+from star_summary.summarizer.client import ChatClient
+from star_summary.summarizer.compaction import compact_text, compact_transcript, count_tokens
+from star_summary.utils import log_step, log_info, log_success, log_error, with_log_context
 
 
 class DeepSeekSummarizer(AbstractSummarizer):
-    def __init__(self, api_key: str) -> None:
+    def __init__(
+        self,
+        api_key: str,
+        max_concurrency: int = 4,
+        cache: SummaryCache | None = None,
+        timeout: float = 120.0,
+        retries: int = 3,
+        hedge_after: float = 0.0,
+        prefix_cache: bool = True,
+        compact: bool = True,
+    ) -> None:
         self.api_key = api_key
+        self.max_concurrency = max(1, max_concurrency)
+        self.model = self._MODEL
+        # 相同请求（消息、模型、参数都相同）直接返回上次的结果
+        self.cache = cache
+        # 转录在前、风格要求在后：同一转录换风格时请求前缀不变，命中 DeepSeek 的上下文缓存
+        self.prefix_cache = prefix_cache
+        # 提交前压缩转录：去掉 ASR 复读、语气词，合并短片段
+        self.compact = compact
+        # 可指向兼容 OpenAI 接口的代理或本地替身（基准测试）
+        base_url = os.environ.get("DEEPSEEK_BASE_URL", "").strip() or "https://api.deepseek.com"
+        # 底层连接池在进程内共享，常驻进程里后续请求免去建连和 TLS 握手
+        self.client = ChatClient(api_key, base_url, timeout=timeout, retries=retries, hedge_after=hedge_after)
+
+    _MODEL = "deepseek-chat"
+    _MAX_TOKENS = 2048
+    _TEMPERATURE = 0.3
+
+    # 单次请求的转录 token 上限（模型上下文 64K，留足提示词和输出），超过走分段总结（map-reduce）
+    _SINGLE_PASS_TOKENS = 36000
+    # 分段总结时每块的 token 数：块越小首个 token 越快，块数越多 reduce 越长
+    _CHUNK_TOKENS = 9000
 
     _DEFAULT_SYSTEM_PROMPT = "你是一个专业的内容总结助手，擅长从视频转录文本中提取关键信息。"
 
@@ -22,55 +62,347 @@ class DeepSeekSummarizer(AbstractSummarizer):
 转录文本：
 {text}"""
 
+    _MAP_PROMPT = """以下是一段长视频/音频转录的第 {index}/{total} 部分{label}。
+请提取这一部分的关键内容、观点、数据和结论，分点列出，用中文回答。不要写开场白。
+
+转录文本：
+{text}"""
+
+    # prefix_cache 布局：system 固定，user 消息先放转录，最后才是风格要求
+    _PREFIX_USER_PROMPT = """以下是一段视频/音频的转录文本：
+
+{text}
+
+---
+请根据下面的要求处理上面的转录文本，用中文回答。
+要求：{style}"""
+
+    _DEFAULT_STYLE = """对转录文本进行总结。
+1. 先用一两句话概括核心主题
+2. 然后分点列出关键内容和要点
+3. 如果有重要的观点、数据或结论，请特别标注
+4. 保持简洁"""
+
+    _REDUCE_NOTE = "以下是一段长视频/音频按时间顺序分段提取的要点，请把它们当作完整内容来处理。"
+
+    def _chunk_chars(self, text: str, tokens: int) -> int:
+        """按这段文本实际的字符 / token 比例，把每块的 token 预算换算成字符数"""
+        return max(1000, int(self._CHUNK_TOKENS * len(text) / max(tokens, 1)))
+
+    def _prepare(
+        self, text: str, transcript: TranscriptResult | None = None,
+    ) -> tuple[str, list[Chunk] | None]:
+        """
+        压缩转录并按 token 预算决定是否分段，返回 (提交的文本, 切好的块)，一次请求放得下时块为 None。
+        有片段时间轴时按片段切块并标注时间范围。
+        """
+        segments = transcript.segments if transcript is not None else []
+        if self.compact:
+            compaction = compact_transcript(transcript) if transcript is not None else compact_text(text)
+            text, segments, tokens = compaction.text, compaction.segments, compaction.tokens
+        else:
+            tokens = count_tokens(text)
+        if tokens <= self._SINGLE_PASS_TOKENS:
+            return text, None
+        max_chars = self._chunk_chars(text, tokens)
+        if segments:
+            return text, chunk_segments(segments, max_chars)
+        return text, chunk_text(text, max_chars)
+
+    def _announce(self, chunks: list[Chunk] | None, streaming: bool) -> None:
+        details = [f"{len(chunks)} chunks"] if chunks else []
+        if streaming:
+            details.append("streaming")
+        suffix = f" ({', '.join(details)})" if details else ""
+        log_step("🤖", f"Summarizing with DeepSeek{suffix}...")
+
+    def _failed(self, error: Exception) -> SummaryResult:
+        log_error(f"DeepSeek API error: {error}")
+        ERRORS.inc(stage="summarize")
+        return SummaryResult(text="", model=self.model, error=f"DeepSeek API error: {error}")
+
+    def _finished(self, summary_text: str, t0: float) -> SummaryResult:
+        elapsed = time.time() - t0
+        log_success(f"Summary generated in {elapsed:.1f}s")
+        STAGE_SECONDS.observe(elapsed, stage="summarize")
+        return SummaryResult(text=summary_text, model=self.model, summarize_time=elapsed)
+
+    # ── 同步 ──
+
     def summarize(self, text: str, system_prompt: str | None = None) -> SummaryResult:
+        return self._summarize(*self._prepare(text), system_prompt)
+
+    def summarize_transcript(
+        self, transcript: TranscriptResult, system_prompt: str | None = None,
+    ) -> SummaryResult:
+        return self._summarize(*self._prepare(transcript.text, transcript), system_prompt)
+
+    def _summarize(self, text: str, chunks: list[Chunk] | None, system_prompt: str | None) -> SummaryResult:
+        """短文本一次请求；长文本分段提取要点后，按用户要求的风格合并总结"""
+        client = self._client()
+        self._announce(chunks, streaming=False)
+
+        t0 = time.time()
         try:
-            from openai import OpenAI
-        except ImportError:
-            log_error("openai package not installed")
-            log_info("Install it: uv add openai")
-            raise RuntimeError("openai not installed")
+            if chunks:
+                text = f"{self._REDUCE_NOTE}\n\n{self._map_chunks(client, chunks)}"
+            sys_msg, user_prompt = self._build_prompt(text, system_prompt)
+            summary_text = self._complete(client, sys_msg, user_prompt)
+        except Exception as e:
+            return self._failed(e)
+        return self._finished(summary_text, t0)
+
+    def summarize_stream(self, text: str, system_prompt: str | None = None) -> Iterator[str]:
+        return self._stream(*self._prepare(text), system_prompt)
+
+    def summarize_transcript_stream(
+        self, transcript: TranscriptResult, system_prompt: str | None = None,
+    ) -> Iterator[str]:
+        return self._stream(*self._prepare(transcript.text, transcript), system_prompt)
+
+    def _stream(self, text: str, chunks: list[Chunk] | None, system_prompt: str | None) -> Iterator[str]:
+        """分段要点并发提取完后，流式输出 reduce 阶段；出错时抛 RuntimeError"""
+        client = self._client()
+        self._announce(chunks, streaming=True)
+
+        with track_stage("summarize"):
+            if chunks:
+                try:
+                    notes = self._map_chunks(client, chunks)
+                except Exception as e:
+                    log_error(f"DeepSeek API error: {e}")
+                    raise RuntimeError(f"DeepSeek API error: {e}")
+                text = f"{self._REDUCE_NOTE}\n\n{notes}"
+            sys_msg, user_prompt = self._build_prompt(text, system_prompt)
+            yield from self._complete_stream(client, sys_msg, user_prompt)
+
+    def _map_chunks(self, client: ChatClient, chunks: list[Chunk]) -> str:
+        """
+        map：各块并发提取要点（最多 max_concurrency 个请求同时进行），返回合并后的要点。
+        要点合计仍过长时把要点再切块，逐层 map，直到能一次 reduce。
+        """
+        log_info(f"Running up to {self.max_concurrency} requests in parallel")
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            level = 1
+            while True:
+                total = len(chunks)
+                partials = list(executor.map(
+                    with_log_context(lambda item: self._complete(client, *self._map_prompt(item[0], total, item[1]))),
+                    enumerate(chunks),
+                ))
+                notes = self._join_notes(level, chunks, partials)
+                tokens = count_tokens(notes)
+                if tokens <= self._SINGLE_PASS_TOKENS or total == 1:
+                    return notes
+                chunks = chunk_text(notes, self._chunk_chars(notes, tokens))
+                level += 1
+
+    # ── 异步：直接用 AsyncOpenAI 发请求，不占用线程 ──
 
-        log_step("🤖", "Summarizing with DeepSeek...")
+    async def asummarize(self, text: str, system_prompt: str | None = None) -> SummaryResult:
+        # 压缩和计数是 CPU 活，放到线程里避免阻塞事件循环
+        return await self._asummarize(*await asyncio.to_thread(self._prepare, text), system_prompt)
 
-        client = OpenAI(
-            api_key=self.api_key,
-            base_url="https://api.deepseek.com",
+    async def asummarize_transcript(
+        self, transcript: TranscriptResult, system_prompt: str | None = None,
+    ) -> SummaryResult:
+        prepared = await asyncio.to_thread(self._prepare, transcript.text, transcript)
+        return await self._asummarize(*prepared, system_prompt)
+
+    async def _asummarize(
+        self, text: str, chunks: list[Chunk] | None, system_prompt: str | None,
+    ) -> SummaryResult:
+        client = self._client()
+        self._announce(chunks, streaming=False)
+
+        t0 = time.time()
+        try:
+            if chunks:
+                text = f"{self._REDUCE_NOTE}\n\n{await self._amap_chunks(client, chunks)}"
+            sys_msg, user_prompt = self._build_prompt(text, system_prompt)
+            summary_text = await self._acomplete(client, sys_msg, user_prompt)
+        except Exception as e:
+            return self._failed(e)
+        return self._finished(summary_text, t0)
+
+    async def asummarize_stream(
+        self, text: str, system_prompt: str | None = None,
+    ) -> AsyncIterator[str]:
+        async for delta in self._astream(*await asyncio.to_thread(self._prepare, text), system_prompt):
+            yield delta
+
+    async def _astream(
+        self, text: str, chunks: list[Chunk] | None, system_prompt: str | None,
+    ) -> AsyncIterator[str]:
+        client = self._client()
+        self._announce(chunks, streaming=True)
+
+        with track_stage("summarize"):
+            if chunks:
+                try:
+                    notes = await self._amap_chunks(client, chunks)
+                except Exception as e:
+                    log_error(f"DeepSeek API error: {e}")
+                    raise RuntimeError(f"DeepSeek API error: {e}")
+                text = f"{self._REDUCE_NOTE}\n\n{notes}"
+            sys_msg, user_prompt = self._build_prompt(text, system_prompt)
+            async for delta in self._acomplete_stream(client, sys_msg, user_prompt):
+                yield delta
+
+    async def _amap_chunks(self, client: ChatClient, chunks: list[Chunk]) -> str:
+        """_map_chunks 的异步版本：用信号量限制同时进行的请求数"""
+        log_info(f"Running up to {self.max_concurrency} requests in parallel")
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def map_one(index: int, total: int, chunk: Chunk) -> str:
+            async with slots:
+                return await self._acomplete(client, *self._map_prompt(index, total, chunk))
+
+        level = 1
+        while True:
+            total = len(chunks)
+            partials = list(await asyncio.gather(*(map_one(i, total, c) for i, c in enumerate(chunks))))
+            notes = self._join_notes(level, chunks, partials)
+            tokens = count_tokens(notes)
+            if tokens <= self._SINGLE_PASS_TOKENS or total == 1:
+                return notes
+            chunks = chunk_text(notes, self._chunk_chars(notes, tokens))
+            level += 1
+
+    # ── 提示词 ──
+
+    def _map_prompt(self, index: int, total: int, chunk: Chunk) -> tuple[str, str]:
+        """提取单个块要点的 (system 消息, user 消息)"""
+        user_prompt = self._MAP_PROMPT.format(
+            index=index + 1,
+            total=total,
+            label=f"（{chunk.label}）" if chunk.label else "",
+            text=chunk.text,
         )
+        return self._DEFAULT_SYSTEM_PROMPT, user_prompt
 
-        # 文本过长时截断
-        max_chars = 60000
-        if len(text) > max_chars:
-            log_warn(f"Transcript too long ({len(text)} chars), truncating to {max_chars}")
-            text = text[:max_chars]
+    def _join_notes(self, level: int, chunks: list[Chunk], partials: list[str]) -> str:
+        """按顺序合并各块要点，标注序号和时间范围"""
+        log_info(f"Level {level}: {len(chunks)} chunks → {sum(map(len, partials))} chars")
+        return "\n\n".join(
+            f"## 第 {i + 1} 部分{f'（{c.label}）' if c.label else ''}\n{p}"
+            for i, (c, p) in enumerate(zip(chunks, partials))
+        )
 
+    def _build_prompt(self, text: str, system_prompt: str | None) -> tuple[str, str]:
+        """返回 (system 消息, user 消息)。system_prompt 为用户选择的总结风格"""
+        if self.prefix_cache:
+            user_prompt = self._PREFIX_USER_PROMPT.format(text=text, style=system_prompt or self._DEFAULT_STYLE)
+            return self._DEFAULT_SYSTEM_PROMPT, user_prompt
         if system_prompt:
-            sys_msg = system_prompt
-            user_prompt = f"请根据要求处理以下转录文本，用中文回答。\n\n转录文本：\n{text}"
-        else:
-            sys_msg = self._DEFAULT_SYSTEM_PROMPT
-            user_prompt = self._DEFAULT_USER_PROMPT.format(text=text)
+            return system_prompt, f"请根据要求处理以下转录文本，用中文回答。\n\n转录文本：\n{text}"
+        return self._DEFAULT_SYSTEM_PROMPT, self._DEFAULT_USER_PROMPT.format(text=text)
+
+    # ── 请求 ──
+
+    def _cache_key(self, sys_msg: str, user_prompt: str) -> str:
+        if self.cache is None:
+            return ""
+        return SummaryCache.make_key(sys_msg, user_prompt, self.model, self._MAX_TOKENS, self._TEMPERATURE)
+
+    def _request(self, sys_msg: str, user_prompt: str) -> dict:
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": sys_msg},
+                {"role": "user", "content": user_prompt},
+            ],
+            "max_tokens": self._MAX_TOKENS,
+            "temperature": self._TEMPERATURE,
+        }
 
+    def _complete(self, client: ChatClient, sys_msg: str, user_prompt: str) -> str:
+        key = self._cache_key(sys_msg, user_prompt)
+        if key:
+            cached = self.cache.get(key)
+            if cached:
+                return cached
+
+        text = client.complete(**self._request(sys_msg, user_prompt))
+        if key:
+            self.cache.put(key, text)
+        return text
+
+    async def _acomplete(self, client: ChatClient, sys_msg: str, user_prompt: str) -> str:
+        # 缓存读写是 SQLite + 文件 IO，放到线程里避免阻塞事件循环
+        key = self._cache_key(sys_msg, user_prompt)
+        if key:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached:
+                return cached
+
+        text = await client.acomplete(**self._request(sys_msg, user_prompt))
+        if key:
+            await asyncio.to_thread(self.cache.put, key, text)
+        return text
+
+    def _complete_stream(self, client: ChatClient, sys_msg: str, user_prompt: str) -> Iterator[str]:
+        """流式请求，逐段产出新增文本；出错时抛 RuntimeError。缓存命中时一次产出完整结果"""
+        key = self._cache_key(sys_msg, user_prompt)
+        if key:
+            cached = self.cache.get(key)
+            if cached:
+                yield cached
+                return
+
+        t0 = time.time()
+        first_token = 0.0
+        parts: list[str] = []
         try:
-            t0 = time.time()
-            response = client.chat.completions.create(
-                model="deepseek-chat",
-                messages=[
-                    {"role": "system", "content": sys_msg},
-                    {"role": "user", "content": user_prompt},
-                ],
-                max_tokens=2048,
-                temperature=0.3,
-            )
-            elapsed = time.time() - t0
-            summary_text = response.choices[0].message.content or ""
-            log_success(f"Summary generated in {elapsed:.1f}s")
-
-            return SummaryResult(
-                text=summary_text,
-                model="deepseek-chat",
-                summarize_time=elapsed,
-            )
+            for delta in client.stream(**self._request(sys_msg, user_prompt)):
+                if not first_token:
+                    first_token = time.time() - t0
+                    SUMMARY_FIRST_TOKEN_SECONDS.observe(first_token)
+                parts.append(delta)
+                yield delta
+        except Exception as e:
+            log_error(f"DeepSeek API error: {e}")
+            raise RuntimeError(f"DeepSeek API error: {e}")
+
+        log_success(f"Summary streamed in {time.time() - t0:.1f}s (first token {first_token:.1f}s)")
+        # 只缓存完整读完的流；调用方中途停止（取消）时不会走到这里
+        if key:
+            self.cache.put(key, "".join(parts))
+
+    async def _acomplete_stream(
+        self, client: ChatClient, sys_msg: str, user_prompt: str,
+    ) -> AsyncIterator[str]:
+        """_complete_stream 的异步版本"""
+        key = self._cache_key(sys_msg, user_prompt)
+        if key:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached:
+                yield cached
+                return
 
+        t0 = time.time()
+        first_token = 0.0
+        parts: list[str] = []
+        try:
+            async for delta in client.astream(**self._request(sys_msg, user_prompt)):
+                if not first_token:
+                    first_token = time.time() - t0
+                    SUMMARY_FIRST_TOKEN_SECONDS.observe(first_token)
+                parts.append(delta)
+                yield delta
         except Exception as e:
             log_error(f"DeepSeek API error: {e}")
-            return SummaryResult(text="", model="deepseek-chat")
+            raise RuntimeError(f"DeepSeek API error: {e}")
+
+        log_success(f"Summary streamed in {time.time() - t0:.1f}s (first token {first_token:.1f}s)")
+        if key:
+            await asyncio.to_thread(self.cache.put, key, "".join(parts))
+
+    def _client(self) -> ChatClient:
+        try:
+            import openai  # noqa: F401
+        except ImportError:
+            log_error("openai package not installed")
+            log_info("Install it: uv add openai")
+            raise RuntimeError("openai not installed")
+        return self.client
@@ -0,0 +1,80 @@
+"""播放列表 / 频道增量同步 - 记录已处理的视频 ID，重复运行只处理新条目"""
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from star_summary.config import Config
+from star_summary.models import PlaylistEntry, PlaylistInfo
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS synced (
+    source_id   TEXT PRIMARY KEY,
+    playlist_id TEXT NOT NULL,
+    title       TEXT NOT NULL,
+    synced_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_synced_playlist ON synced (playlist_id);
+"""
+
+
+class SyncStore:
+    """
+    已处理条目记录（SQLite）。按来源 ID 记录，同一视频出现在多个列表中也只处理一次；
+    平铺提取拿不到 ID 的条目按链接记录。只在条目成功处理后标记，失败的条目下次同步会重试。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _key(entry: PlaylistEntry) -> str:
+        """记录键：来源 ID，没有 ID 时用条目链接"""
+        return entry.source_id or f"url:{entry.url}"
+
+    def pending(self, playlist: PlaylistInfo) -> list[PlaylistEntry]:
+        """返回列表中尚未处理的条目（保持列表顺序）"""
+        with self._connect() as conn:
+            done = {
+                row[0] for row in conn.execute("SELECT source_id FROM synced")
+            }
+        return [e for e in playlist.entries if self._key(e) not in done]
+
+    def mark(self, entry: PlaylistEntry, playlist_id: str) -> None:
+        """标记条目已处理；键与 pending 使用的一致（以列表中的条目为准）"""
+        if not entry.source_id and not entry.url:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO synced (source_id, playlist_id, title, synced_at) "
+                "VALUES (?, ?, ?, ?)",
+                (self._key(entry), playlist_id, entry.title, time.time()),
+            )
+
+    def count(self, playlist_id: str) -> int:
+        """该列表已同步的条目数"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM synced WHERE playlist_id = ?", (playlist_id,),
+            ).fetchone()[0]
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """短连接：成功时提交，结束时关闭"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+def get_sync_store(config: Config) -> SyncStore:
+    """同步记录与缓存放在同一目录，但不受 --no-cache 影响"""
+    return SyncStore(os.path.join(config.cache_dir, "sync.sqlite3"))
@@ -1,6 +1,7 @@
 """转录模块 - 根据引擎选择转录器"""
 
 from star_summary.transcriber.base import AbstractTranscriber
+from star_summary.transcriber.model_cache import get_model_cache
 from star_summary.transcriber.paraformer import ParaformerTranscriber
 from star_summary.transcriber.whisper_local import WhisperLocalTranscriber
 
@@ -9,13 +10,26 @@ def get_transcriber(engine: str = "paraformer", **kwargs) -> AbstractTranscriber
     """
     engine="paraformer" → ParaformerTranscriber（默认）
     engine="whisper"    → WhisperLocalTranscriber
+
+    parallel > 1 时长音频在静音处切成约 chunk_seconds 秒的块并行转录
+    （paraformer 为并发 API 调用，whisper 为多进程，每进程 whisper_threads 线程）。
     """
     if engine == "whisper":
         model_size = kwargs.get("model", "small")
-        return WhisperLocalTranscriber(model_size=model_size)
+        return WhisperLocalTranscriber(
+            model_size=model_size,
+            parallel=kwargs.get("parallel", 1),
+            chunk_seconds=kwargs.get("chunk_seconds", 300),
+            threads_per_worker=kwargs.get("whisper_threads", 0),
+        )
     elif engine == "paraformer":
         api_key = kwargs.get("api_key", "")
         asr_model = kwargs.get("asr_model", "fun-asr-realtime")
-        return ParaformerTranscriber(api_key=api_key, model=asr_model)
+        return ParaformerTranscriber(
+            api_key=api_key,
+            model=asr_model,
+            parallel=kwargs.get("parallel", 1),
+            chunk_seconds=kwargs.get("chunk_seconds", 300),
+        )
     else:
         raise ValueError(f"Unknown engine: {engine}. Use 'paraformer' or 'whisper'.")
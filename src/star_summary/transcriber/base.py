@@ -1,12 +1,67 @@
 """转录器抽象基类"""
 
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, BinaryIO, Callable, Generator
 
-from star_summary.models import TranscriptResult
+from star_summary.models import Segment, TranscriptResult
+from star_summary.utils import iterate_in_thread
+
+# 进度回调：每识别出一段调用一次，时间为音频内的绝对位置
+SegmentCallback = Callable[[Segment], None]
+
+# transcribe_iter 的返回类型：逐段产出 Segment，结束时返回完整的 TranscriptResult
+SegmentStream = Generator[Segment, None, TranscriptResult]
+
+
+def drain(stream: SegmentStream, on_segment: SegmentCallback | None = None) -> TranscriptResult:
+    """逐段驱动 transcribe_iter 并交给 on_segment，返回最终结果；回调抛出异常时关闭生成器中止识别"""
+    try:
+        while True:
+            try:
+                segment = next(stream)
+            except StopIteration as stop:
+                return stop.value
+            if on_segment is not None:
+                on_segment(segment)
+    finally:
+        stream.close()
 
 
 class AbstractTranscriber(ABC):
     @abstractmethod
-    def transcribe(self, audio_path: str, language: str | None = None) -> TranscriptResult:
-        """转录音频，返回 TranscriptResult"""
+    def transcribe(
+        self,
+        audio_path: str,
+        language: str | None = None,
+        on_segment: SegmentCallback | None = None,
+    ) -> TranscriptResult:
+        """转录音频，返回 TranscriptResult；on_segment 用于报告进度，回调抛出的异常会中止转录"""
         ...
+
+    def transcribe_iter(self, audio_path: str, language: str | None = None) -> SegmentStream:
+        """
+        边识别边产出 Segment，结束时返回（StopIteration.value）完整的 TranscriptResult，
+        可用 drain() 驱动。默认完整转录后逐条产出，子类可实现真正的增量输出。
+        """
+        result = self.transcribe(audio_path, language=language)
+        yield from result.segments
+        return result
+
+    def transcribe_pcm(
+        self,
+        pcm: BinaryIO,
+        language: str | None = None,
+        on_segment: SegmentCallback | None = None,
+    ) -> TranscriptResult:
+        """
+        管道模式：从 16kHz 单声道 s16le PCM 流边读边转录，音频不落盘。
+        引擎不支持时抛 NotImplementedError。
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support PCM streaming")
+
+    async def atranscribe_iter(
+        self, audio_path: str, language: str | None = None,
+    ) -> AsyncIterator[Segment]:
+        """transcribe_iter 的异步版本：识别在后台线程进行，不阻塞事件循环"""
+        async for segment in iterate_in_thread(self.transcribe_iter(audio_path, language)):
+            yield segment
@@ -0,0 +1,39 @@
+"""分块转录结果合并 - 时间偏移校正 + 块边界去重"""
+
+import re
+
+from star_summary.models import Segment
+
+_PUNCT = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def _normalize(text: str) -> str:
+    return _PUNCT.sub("", text).lower()
+
+
+def merge_chunk_segments(chunks: list[tuple[float, list[Segment]]]) -> list[Segment]:
+    """
+    合并各块的片段。chunks 为 [(块起始偏移秒, 块内片段), ...]，片段时间相对块起点。
+    相邻块在硬切点有重叠时，重叠区内文本相同或互相包含的片段只保留较完整的一条。
+    """
+    merged: list[Segment] = []
+    last_chunk = -1  # merged[-1] 来自第几块
+    for index, (offset, segments) in enumerate(sorted(chunks, key=lambda c: c[0])):
+        for seg in segments:
+            cur = Segment(start=seg.start + offset, end=seg.end + offset, text=seg.text)
+            # 只在块边界处去重，同一块内的片段原样保留
+            if merged and last_chunk < index and cur.start < merged[-1].end:
+                last = merged[-1]
+                a, b = _normalize(last.text), _normalize(cur.text)
+                if b and b in a:
+                    continue  # 重复（或被截断的重复），保留前一条
+                if a and a in b:
+                    # 前一块末尾的片段被截断，用后一块中完整的片段替换
+                    merged[-1] = Segment(start=last.start, end=cur.end, text=cur.text)
+                    last_chunk = index
+                    continue
+                if cur.end <= last.end:
+                    continue
+            merged.append(cur)
+            last_chunk = index
+    return merged
@@ -0,0 +1,174 @@
+"""进程级 WhisperModel 缓存 - 常驻已加载模型，按内存预算 LRU 淘汰"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from star_summary.utils import log_info, log_success
+
+# 各模型常驻内存估算（MB），与 README 模型表一致；未知模型按 1GB 估算
+_MODEL_MEMORY_MB: dict[str, int] = {
+    "tiny": 75,
+    "base": 150,
+    "small": 500,
+    "medium": 1500,
+    "large-v2": 3000,
+    "large-v3": 3000,
+}
+_UNKNOWN_MODEL_MB = 1000
+
+# 默认内存预算（MB），可用 STAR_SUMMARY_WHISPER_CACHE_MB 覆盖
+_DEFAULT_BUDGET_MB = 4096
+
+ModelKey = tuple[str, str, int]  # (model_size, compute_type, cpu_threads)
+
+
+@dataclass
+class ModelCacheStats:
+    """缓存计数器"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    load_time: float = 0.0        # 累计加载耗时（秒）
+    resident_mb: int = 0          # 当前常驻模型的估算内存
+    resident_models: int = 0
+
+
+@dataclass
+class _Loading:
+    """一个 key 的加载锁，及正在使用它的线程数（归零时删除，锁不会随 key 数量累积）"""
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    users: int = 0
+
+
+def _estimate_mb(model_size: str) -> int:
+    return _MODEL_MEMORY_MB.get(model_size, _UNKNOWN_MODEL_MB)
+
+
+def _budget_from_env() -> int:
+    raw = os.environ.get("STAR_SUMMARY_WHISPER_CACHE_MB", "").strip()
+    if raw.isdigit():
+        return int(raw)
+    return _DEFAULT_BUDGET_MB
+
+
+class WhisperModelCache:
+    """
+    按 (model_size, compute_type, cpu_threads) 缓存 WhisperModel。
+    超出内存预算时淘汰最久未使用的模型；至少保留最近加载的一个。
+    """
+
+    def __init__(self, budget_mb: int | None = None) -> None:
+        self.budget_mb = budget_mb if budget_mb is not None else _budget_from_env()
+        self._models: OrderedDict[ModelKey, Any] = OrderedDict()
+        self._sizes: dict[ModelKey, int] = {}
+        self._lock = threading.Lock()
+        # 同一个 key 只加载一次：并发请求等待同一把锁，而不是重复加载
+        self._loading: dict[ModelKey, _Loading] = {}
+        self._stats = ModelCacheStats()
+
+    def get(
+        self,
+        model_size: str,
+        compute_type: str = "int8",
+        cpu_threads: int = 0,
+    ) -> Any:
+        """返回已加载的 WhisperModel，未命中时加载并放入缓存"""
+        key: ModelKey = (model_size, compute_type, cpu_threads)
+
+        with self._lock:
+            model = self._touch(key)
+            if model is not None:
+                self._stats.hits += 1
+                return model
+            loading = self._loading.setdefault(key, _Loading())
+            loading.users += 1
+
+        try:
+            with loading.lock:
+                return self._load(key)
+        finally:
+            with self._lock:
+                loading.users -= 1
+                if loading.users == 0:
+                    del self._loading[key]
+
+    def _load(self, key: ModelKey) -> Any:
+        """持有该 key 的加载锁时调用：再查一次缓存，仍未命中则加载"""
+        model_size, compute_type, cpu_threads = key
+        # 等锁期间可能已被其他线程加载
+        with self._lock:
+            model = self._touch(key)
+            if model is not None:
+                self._stats.hits += 1
+                return model
+            self._stats.misses += 1
+
+        from faster_whisper import WhisperModel
+
+        log_info("Loading model (first run will download the model)...")
+        t0 = time.time()
+        model = WhisperModel(
+            model_size,
+            device="cpu",
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+        )
+        elapsed = time.time() - t0
+        log_success(f"Model loaded in {elapsed:.1f}s")
+
+        with self._lock:
+            self._stats.load_time += elapsed
+            self._models[key] = model
+            self._sizes[key] = _estimate_mb(model_size)
+            self._evict()
+        return model
+
+    def stats(self) -> ModelCacheStats:
+        """返回计数器快照"""
+        with self._lock:
+            return ModelCacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                load_time=self._stats.load_time,
+                resident_mb=sum(self._sizes.values()),
+                resident_models=len(self._models),
+            )
+
+    def clear(self) -> None:
+        """释放所有常驻模型"""
+        with self._lock:
+            self._models.clear()
+            self._sizes.clear()
+
+    def _touch(self, key: ModelKey) -> Any:
+        """命中则移到 LRU 队尾（调用方需持有 _lock）"""
+        model = self._models.get(key)
+        if model is not None:
+            self._models.move_to_end(key)
+        return model
+
+    def _evict(self) -> None:
+        """超出预算时从最久未使用的开始淘汰（调用方需持有 _lock）"""
+        while len(self._models) > 1 and sum(self._sizes.values()) > self.budget_mb:
+            key, _ = self._models.popitem(last=False)
+            size = self._sizes.pop(key, 0)
+            self._stats.evictions += 1
+            log_info(f"Evicted Whisper model {key[0]} ({size} MB) from cache")
+
+
+_cache: WhisperModelCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_model_cache() -> WhisperModelCache:
+    """进程级单例，bot / web 等长驻进程共享同一份缓存"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = WhisperModelCache()
+        return _cache
@@ -1,41 +1,247 @@
 """阿里云百炼 ASR 转录实现（dashscope SDK 同步调用）"""
 
 import os
+import queue
 import shutil
 import subprocess
 import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterator
 
+from star_summary.audio import (
+    is_normalized, normalize_audio, pcm_decode_cmd, require_ffmpeg, split_audio,
+)
+from star_summary.metrics import record_realtime_factor, timed_stage, track_stage
 from star_summary.models import Segment, TranscriptResult
-from star_summary.transcriber.base import AbstractTranscriber
-from star_summary.utils import log_step, log_info, log_success, log_error, log_warn
+from star_summary.transcriber.base import AbstractTranscriber, SegmentCallback, SegmentStream
+from star_summary.transcriber.merge import merge_chunk_segments
+from star_summary.utils import log_step, log_info, log_success, log_error, log_warn, with_log_context
 
-def _ensure_mono_16k_mp3(audio_path: str) -> str:
-    """用 ffmpeg 将音频转换为单声道 16kHz mp3，返回临时文件路径"""
-    if shutil.which("ffmpeg") is None:
-        log_error("ffmpeg not found, cannot convert audio format")
-        log_info("Install it: brew install ffmpeg")
-        raise RuntimeError("ffmpeg not installed")
-
-    tmp_path = os.path.join(tempfile.mkdtemp(prefix="starsummary_conv_"), "audio.mp3")
-    cmd = ["ffmpeg", "-i", audio_path, "-vn", "-ar", "16000", "-ac", "1", "-y", tmp_path]
-
-    try:
-        subprocess.run(cmd, capture_output=True, text=True, timeout=120, check=True)
-    except subprocess.CalledProcessError as e:
-        log_error(f"ffmpeg conversion failed: {e.stderr}")
-        raise RuntimeError("Audio format conversion failed")
-
-    log_info(f"Converted to mp3: {tmp_path}")
-    return tmp_path
+# 流式识别每次发送 100ms 的 16kHz 16bit 单声道 PCM
+_PCM_FRAME_BYTES = 3200
 
 
 class ParaformerTranscriber(AbstractTranscriber):
-    def __init__(self, api_key: str = "", model: str = "fun-asr-realtime") -> None:
+    def __init__(
+        self,
+        api_key: str = "",
+        model: str = "fun-asr-realtime",
+        parallel: int = 1,
+        chunk_seconds: float = 300,
+    ) -> None:
         self.api_key = api_key or os.environ.get("DASHSCOPE_API_KEY", "")
         self.model = model
+        # parallel > 1 时长音频在静音处切块，并发调用识别接口
+        self.parallel = max(1, parallel)
+        self.chunk_seconds = chunk_seconds
+
+    @timed_stage("transcribe")
+    def transcribe(
+        self,
+        audio_path: str,
+        language: str | None = None,
+        on_segment: SegmentCallback | None = None,
+    ) -> TranscriptResult:
+        self._check_ready()
+
+        log_step("🎙️", f"Transcribing with {self.model}...")
+        log_info(f"Audio: {audio_path}")
+
+        # 构建语言提示
+        language_hints = ["zh", "en"]
+        if language:
+            language_hints = [language]
+
+        work_dir = tempfile.mkdtemp(prefix="starsummary_conv_")
+        try:
+            t0 = time.time()
+            chunks = [(0.0, audio_path)]
+            if self.parallel > 1:
+                # 统一为 16kHz 单声道 wav（dashscope ASR 只支持单声道）；已归一化的输入直接使用
+                if not is_normalized(audio_path):
+                    log_info("Converting to mono 16kHz wav...")
+                    audio_path = normalize_audio(audio_path, os.path.join(work_dir, "audio.wav"))
+                chunks = split_audio(audio_path, self.chunk_seconds, work_dir)
+
+            if len(chunks) == 1:
+                # 回调式识别逐句返回，每识别完一句就报告，回调抛出的异常立即中止识别
+                segments = []
+                for segment in self._stream_file(audio_path, language):
+                    segments.append(segment)
+                    if on_segment is not None:
+                        on_segment(segment)
+            else:
+                segments = self._recognize_chunks(chunks, language_hints, on_segment)
+        finally:
+            # 清理转换的临时文件（含切块）
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        return self._build_result(segments, language, time.time() - t0)
+
+    def transcribe_iter(self, audio_path: str, language: str | None = None) -> SegmentStream:
+        """实时识别接口的回调模式：ffmpeg 解码出的 PCM 帧边送边识别，每识别完一句产出一句"""
+        if self.parallel > 1:
+            # 切块并发识别更快，按块报告
+            return (yield from super().transcribe_iter(audio_path, language))
+
+        self._check_ready()
+
+        log_step("🎙️", f"Transcribing with {self.model} (streaming)...")
+        log_info(f"Audio: {audio_path}")
+
+        with track_stage("transcribe"):
+            t0 = time.time()
+            segments = []
+            for segment in self._stream_file(audio_path, language):
+                segments.append(segment)
+                yield segment
+        return self._build_result(segments, language, time.time() - t0)
+
+    @timed_stage("transcribe")
+    def transcribe_pcm(
+        self,
+        pcm: BinaryIO,
+        language: str | None = None,
+        on_segment: SegmentCallback | None = None,
+    ) -> TranscriptResult:
+        """管道模式：PCM 帧边到达边送入回调式识别"""
+        self._check_ready()
+        log_step("🎙️", f"Transcribing with {self.model} (pipe)...")
+
+        t0 = time.time()
+        segments = []
+        for segment in self._stream_pcm(pcm, language):
+            segments.append(segment)
+            if on_segment is not None:
+                on_segment(segment)
+        return self._build_result(segments, language, time.time() - t0)
+
+    def _stream_file(self, audio_path: str, language: str | None) -> Iterator[Segment]:
+        """ffmpeg 把音频解码为 PCM 流送入回调式识别，按句产出 Segment"""
+        require_ffmpeg()
+        proc = subprocess.Popen(
+            pcm_decode_cmd(audio_path), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        try:
+            yield from self._stream_pcm(proc.stdout, language)
+        finally:
+            proc.kill()
+            proc.wait()
+
+    def _recognize_chunks(
+        self,
+        chunks: list[tuple[float, str]],
+        language_hints: list[str],
+        on_segment: SegmentCallback | None,
+    ) -> list[Segment]:
+        """并发识别各块，按块顺序报告进度，全部完成后在块边界去重合并"""
+        log_info(f"Transcribing {len(chunks)} chunks, {self.parallel} in parallel")
+        results = []
+        recognize = with_log_context(
+            lambda chunk: (chunk[0], self._recognize(chunk[1], language_hints)),
+        )
+        executor = ThreadPoolExecutor(max_workers=self.parallel)
+        try:
+            for offset, chunk_segments in executor.map(recognize, chunks):
+                results.append((offset, chunk_segments))
+                if on_segment is not None:
+                    for seg in chunk_segments:
+                        on_segment(Segment(start=seg.start + offset, end=seg.end + offset, text=seg.text))
+        except BaseException:
+            # 取消或某块失败：丢弃尚未开始的块，不等正在识别的块返回
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+        return merge_chunk_segments(results)
+
+    def _stream_pcm(self, pcm: BinaryIO, language: str | None) -> Iterator[Segment]:
+        """把 16kHz 单声道 s16le PCM 流送入回调式识别，按句产出 Segment（时间相对流起点）"""
+        from dashscope.audio.asr import Recognition, RecognitionCallback, RecognitionResult
+
+        events: queue.Queue = queue.Queue()
+        done = object()
+        stop = threading.Event()
+
+        class _Callback(RecognitionCallback):
+            def on_event(self, result: RecognitionResult) -> None:
+                sentence = result.get_sentence()
+                if isinstance(sentence, dict) and RecognitionResult.is_sentence_end(sentence):
+                    events.put(sentence)
+
+            def on_error(self, result) -> None:
+                msg = getattr(result, "message", "unknown error")
+                events.put(RuntimeError(f"ASR API error: {msg}"))
+
+            def on_complete(self) -> None:
+                events.put(done)
+
+        recognition = Recognition(
+            model=self.model,
+            format="pcm",
+            sample_rate=16000,
+            language_hints=[language] if language else ["zh", "en"],
+            callback=_Callback(),
+        )
 
-    def transcribe(self, audio_path: str, language: str | None = None) -> TranscriptResult:
+        def _feed() -> None:
+            try:
+                while not stop.is_set():
+                    frame = pcm.read(_PCM_FRAME_BYTES)
+                    if not frame:
+                        break
+                    recognition.send_audio_frame(frame)
+                recognition.stop()  # 阻塞到服务端返回全部结果
+            except Exception as e:
+                events.put(RuntimeError(f"ASR API call failed: {e}"))
+            finally:
+                events.put(done)
+
+        recognition.start()
+        feeder = threading.Thread(target=_feed, daemon=True)
+        feeder.start()
+
+        try:
+            while True:
+                item = events.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    log_error(str(item))
+                    raise item
+                text = item.get("text", "").strip()
+                if text:
+                    yield Segment(
+                        start=item.get("begin_time", 0) / 1000.0,  # ms → s
+                        end=item.get("end_time", 0) / 1000.0,
+                        text=text,
+                    )
+        finally:
+            stop.set()
+
+    def _build_result(
+        self, segments: list[Segment], language: str | None, elapsed: float,
+    ) -> TranscriptResult:
+        full_text = "\n".join(seg.text for seg in segments)
+        duration = segments[-1].end if segments else 0.0
+        record_realtime_factor(self.model, elapsed, duration)
+
+        log_success(f"Transcribed in {elapsed:.1f}s")
+        log_success(f"Segments: {len(segments)}, Characters: {len(full_text)}")
+
+        return TranscriptResult(
+            text=full_text,
+            segments=segments,
+            language=language or "zh",
+            language_confidence=1.0,
+            duration=duration,
+            transcribe_time=elapsed,
+            engine=self.model,
+        )
+
+    def _check_ready(self) -> None:
+        """检查 API Key 和 dashscope SDK"""
         if not self.api_key:
             log_error("DASHSCOPE_API_KEY not set")
             log_info("Set the environment variable: export DASHSCOPE_API_KEY='your-key'")
@@ -43,8 +249,7 @@ class ParaformerTranscriber(AbstractTranscriber):
             raise RuntimeError("DASHSCOPE_API_KEY not configured")
 
         try:
-            from dashscope.audio.asr import Recognition
-            from http import HTTPStatus
+            import dashscope  # noqa: F401
         except ImportError:
             log_error("dashscope package not installed")
             log_info("Install it: uv add dashscope")
@@ -53,44 +258,25 @@ class ParaformerTranscriber(AbstractTranscriber):
         # dashscope SDK 自动读取 DASHSCOPE_API_KEY 环境变量
         os.environ["DASHSCOPE_API_KEY"] = self.api_key
 
-        log_step("🎙️", f"Transcribing with {self.model}...")
-        log_info(f"Audio: {audio_path}")
-
-        # 统一转换为单声道 16kHz mp3（dashscope ASR 只支持单声道）
-        log_info("Converting to mono 16kHz mp3...")
-        converted_path = _ensure_mono_16k_mp3(audio_path)
-        audio_path = converted_path
-
-        # 构建语言提示
-        language_hints = ["zh", "en"]
-        if language:
-            language_hints = [language]
+    def _recognize(self, audio_path: str, language_hints: list[str]) -> list[Segment]:
+        """对单个 16kHz 单声道 wav 调用一次识别，返回片段（时间相对该文件起点）"""
+        from dashscope.audio.asr import Recognition
+        from http import HTTPStatus
 
         recognition = Recognition(
             model=self.model,
-            format="mp3",
+            format="wav",
             sample_rate=16000,
             language_hints=language_hints,
             callback=None,
         )
 
-        t0 = time.time()
-
         try:
             result = recognition.call(audio_path)
         except Exception as e:
             log_error(f"ASR API error: {e}")
             log_info("Check your network connection or try: starsummary <input> --engine whisper")
             raise RuntimeError(f"ASR API call failed: {e}")
-        finally:
-            # 清理转换的临时文件
-            try:
-                os.remove(converted_path)
-                os.rmdir(os.path.dirname(converted_path))
-            except OSError:
-                pass
-
-        elapsed = time.time() - t0
 
         if result.status_code != HTTPStatus.OK:
             msg = getattr(result, "message", "unknown error")
@@ -98,10 +284,9 @@ class ParaformerTranscriber(AbstractTranscriber):
             log_info(f"Message: {msg}")
             raise RuntimeError(f"ASR API error: {result.status_code} - {msg}")
 
-        # 解析 sentences → 统一的 TranscriptResult
+        # 解析 sentences → Segment
         sentences = result.get_sentence() or []
         segments: list[Segment] = []
-        text_parts: list[str] = []
 
         for s in sentences:
             text = s.get("text", "").strip()
@@ -110,20 +295,5 @@ class ParaformerTranscriber(AbstractTranscriber):
             begin = s.get("begin_time", 0) / 1000.0  # ms → s
             end = s.get("end_time", 0) / 1000.0
             segments.append(Segment(start=begin, end=end, text=text))
-            text_parts.append(text)
-
-        full_text = "\n".join(text_parts)
-        detected_lang = language or "zh"
 
-        log_success(f"Transcribed in {elapsed:.1f}s")
-        log_success(f"Segments: {len(segments)}, Characters: {len(full_text)}")
-
-        return TranscriptResult(
-            text=full_text,
-            segments=segments,
-            language=detected_lang,
-            language_confidence=1.0,
-            duration=segments[-1].end if segments else 0.0,
-            transcribe_time=elapsed,
-            engine=self.model,
-        )
+        return segments
@@ -1,44 +1,214 @@
 """本地 faster-whisper 转录实现"""
 
 import os
+import queue
+import threading
 import time
+from typing import Any, BinaryIO, Iterator
 
+from star_summary.metrics import record_realtime_factor, timed_stage, track_stage
 from star_summary.models import Segment, TranscriptResult
-from star_summary.transcriber.base import AbstractTranscriber
+from star_summary.transcriber.base import AbstractTranscriber, SegmentCallback, SegmentStream
+from star_summary.transcriber.model_cache import get_model_cache
 from star_summary.utils import log_step, log_info, log_success, log_warn
 
 
-class WhisperLocalTranscriber(AbstractTranscriber):
-    def __init__(self, model_size: str = "small") -> None:
-        self.model_size = model_size
+_SAMPLE_RATE = 16000
+_READ_BYTES = 64 * 1024
+_FRAME = _SAMPLE_RATE // 10  # 找切点时按 100ms 计算能量
+
+
+def _pcm_windows(pcm: BinaryIO, window_seconds: float) -> Iterator[tuple[float, Any]]:
+    """
+    把 s16le PCM 流切成约 window_seconds 秒的 float32 数组，产出 (起始偏移秒, 数组)。
+    读取在后台线程进行，识别时上游管道继续流动；读取队列最多缓存约两个窗口的数据，
+    识别跟不上时读取线程阻塞，由管道把压力传回 ffmpeg / yt-dlp，内存不会无限增长。
+    切点选在目标长度 ±20% 内能量最低的 100ms。
+    """
+    import numpy as np
 
-    def transcribe(self, audio_path: str, language: str | None = None) -> TranscriptResult:
+    window_bytes = int(window_seconds * _SAMPLE_RATE) * 2
+    chunks: queue.Queue = queue.Queue(maxsize=max(4, 2 * window_bytes // _READ_BYTES))
+    stopped = threading.Event()
+
+    def _put(item: bytes | None) -> bool:
+        # 消费方提前退出后不再阻塞，让读取线程结束
+        while not stopped.is_set():
+            try:
+                chunks.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read() -> None:
         try:
-            from faster_whisper import WhisperModel
-        except ImportError:
-            from star_summary.utils import log_error
-            log_error("faster-whisper package not installed")
-            log_info("Install it: uv add faster-whisper")
-            raise RuntimeError("faster-whisper not installed")
+            while data := pcm.read(_READ_BYTES):
+                if not _put(data):
+                    return
+        finally:
+            _put(None)
+
+    threading.Thread(target=_read, daemon=True).start()
+    try:
+        target = int(window_seconds * _SAMPLE_RATE)
+        low, high = int(target * 0.8), int(target * 1.2)
+        parts: list = []  # 尚未切出的 float32 片段，攒够再拼接
+        buffered = 0
+        pending = b""
+        offset = 0
+        while (data := chunks.get()) is not None:
+            pending += data
+            usable = len(pending) - len(pending) % 2
+            parts.append(np.frombuffer(pending[:usable], dtype=np.int16).astype(np.float32) / 32768.0)
+            buffered += usable // 2
+            pending = pending[usable:]
+            if buffered < high:
+                continue
+
+            buffer = np.concatenate(parts)
+            while len(buffer) >= high:
+                region = buffer[low:high]
+                frames = len(region) // _FRAME
+                energy = (region[:frames * _FRAME].reshape(frames, _FRAME) ** 2).mean(axis=1)
+                cut = low + int(energy.argmin()) * _FRAME + _FRAME // 2
+                yield offset / _SAMPLE_RATE, buffer[:cut]
+                offset += cut
+                buffer = buffer[cut:]
+            parts, buffered = [buffer], len(buffer)
+
+        if buffered:
+            yield offset / _SAMPLE_RATE, np.concatenate(parts)
+    finally:
+        stopped.set()
+
 
+class WhisperLocalTranscriber(AbstractTranscriber):
+    def __init__(
+        self,
+        model_size: str = "small",
+        parallel: int = 1,
+        chunk_seconds: float = 300,
+        threads_per_worker: int = 0,
+    ) -> None:
+        self.model_size = model_size
+        # parallel > 1 时长音频按 VAD 切块，分发到 parallel 个预加载模型的进程
+        self.parallel = max(1, parallel)
+        self.chunk_seconds = chunk_seconds
+        self.threads_per_worker = threads_per_worker
+
+    @timed_stage("transcribe")
+    def transcribe(
+        self,
+        audio_path: str,
+        language: str | None = None,
+        on_segment: SegmentCallback | None = None,
+    ) -> TranscriptResult:
+        self._require_faster_whisper()
         log_step("🎙️", f"Transcribing with Whisper ({self.model_size})...")
-        log_info("Loading model (first run will download the model)...")
 
+        if self.parallel > 1:
+            result = self._transcribe_parallel(audio_path, language)
+            if result is not None:
+                if on_segment is not None:
+                    # 分块结果在工作进程中产生，全部完成后一次性报告
+                    for segment in result.segments:
+                        on_segment(segment)
+                return result
+
+        t0 = time.time()
+        raw_segments, info = self._decode(audio_path, language)
+        segments = []
+        for segment in raw_segments:
+            segments.append(segment)
+            if on_segment is not None:
+                on_segment(segment)
+
+        elapsed = time.time() - t0
+        return self._build_result(
+            segments, info.language, info.language_probability, info.duration, elapsed,
+        )
+
+    def transcribe_iter(self, audio_path: str, language: str | None = None) -> SegmentStream:
+        """单进程模式下 faster-whisper 本身是惰性解码的，每解出一段就产出一段"""
+        if self.parallel > 1:
+            return (yield from super().transcribe_iter(audio_path, language))
+
+        self._require_faster_whisper()
+        log_step("🎙️", f"Transcribing with Whisper ({self.model_size}, streaming)...")
+
+        with track_stage("transcribe"):
+            t0 = time.time()
+            raw_segments, info = self._decode(audio_path, language)
+            segments = []
+            for segment in raw_segments:
+                segments.append(segment)
+                yield segment
+            elapsed = time.time() - t0
+        return self._build_result(
+            segments, info.language, info.language_probability, info.duration, elapsed,
+        )
+
+    @timed_stage("transcribe")
+    def transcribe_pcm(
+        self,
+        pcm: BinaryIO,
+        language: str | None = None,
+        on_segment: SegmentCallback | None = None,
+    ) -> TranscriptResult:
+        """
+        管道模式：后台线程持续读取 PCM，主线程每攒够约 chunk_seconds 秒就在最安静处切出一段
+        送入模型，下载、解码和识别同时进行。语言由第一段检测后沿用。
+        """
+        self._require_faster_whisper()
+        log_step("🎙️", f"Transcribing with Whisper ({self.model_size}, pipe)...")
+
+        t0 = time.time()
+        model = self._load_model()
+        segments: list[Segment] = []
+        confidence = 1.0
+        duration = 0.0
+        for offset, window in _pcm_windows(pcm, self.chunk_seconds):
+            raw_segments, info = model.transcribe(
+                window,
+                language=language,
+                beam_size=5,
+                vad_filter=True,
+                vad_parameters=dict(min_silence_duration_ms=500),
+            )
+            if language is None:
+                language, confidence = info.language, info.language_probability
+            for seg in raw_segments:
+                text = seg.text.strip()
+                if text:
+                    segments.append(Segment(start=seg.start + offset, end=seg.end + offset, text=text))
+                    if on_segment is not None:
+                        on_segment(segments[-1])
+            duration = offset + len(window) / _SAMPLE_RATE
+            log_info(f"Transcribed up to {duration:.0f}s")
+
+        elapsed = time.time() - t0
+        return self._build_result(segments, language or "", confidence, duration, elapsed)
+
+    def _load_model(self) -> Any:
+        """取进程内常驻的（缓存的）模型"""
         # CPU 线程数限制为总核心数的一半（避免过热）
         cpu_count = os.cpu_count() or 4
         cpu_threads = max(1, cpu_count // 2)
         log_info(f"Using {cpu_threads}/{cpu_count} CPU threads")
 
-        model = WhisperModel(
+        # 模型在进程内常驻复用，重复转录无需重新加载
+        return get_model_cache().get(
             self.model_size,
-            device="cpu",
             compute_type="int8",
             cpu_threads=cpu_threads,
         )
 
-        log_info("Transcribing... (this may take a moment)")
-        t0 = time.time()
+    def _decode(self, audio_path: str, language: str | None) -> tuple[Iterator[Segment], Any]:
+        """加载（缓存的）模型并启动解码，返回 (惰性 Segment 迭代器, faster-whisper 的 info)"""
+        model = self._load_model()
 
+        log_info("Transcribing... (this may take a moment)")
         raw_segments, info = model.transcribe(
             audio_path,
             language=language,
@@ -47,35 +217,79 @@ class WhisperLocalTranscriber(AbstractTranscriber):
             vad_parameters=dict(min_silence_duration_ms=500),
         )
 
-        segments: list[Segment] = []
-        text_parts: list[str] = []
-        for seg in raw_segments:
-            text = seg.text.strip()
-            if text:
-                segments.append(Segment(start=seg.start, end=seg.end, text=text))
-                text_parts.append(text)
+        def _segments() -> Iterator[Segment]:
+            for seg in raw_segments:
+                text = seg.text.strip()
+                if text:
+                    yield Segment(start=seg.start, end=seg.end, text=text)
+
+        return _segments(), info
+
+    @staticmethod
+    def _require_faster_whisper() -> None:
+        try:
+            import faster_whisper  # noqa: F401
+        except ImportError:
+            from star_summary.utils import log_error
+            log_error("faster-whisper package not installed")
+            log_info("Install it: uv add faster-whisper")
+            raise RuntimeError("faster-whisper not installed")
+
+    def _transcribe_parallel(self, audio_path: str, language: str | None) -> TranscriptResult | None:
+        """多进程分块转录；音频太短不值得切块时返回 None，由调用方走单进程"""
+        from faster_whisper.audio import decode_audio
+
+        from star_summary.transcriber.whisper_parallel import (
+            SAMPLE_RATE, plan_vad_chunks, transcribe_chunks,
+        )
 
+        t0 = time.time()
+        audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+        plan = plan_vad_chunks(audio, self.chunk_seconds)
+        if len(plan) == 1:
+            return None
+
+        cpu_count = os.cpu_count() or 4
+        workers = min(self.parallel, len(plan))
+        threads = self.threads_per_worker or max(1, cpu_count // workers)
+        log_info(f"Split into {len(plan)} chunks at VAD gaps, "
+                 f"{workers} processes × {threads} threads")
+
+        segments, detected, confidence = transcribe_chunks(
+            audio, plan, self.model_size, language, workers, threads,
+        )
         elapsed = time.time() - t0
-        full_text = "\n".join(text_parts)
+        return self._build_result(segments, detected, confidence, len(audio) / SAMPLE_RATE, elapsed)
+
+    def _build_result(
+        self,
+        segments: list[Segment],
+        language: str,
+        language_probability: float,
+        duration: float,
+        elapsed: float,
+    ) -> TranscriptResult:
+        full_text = "\n".join(seg.text for seg in segments)
+        record_realtime_factor("whisper", elapsed, duration)
 
         log_success(
-            f"Language: {info.language} "
-            f"({info.language_probability:.0%} confidence)"
+            f"Language: {language} "
+            f"({language_probability:.0%} confidence)"
         )
-        if info.duration > 0:
+        if duration > 0:
             log_success(
-                f"Duration: {info.duration:.0f}s → "
+                f"Duration: {duration:.0f}s → "
                 f"Transcribed in {elapsed:.1f}s "
-                f"({info.duration / elapsed:.1f}x realtime)"
+                f"({duration / elapsed:.1f}x realtime)"
             )
         log_success(f"Segments: {len(segments)}, Characters: {len(full_text)}")
 
         return TranscriptResult(
             text=full_text,
             segments=segments,
-            language=info.language,
-            language_confidence=info.language_probability,
-            duration=info.duration,
+            language=language,
+            language_confidence=language_probability,
+            duration=duration,
             transcribe_time=elapsed,
             engine="whisper",
         )
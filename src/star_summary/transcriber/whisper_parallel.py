@@ -0,0 +1,143 @@
+"""多进程 faster-whisper 转录 - VAD 切块后分发到预加载模型的进程池"""
+
+import multiprocessing
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from star_summary.audio import plan_chunks
+from star_summary.models import Segment
+from star_summary.transcriber.merge import merge_chunk_segments
+from star_summary.utils import log_info, log_success
+
+SAMPLE_RATE = 16000
+
+PoolKey = tuple[str, str, int, int]  # (model_size, compute_type, cpu_threads, workers)
+
+# ── 工作进程侧 ──
+
+_worker_model = None
+
+
+def _init_worker(model_size: str, compute_type: str, cpu_threads: int) -> None:
+    """进程池 initializer：每个工作进程启动时加载一次模型"""
+    global _worker_model
+    from faster_whisper import WhisperModel
+
+    _worker_model = WhisperModel(
+        model_size,
+        device="cpu",
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+    )
+
+
+def _transcribe_chunk(audio, language: str | None) -> tuple[list[Segment], str, float]:
+    """转录一块 16kHz float32 音频，返回 (片段, 语言, 语言置信度)"""
+    raw_segments, info = _worker_model.transcribe(
+        audio,
+        language=language,
+        beam_size=5,
+        vad_filter=True,
+        vad_parameters=dict(min_silence_duration_ms=500),
+    )
+    segments = [
+        Segment(start=seg.start, end=seg.end, text=seg.text.strip())
+        for seg in raw_segments
+        if seg.text.strip()
+    ]
+    return segments, info.language, info.language_probability
+
+
+# ── 主进程侧 ──
+
+_pool: ProcessPoolExecutor | None = None
+_pool_key: PoolKey | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(key: PoolKey) -> ProcessPoolExecutor:
+    """
+    进程池常驻复用，工作进程里的模型保持加载状态；参数变化时重建。
+    使用 spawn 启动，避免 fork 继承 CTranslate2 线程状态。
+    """
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None and _pool_key == key:
+            return _pool
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+
+        model_size, compute_type, cpu_threads, workers = key
+        log_info(f"Starting {workers} Whisper worker processes ({cpu_threads} threads each)...")
+        _pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_size, compute_type, cpu_threads),
+        )
+        _pool_key = key
+        return _pool
+
+
+def plan_vad_chunks(audio, chunk_seconds: float) -> list[tuple[float, float]]:
+    """用 Silero VAD 找到语音间隙，在间隙处把音频切成约 chunk_seconds 的块"""
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    duration = len(audio) / SAMPLE_RATE
+    speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=500))
+    gaps = [
+        (prev["end"] / SAMPLE_RATE, cur["start"] / SAMPLE_RATE)
+        for prev, cur in zip(speech, speech[1:])
+    ]
+    return plan_chunks(duration, gaps, chunk_seconds)
+
+
+def transcribe_chunks(
+    audio,
+    plan: list[tuple[float, float]],
+    model_size: str,
+    language: str | None,
+    workers: int,
+    cpu_threads: int,
+    compute_type: str = "int8",
+) -> tuple[list[Segment], str, float]:
+    """
+    按 plan 把音频分发给进程池并行转录，返回 (合并后的片段, 语言, 置信度)。
+    未指定语言时各块独立检测，按时长加权投票；与多数不一致的块用多数语言重转。
+    """
+    pool = _get_pool((model_size, compute_type, cpu_threads, workers))
+
+    def _submit(start: float, end: float, lang: str | None):
+        chunk = audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+        return pool.submit(_transcribe_chunk, chunk, lang)
+
+    futures = [_submit(start, end, language) for start, end in plan]
+    results = [f.result() for f in futures]
+    log_success(f"Transcribed {len(plan)} chunks on {workers} processes")
+
+    if language is None:
+        votes: Counter[str] = Counter()
+        for (start, end), (_, lang, prob) in zip(plan, results):
+            votes[lang] += (end - start) * prob
+        language = votes.most_common(1)[0][0]
+
+        redo = [i for i, (_, lang, _) in enumerate(results) if lang != language]
+        if redo:
+            log_info(f"Re-transcribing {len(redo)} chunks with agreed language: {language}")
+            redo_futures = {i: _submit(*plan[i], language) for i in redo}
+            for i, future in redo_futures.items():
+                results[i] = future.result()
+
+    matched = [
+        (end - start, prob)
+        for (start, end), (_, lang, prob) in zip(plan, results)
+        if lang == language
+    ]
+    total = sum(weight for weight, _ in matched)
+    confidence = sum(weight * prob for weight, prob in matched) / total if total else 0.0
+
+    segments = merge_chunk_segments(
+        [(start, segs) for (start, _), (segs, _, _) in zip(plan, results)]
+    )
+    return segments, language, confidence
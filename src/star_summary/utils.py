@@ -1,4 +1,20 @@
-"""工具函数 - 日志美化、时间格式化"""
+"""工具函数 - 日志（结构化、分级、队列异步输出）、时间格式化、同步迭代器转异步"""
+
+import asyncio
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import AsyncIterator, Callable, Iterator, TypeVar
+
+T = TypeVar("T")
 
 
 class _Colors:
@@ -14,29 +30,246 @@ class _Colors:
 _C = _Colors
 
 
+# ── 日志 ──
+#
+# log_* 写入名为 star_summary 的 logger，输出格式由 STAR_SUMMARY_LOG_FORMAT 决定：
+#   pretty  终端彩色渲染（交互式 CLI），同步输出，与提示、预览保持先后顺序
+#   plain   带时间和级别的单行文本
+#   json    每行一个 JSON 对象，便于 journald / 日志平台按字段检索
+#   auto    （默认）systemd 服务中为 json，终端中为 pretty，其余为 plain
+# plain / json 经队列交给后台线程写出，调用方不阻塞在终端或日志管道上；
+# 直接 print 到 stdout 之前调用 flush_logs()，等已排队的日志写完再输出。
+# STAR_SUMMARY_LOG_LEVEL 控制级别（DEBUG / INFO / WARNING / ERROR，默认 INFO）。
+
+_logger = logging.getLogger("star_summary")
+
+# 当前协程 / 线程的关联字段（job_id、user_id 等），随每条日志输出
+_log_context: contextvars.ContextVar[dict[str, object]] = contextvars.ContextVar(
+    "star_summary_log_context", default={},
+)
+
+# 可重入：_log 持锁检查 _configured 后调用 setup_logging
+_setup_lock = threading.RLock()
+_configured = False
+_listener: QueueListener | None = None
+
+# 样式 → (颜色, 前缀)，前缀 None 表示 step 样式（空行 + emoji 标题）
+_STYLES = {
+    "step": (_C.CYAN + _C.BOLD, None),
+    "info": (_C.DIM, ""),
+    "success": (_C.GREEN, "✓ "),
+    "warn": (_C.YELLOW, "⚠ "),
+    "error": (_C.RED, "✗ "),
+}
+_LEVEL_STYLES = {
+    logging.DEBUG: "info", logging.INFO: "info", logging.WARNING: "warn",
+    logging.ERROR: "error", logging.CRITICAL: "error",
+}
+
+
+class _ContextFilter(logging.Filter):
+    """在调用方线程里把关联字段拷进日志记录（之后可能经队列在别的线程格式化）"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.context = _log_context.get()
+        return True
+
+
+def _stdout_color() -> bool:
+    return sys.stdout.isatty() and not os.environ.get("NO_COLOR")
+
+
+class _PrettyFormatter(logging.Formatter):
+    """color 为 None 时每条按当前 sys.stdout 是否为终端决定（守护进程按调用方终端渲染）"""
+
+    def __init__(self, color: bool | None = None) -> None:
+        super().__init__()
+        self.color = color
+
+    def format(self, record: logging.LogRecord) -> str:
+        style = getattr(record, "style", "") or _LEVEL_STYLES.get(record.levelno, "info")
+        color, prefix = _STYLES[style]
+        use_color = self.color if self.color is not None else _stdout_color()
+        reset = _C.RESET if use_color else ""
+        color = color if use_color else ""
+        context = getattr(record, "context", {})
+        suffix = ""
+        if context:
+            fields = " ".join(f"{k}={v}" for k, v in context.items())
+            suffix = f"  {_C.DIM}[{fields}]{_C.RESET}" if use_color else f"  [{fields}]"
+        msg = record.getMessage()
+        if prefix is None:
+            return f"\n{color}{getattr(record, 'emoji', '')}  {msg}{reset}{suffix}"
+        return f"   {color}{prefix}{msg}{reset}{suffix}"
+
+
+class _PlainFormatter(logging.Formatter):
+    def __init__(self) -> None:
+        super().__init__("%(asctime)s %(levelname)-7s %(message)s", "%Y-%m-%d %H:%M:%S")
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        context = getattr(record, "context", {})
+        if not context:
+            return line
+        return line + "  [" + " ".join(f"{k}={v}" for k, v in context.items()) + "]"
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, object] = {
+            "ts": datetime.fromtimestamp(record.created).astimezone().isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "event": getattr(record, "style", "") or _LEVEL_STYLES.get(record.levelno, "info"),
+            "msg": record.getMessage(),
+            "logger": record.name,
+        }
+        entry.update(getattr(record, "context", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """每次输出时取当前的 sys.stdout，redirect_stdout 等替换照常生效"""
+
+    def __init__(self) -> None:
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):  # type: ignore[override]
+        return sys.stdout
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()  # 写完队列中剩余的日志
+        _listener = None
+
+
+def setup_logging(level: str | None = None, fmt: str | None = None) -> None:
+    """
+    配置 star_summary logger；参数为空时读取 STAR_SUMMARY_LOG_LEVEL / STAR_SUMMARY_LOG_FORMAT。
+    首次调用 log_* 时会自动以环境变量配置，入口只在需要覆盖时显式调用。
+    """
+    global _configured, _listener
+
+    level_name = (level or os.environ.get("STAR_SUMMARY_LOG_LEVEL", "") or "INFO").strip().upper()
+    fmt = (fmt or os.environ.get("STAR_SUMMARY_LOG_FORMAT", "") or "auto").strip().lower()
+    if fmt == "auto":
+        if os.environ.get("JOURNAL_STREAM"):
+            fmt = "json"
+        elif sys.stdout.isatty():
+            fmt = "pretty"
+        else:
+            fmt = "plain"
+
+    with _setup_lock:
+        _stop_listener()
+        for handler in list(_logger.handlers):
+            _logger.removeHandler(handler)
+        if not any(isinstance(f, _ContextFilter) for f in _logger.filters):
+            _logger.addFilter(_ContextFilter())
+
+        handler = _StdoutHandler()
+        if fmt == "json":
+            handler.setFormatter(_JsonFormatter())
+        elif fmt == "plain":
+            handler.setFormatter(_PlainFormatter())
+        else:
+            handler.setFormatter(_PrettyFormatter())
+
+        if fmt == "pretty":
+            _logger.addHandler(handler)
+        else:
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            _listener = QueueListener(log_queue, handler)
+            _listener.start()
+            _logger.addHandler(QueueHandler(log_queue))
+
+        _logger.setLevel(logging.getLevelNamesMapping().get(level_name, logging.INFO))
+        _logger.propagate = False
+        _configured = True
+
+
+def flush_logs() -> None:
+    """等后台线程写完已排队的日志（pretty 格式同步输出，无需等待）"""
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener.start()
+
+
+def _reset_after_fork() -> None:
+    """fork 出的子进程没有队列的后台线程，首次写日志时重新配置"""
+    global _configured, _listener, _setup_lock
+    _setup_lock = threading.RLock()  # fork 时可能正被其他线程持有
+    _configured = False
+    _listener = None
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+
+
+atexit.register(_stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _log(level: int, style: str, msg: str, emoji: str = "") -> None:
+    if not _configured:
+        with _setup_lock:
+            if not _configured:  # 多个线程同时首次写日志时只配置一次
+                setup_logging()
+    if _logger.isEnabledFor(level):
+        _logger.log(level, msg, extra={"style": style, "emoji": emoji})
+
+
+@contextmanager
+def log_context(**fields: object) -> Iterator[None]:
+    """在当前协程 / 线程内为日志附加关联字段（如 job_id、user_id），退出时恢复；空值忽略"""
+    values = {k: v for k, v in fields.items() if v not in (None, "")}
+    token = _log_context.set({**_log_context.get(), **values})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def with_log_context(fn: Callable[..., T]) -> Callable[..., T]:
+    """线程池 / 新线程不继承 contextvars：包装后在提交时的日志上下文中执行"""
+    context = contextvars.copy_context()
+
+    def wrapper(*args, **kwargs) -> T:
+        # 每次调用用一份拷贝，同一个包装函数可在多个线程中并发执行
+        return context.copy().run(fn, *args, **kwargs)
+
+    return wrapper
+
+
 def log_step(emoji: str, msg: str) -> None:
     """步骤标题，cyan + bold"""
-    print(f"\n{_C.CYAN}{_C.BOLD}{emoji}  {msg}{_C.RESET}")
+    _log(logging.INFO, "step", msg, emoji)
 
 
 def log_info(msg: str) -> None:
     """详细信息，dim"""
-    print(f"   {_C.DIM}{msg}{_C.RESET}")
+    _log(logging.INFO, "info", msg)
 
 
 def log_success(msg: str) -> None:
     """成功，green"""
-    print(f"   {_C.GREEN}✓ {msg}{_C.RESET}")
+    _log(logging.INFO, "success", msg)
 
 
 def log_warn(msg: str) -> None:
     """警告，yellow"""
-    print(f"   {_C.YELLOW}⚠ {msg}{_C.RESET}")
+    _log(logging.WARNING, "warn", msg)
 
 
 def log_error(msg: str) -> None:
     """错误，red"""
-    print(f"   {_C.RED}✗ {msg}{_C.RESET}")
+    _log(logging.ERROR, "error", msg)
 
 
 def format_time(seconds: float) -> str:
@@ -47,3 +280,44 @@ def format_time(seconds: float) -> str:
     if h > 0:
         return f"{h:02d}:{m:02d}:{s:05.2f}"
     return f"{m:02d}:{s:05.2f}"
+
+
+_DONE = object()
+
+
+async def iterate_in_thread(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """在线程中驱动同步迭代器，通过 asyncio.Queue 把结果交回事件循环"""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def _put(item: object) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            pass  # 事件循环已关闭
+
+    def _worker() -> None:
+        try:
+            for item in iterator:
+                if stop.is_set():
+                    break
+                _put(item)
+        except BaseException as e:  # 异常交给调用方所在的协程抛出
+            _put(e)
+        finally:
+            _put(_DONE)
+
+    # 在调用方的上下文中驱动迭代器，日志关联字段随之带入后台线程
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(_worker,), daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
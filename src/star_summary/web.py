@@ -1,13 +1,40 @@
 """Gradio Web UI for StarSummary"""
 
 import os
+import queue
+import threading
 import time
-import traceback
+from typing import Generator, Iterator
 
 import gradio as gr
 
 from star_summary.config import Config
-from star_summary.utils import format_time
+from star_summary.jobs import (
+    CANCELLED, DOWNLOADING, DONE, FAILED, QUEUED, SUMMARIZING, TRANSCRIBING,
+    Job, JobCancelled, JobStore, advance_job, cancel_job, get_job_store,
+)
+from star_summary.metrics import JOBS_RUNNING, start_metrics_server
+from star_summary.models import SummaryResult
+from star_summary.utils import format_time, log_error, log_info
+
+# 流式总结时刷新界面的最小间隔（秒）
+_STREAM_REFRESH_INTERVAL = 0.2
+
+# 下载 / 转录阶段在后台线程执行，页面按此间隔刷新进度（也是响应取消的最大延迟）
+_POLL_INTERVAL = 0.5
+
+# 已送达任务的保留天数，之后连同转录 / 总结一起清理
+_JOB_RETENTION_DAYS = 7
+
+# 由 advance_job 推进的阶段及其提示（总结阶段在页面中流式进行）
+_STAGE_TEXT = {
+    QUEUED: "⏳ 排队中...",
+    DOWNLOADING: "⏳ 正在下载音频...",
+    TRANSCRIBING: "🎙️ 正在转录...",
+}
+
+# 取消时任务已处于终态的提示
+_FINISHED_TEXT = {DONE: "已完成", FAILED: "已失败", CANCELLED: "已取消"}
 
 
 def _run_pipeline(
@@ -15,58 +42,104 @@ def _run_pipeline(
     engine: str,
     language: str,
     summarize: bool,
-) -> tuple[str, str, str]:
+    progress: gr.Progress = gr.Progress(),
+) -> Iterator[tuple[str, str, str, str]]:
     """
-    执行完整流水线，返回 (转录文本, 总结文本, 状态信息)。
-    复用现有的 downloader / transcriber / summarizer 模块。
+    提交任务并执行完整流水线，逐步产出 (转录文本, 总结文本, 状态信息, 任务 ID)：
+    下载和转录进度通过 gr.Progress 报告，转录完成后先展示转录，总结边生成边刷新。
+    任务和中间产物持久化在 JobStore 中，页面关闭或服务重启后可按任务 ID 取回结果。
     """
     if not source.strip():
-        return "", "", "请输入视频链接或文件路径"
+        yield "", "", "请输入视频链接或文件路径", ""
+        return
 
-    config = Config(
-        input=source.strip(),
-        engine=engine,
-        language=language if language != "auto" else None,
-        summarize=summarize,
+    store = get_job_store(Config())
+    job = store.create(
+        "url", source.strip(), "web",
+        engine=engine, language=language, summarize=summarize,
     )
+    _claim(job.id)
+    try:
+        yield from _follow_job(store, job, progress)
+    finally:
+        _release(job.id)
 
-    status_parts: list[str] = []
-
-    # ── Step 1: 下载/获取音频 ──
-    from star_summary.downloader import get_downloader
 
-    downloader = get_downloader(config.input)
+def _lookup_job(
+    job_id: str,
+    progress: gr.Progress = gr.Progress(),
+) -> Iterator[tuple[str, str, str, str]]:
+    """按任务 ID 取回结果；未完成且无人处理的任务（如页面中途关闭）在此继续"""
+    job_id = job_id.strip()
+    store = get_job_store(Config())
+    job = store.get(job_id) if job_id else None
+    if job is None or job.owner != "web":
+        yield "", "", "未找到该任务（结果保留 7 天）", job_id
+        return
+    if job.state == CANCELLED:
+        yield "", "", f"任务 ID: {job.id}\n任务已取消", job.id
+        return
+    if not _claim(job.id):
+        status = f"任务 ID: {job.id}\n{_STAGE_TEXT.get(job.state, '⏳ 处理中...')}（稍后再查询）"
+        yield "", "", status, job.id
+        return
     try:
-        download_result = downloader.download(config.input)
-    except Exception as e:
-        return "", "", f"下载失败: {e}"
+        yield from _follow_job(store, job, progress)
+    finally:
+        _release(job.id)
 
-    title = download_result.title or config.input
-    status_parts.append(f"标题: {title}")
 
-    # ── Step 2: 转录 ──
-    from star_summary.transcriber import get_transcriber
+def _cancel_job(job_id: str) -> str:
+    """取消按钮：记录取消请求，正在执行的阶段在下一次进度回调时中止"""
+    job_id = job_id.strip()
+    if not job_id:
+        return "没有正在进行的任务"
+    with _active_lock:
+        running = job_id in _active_jobs
+        if running:
+            _cancel_requests.add(job_id)
+    store = get_job_store(Config())
+    job = store.get(job_id)
+    if job is None:
+        return "未找到该任务"
+    if not running:
+        if job.finished:
+            return f"任务 ID: {job_id}\n任务已结束（{_FINISHED_TEXT[job.state]}），无需取消"
+        # 没有线程在处理（如页面已关闭的任务），直接标记
+        cancel_job(store, job)
+    return f"任务 ID: {job_id}\n任务已取消"
 
-    transcriber = get_transcriber(
-        engine=config.engine,
-        model=config.whisper_model,
-        api_key=config.dashscope_api_key,
-    )
 
-    try:
-        transcript = transcriber.transcribe(
-            download_result.audio_path,
-            language=config.language,
-        )
-    except Exception as e:
-        return "", "", f"转录失败: {e}"
-    finally:
-        # 清理 yt-dlp 临时文件
-        import shutil
-        from star_summary.downloader.ytdlp import YtdlpDownloader
-        if isinstance(downloader, YtdlpDownloader):
-            shutil.rmtree(downloader.tmp_dir, ignore_errors=True)
+def _follow_job(
+    store: JobStore, job: Job, progress: gr.Progress,
+) -> Iterator[tuple[str, str, str, str]]:
+    """逐阶段推进任务直到完成，过程中产出界面状态；最后保存输出文件并标记为已送达"""
+    header = f"任务 ID: {job.id}"
+    while job.state in _STAGE_TEXT:
+        job = yield from _advance(store, job, progress)
+
+    if job.state == CANCELLED:
+        yield "", "", f"{header}\n任务已取消", job.id
+        return
+    if job.state == FAILED:
+        failed = "转录失败" if job.failed_stage == TRANSCRIBING else "下载失败"
+        if job.failed_stage == SUMMARIZING:
+            failed = "总结失败"
+        yield "", "", f"{header}\n{failed}: {job.error}", job.id
+        store.mark_delivered(job)
+        return
+
+    transcript = store.load_transcript(job)
+    if transcript is None:
+        # 转录检查点丢失：回到转录阶段重新处理
+        job = store.update(job, state=TRANSCRIBING)
+        yield from _follow_job(store, job, progress)
+        return
 
+    title = job.title or job.source
+    status_parts = [header, f"标题: {title}"]
+    if job.cached:
+        status_parts.append("转录: 命中缓存")
     status_parts.append(f"引擎: {transcript.engine}")
     status_parts.append(f"语言: {transcript.language}")
     if transcript.duration > 0:
@@ -75,36 +148,176 @@ def _run_pipeline(
     status_parts.append(f"片段数: {len(transcript.segments)}")
     status_parts.append(f"字符数: {len(transcript.text)}")
 
-    # ── Step 3: 可选总结 ──
-    summary_text = "未启用"
-    if config.summarize:
+    # ── 可选总结（流式），已完成的任务直接读取检查点 ──
+    summary = store.load_summary(job)
+    summary_text = summary.text if summary is not None else "未启用"
+    if job.state == SUMMARIZING and summary is None:
+        config = Config()
         if not config.deepseek_api_key:
             summary_text = "未配置 DEEPSEEK_API_KEY，跳过总结"
         else:
             from star_summary.summarizer import get_summarizer
 
-            summarizer = get_summarizer(api_key=config.deepseek_api_key)
+            yield transcript.text, "⏳ 正在生成总结...", "\n".join(status_parts), job.id
+
+            summarizer = get_summarizer(api_key=config.deepseek_api_key, config=config)
+            parts: list[str] = []
+            t0 = time.time()
+            last_yield = 0.0
             try:
-                summary_result = summarizer.summarize(transcript.text)
-                summary_text = summary_result.text or "总结为空"
-                status_parts.append(f"总结耗时: {summary_result.summarize_time:.1f}s")
+                for delta in summarizer.summarize_transcript_stream(
+                    transcript, system_prompt=job.system_prompt or None,
+                ):
+                    if _cancel_requested(job.id):
+                        yield transcript.text, "", f"{header}\n任务已取消", job.id
+                        cancel_job(store, job)
+                        return
+                    parts.append(delta)
+                    # 限制刷新频率，避免每个 token 都推送一次
+                    if time.time() - last_yield >= _STREAM_REFRESH_INTERVAL:
+                        last_yield = time.time()
+                        progress(None, desc=f"生成总结：{sum(map(len, parts))} 字")
+                        yield transcript.text, "".join(parts), "\n".join(status_parts), job.id
+                summary_text = "".join(parts) or "总结为空"
+                status_parts.append(f"总结耗时: {time.time() - t0:.1f}s")
+                if parts:
+                    summary = SummaryResult(
+                        text=summary_text,
+                        model=getattr(summarizer, "model", ""),
+                        summarize_time=time.time() - t0,
+                    )
+                    store.save_summary(job, summary)
+            except GeneratorExit:
+                # 页面点击取消时 Gradio 关闭生成器；只是断开连接的任务留待按 ID 取回
+                if _cancel_requested(job.id):
+                    cancel_job(store, job)
+                raise
             except Exception as e:
                 summary_text = f"总结失败: {e}"
+    if not job.finished:
+        job = store.update(job, state=DONE)
 
     # ── 保存文件 ──
     from star_summary.cli import _build_output_dir, _save_results
-    from star_summary.models import SummaryResult
 
     output_dir, file_prefix = _build_output_dir("./star_summary_output", title)
-    summary_obj = SummaryResult(text=summary_text) if config.summarize and summary_text not in ("未启用", "") else None
-    _save_results(transcript, summary_obj, output_dir, file_prefix, title)
+    _save_results(transcript, summary, output_dir, file_prefix, title)
     status_parts.append(f"文件保存: {os.path.abspath(output_dir)}/")
 
-    status = "\n".join(status_parts)
-    return transcript.text, summary_text, status
+    store.mark_delivered(job)
+    yield transcript.text, summary_text, "\n".join(status_parts), job.id
+
+
+def _advance(
+    store: JobStore, job: Job, progress: gr.Progress,
+) -> Generator[tuple[str, str, str, str], None, Job]:
+    """
+    在后台线程执行任务的当前阶段，返回新的 Job。进度事件经队列转回本线程交给 gr.Progress，
+    等待期间定期产出状态，让 Gradio 有机会响应取消。
+    """
+    events: queue.Queue = queue.Queue()
+
+    def _on_progress(fraction: float | None, desc: str) -> None:
+        if _cancel_requested(job.id):
+            raise JobCancelled()
+        events.put((fraction, desc))
+
+    def _run() -> None:
+        try:
+            result = advance_job(store.root, job.id, on_progress=_on_progress)
+            if _cancel_requested(job.id):
+                # 阶段在取消后正常结束（期间没有进度回调）
+                result = cancel_job(store, result)
+            events.put(result)
+        except BaseException as e:
+            # advance_job 之外的错误（如任务库不可用）也交回页面，否则页面会一直等待
+            events.put(e)
+        finally:
+            _release(job.id)
+
+    # 页面取消后生成器即被关闭，阶段线程自己持有任务直到结束，保证取消请求能被看到
+    _retain(job.id)
+    threading.Thread(target=_run, name=f"job-{job.id}", daemon=True).start()
 
+    status = f"任务 ID: {job.id}\n{_STAGE_TEXT[job.state]}"
+    progress(0, desc=_STAGE_TEXT[job.state])
+    while True:
+        try:
+            event = events.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            event = None
+        if isinstance(event, Job):
+            return event
+        if isinstance(event, BaseException):
+            log_error(f"Job {job.id} stage thread failed: {event}")
+            return store.update(
+                store.get(job.id) or job,
+                state=FAILED, error=str(event) or type(event).__name__,
+                failed_stage=DOWNLOADING if job.state == QUEUED else job.state,
+            )
+        if event is not None:
+            fraction, desc = event
+            progress(fraction, desc=desc)
+        yield "", "", status, job.id
 
-def _build_ui() -> gr.Blocks:
+
+# 本进程中正在推进的任务（引用计数：页面请求和它启动的阶段线程各持有一次），
+# 避免同一任务被页面请求和恢复线程同时处理；以及已请求取消的任务
+_active_jobs: dict[str, int] = {}
+_cancel_requests: set[str] = set()
+_active_lock = threading.Lock()
+
+
+def _claim(job_id: str) -> bool:
+    with _active_lock:
+        if job_id in _active_jobs:
+            return False
+        _active_jobs[job_id] = 1
+        return True
+
+
+def _retain(job_id: str) -> None:
+    with _active_lock:
+        _active_jobs[job_id] = _active_jobs.get(job_id, 0) + 1
+
+
+def _release(job_id: str) -> None:
+    with _active_lock:
+        _active_jobs[job_id] = _active_jobs.get(job_id, 1) - 1
+        if _active_jobs[job_id] <= 0:
+            del _active_jobs[job_id]
+            _cancel_requests.discard(job_id)
+
+
+def _cancel_requested(job_id: str) -> bool:
+    with _active_lock:
+        return job_id in _cancel_requests
+
+
+def _resume_jobs() -> None:
+    """启动时在后台继续上次未完成的任务；结果留在任务目录，等待用户按任务 ID 取回"""
+    store = get_job_store(Config())
+    purged = store.purge(_JOB_RETENTION_DAYS * 86400)
+    if purged:
+        log_info(f"Purged {purged} delivered jobs")
+
+    for job in store.pending("web"):
+        if job.finished or not _claim(job.id):
+            continue
+        log_info(f"Resuming job {job.id} ({job.state})")
+
+        def _on_progress(fraction: float | None, desc: str, job_id: str = job.id) -> None:
+            if _cancel_requested(job_id):
+                raise JobCancelled()
+
+        try:
+            while not job.finished:
+                job = advance_job(store.root, job.id, on_progress=_on_progress)
+        finally:
+            _release(job.id)
+
+
+def _build_ui(config: Config) -> gr.Blocks:
     """构建 Gradio 界面"""
     with gr.Blocks(title="StarSummary (星语)") as demo:
         gr.Markdown("# ✦ StarSummary (星语) ✦\n视频/音频 → 文字，一键搞定")
@@ -130,7 +343,15 @@ def _build_ui() -> gr.Blocks:
                     label="AI 总结 (需要 DEEPSEEK_API_KEY)",
                     value=False,
                 )
-                run_btn = gr.Button("开始转录", variant="primary", size="lg")
+                with gr.Row():
+                    run_btn = gr.Button("开始转录", variant="primary", size="lg", scale=3)
+                    cancel_btn = gr.Button("取消", variant="stop", size="lg", scale=1)
+                job_id_input = gr.Textbox(
+                    label="任务 ID",
+                    placeholder="页面关闭或服务重启后，用任务 ID 取回结果",
+                    lines=1,
+                )
+                lookup_btn = gr.Button("查询任务")
 
             with gr.Column(scale=2):
                 transcript_output = gr.Textbox(
@@ -149,12 +370,32 @@ def _build_ui() -> gr.Blocks:
                     interactive=False,
                 )
 
-        run_btn.click(
+        # 提交和查询共用同一并发上限：同时最多 web_concurrency 个任务在执行，其余排队
+        outputs = [transcript_output, summary_output, status_output, job_id_input]
+        run_event = run_btn.click(
             fn=_run_pipeline,
             inputs=[source_input, engine_radio, lang_dropdown, summarize_check],
-            outputs=[transcript_output, summary_output, status_output],
+            outputs=outputs,
+            concurrency_limit=config.web_concurrency,
+            concurrency_id="pipeline",
+        )
+        lookup_event = lookup_btn.click(
+            fn=_lookup_job,
+            inputs=[job_id_input],
+            outputs=outputs,
+            concurrency_limit=config.web_concurrency,
+            concurrency_id="pipeline",
+        )
+        cancel_btn.click(
+            fn=_cancel_job,
+            inputs=[job_id_input],
+            outputs=[status_output],
+            cancels=[run_event, lookup_event],
+            queue=False,
         )
 
+    demo.queue(max_size=config.web_queue_size or None)
+
     return demo
 
 
@@ -162,7 +403,13 @@ def main() -> None:
     from dotenv import load_dotenv
     load_dotenv()
 
-    demo = _build_ui()
+    threading.Thread(target=_resume_jobs, name="resume-jobs", daemon=True).start()
+    # Gradio 自己的排队不对外暴露，这里只统计正在处理的任务
+    JOBS_RUNNING.set_function(lambda: len(_active_jobs), queue="web")
+    config = Config()
+    start_metrics_server(config.metrics_port, config.metrics_host)
+
+    demo = _build_ui(config)
     demo.launch(inbrowser=True, theme=gr.themes.Soft())
 
 
@@ -0,0 +1,159 @@
+"""HTTP API 的工作进程 - 从任务表领取任务，逐阶段执行，结果写回任务目录"""
+
+import argparse
+import os
+import socket
+import threading
+import time
+import uuid
+
+from star_summary.config import Config
+from star_summary.jobs import JobCancelled, JobStore, LeaseLost, advance_job, cancel_job, get_job_store
+from star_summary.metrics import start_metrics_server
+from star_summary.utils import log_context, log_error, log_info, log_step, log_success
+
+# API 提交的任务的 owner
+API_OWNER = "api"
+
+# 租约时长（秒）；工作进程每 1/3 租约续租一次，崩溃后最多这么久任务会被其他进程接管
+_LEASE_SECONDS = 60
+# 没有任务时的轮询间隔（秒）
+_POLL_INTERVAL = 1.0
+# 进度写库 / 检查取消的最小间隔（秒）
+_REPORT_INTERVAL = 1.0
+# 已完成任务的保留天数
+_JOB_RETENTION_DAYS = 7
+
+
+class Worker:
+    """
+    一个工作线程：循环领取任务并执行到结束。租约由后台线程续期，
+    进度回调中顺带检查 API 的取消请求。多个线程 / 进程 / 共享任务目录的主机可同时运行。
+    """
+
+    def __init__(self, store: JobStore, name: str) -> None:
+        self.store = store
+        self.name = name
+
+    def run_forever(self, stop: threading.Event) -> None:
+        with log_context(worker=self.name):
+            self._loop(stop)
+
+    def _loop(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            job = self.store.claim(API_OWNER, self.name, _LEASE_SECONDS)
+            if job is None:
+                stop.wait(_POLL_INTERVAL)
+                continue
+            try:
+                self.run_job(job.id)
+            except Exception as e:
+                log_error(f"[{self.name}] job {job.id} crashed: {e}")
+
+    def run_job(self, job_id: str) -> None:
+        log_step("⚙️", f"[{self.name}] Processing job {job_id}")
+        done = threading.Event()
+        lease_lost = threading.Event()
+        threading.Thread(
+            target=self._keep_lease, args=(job_id, done, lease_lost),
+            name=f"lease-{job_id}", daemon=True,
+        ).start()
+
+        last_report = 0.0
+
+        def _on_progress(fraction: float | None, desc: str) -> None:
+            nonlocal last_report
+            if lease_lost.is_set():
+                raise LeaseLost()
+            now = time.monotonic()
+            if now - last_report < _REPORT_INTERVAL:
+                return
+            last_report = now
+            if self.store.report(job_id, fraction, desc):
+                raise JobCancelled()
+
+        try:
+            job = self.store.get(job_id)
+            while job is not None and not job.finished:
+                if lease_lost.is_set():
+                    raise LeaseLost()
+                # 每个阶段开始时清空上一阶段的进度
+                if self.store.report(job_id, None, ""):
+                    raise JobCancelled()
+                job = advance_job(self.store.root, job_id, on_progress=_on_progress)
+        except JobCancelled:
+            # 阶段之间检查到取消（阶段内的取消由 advance_job 处理）；任务可能已被清理
+            job = self.store.get(job_id)
+            if job is not None:
+                job = cancel_job(self.store, job)
+        except LeaseLost:
+            # 任务已被其他工作进程领走（如本进程卡顿超过租约时长），放弃本次处理，不写任何状态
+            log_error(f"[{self.name}] Abandoned job {job_id} after losing its lease")
+            return
+        finally:
+            done.set()
+            self.store.release(job_id, self.name)
+
+        if job is not None:
+            # 结果已写入任务目录，删除音频等大文件
+            self.store.mark_delivered(job)
+            log_success(f"[{self.name}] Job {job_id} {job.state}")
+
+    def _keep_lease(self, job_id: str, done: threading.Event, lease_lost: threading.Event) -> None:
+        """定期续租；续租失败时置位 lease_lost，正在执行的阶段在下一次进度回调时中止"""
+        while not done.wait(_LEASE_SECONDS / 3):
+            if not self.store.renew(job_id, self.name, _LEASE_SECONDS):
+                log_error(f"[{self.name}] lost lease on job {job_id}")
+                lease_lost.set()
+                return
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="starsummary-worker",
+        description="StarSummary HTTP API 工作进程：领取并执行 API 提交的任务",
+    )
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=1,
+        help="本进程同时执行的任务数（默认 1；扩容时可直接多开进程或主机）",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    args = _parse_args()
+    config = Config()
+    store = get_job_store(config)
+    purged = store.purge(_JOB_RETENTION_DAYS * 86400)
+    if purged:
+        log_info(f"Purged {purged} finished jobs")
+
+    start_metrics_server(config.metrics_port, config.metrics_host)
+    prefix = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:4]}"
+    concurrency = max(1, args.concurrency)
+    log_step("🛠️", f"Worker {prefix}: {concurrency} slot(s), jobs in {store.root}")
+
+    stop = threading.Event()
+    threads = [
+        threading.Thread(
+            target=Worker(store, f"{prefix}-{i}").run_forever, args=(stop,), daemon=True,
+        )
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        log_info("Stopping after current jobs...")
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+import types
+
+import pytest
+
+from star_summary import cache, jobs
+
+
+@pytest.fixture
+def clock(monkeypatch) -> list[float]:
+    """替换 cache / jobs 模块的时钟，clock[0] += n 即时间流逝，过期、租约和访问顺序不必真的等待"""
+    now = [1_000_000.0]
+    fake_time = types.SimpleNamespace(time=lambda: now[0])
+    for module in (cache, jobs):
+        monkeypatch.setattr(module, "time", fake_time)
+    return now
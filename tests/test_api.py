@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("multipart")
+from fastapi.testclient import TestClient  # noqa: E402
+
+from star_summary.api import create_app  # noqa: E402
+from star_summary.jobs import JobStore  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path) -> JobStore:
+    return JobStore(str(tmp_path))
+
+
+@pytest.fixture
+def client(store) -> TestClient:
+    return TestClient(create_app(store))
+
+
+@pytest.mark.parametrize("source", ["/etc/passwd", "~/secret.mp3", "file:///etc/passwd", "www.example.com/v", "https://"])
+def test_submit_rejects_anything_but_http_urls(client, store, source):
+    response = client.post("/v1/jobs", json={"source": source})
+    assert response.status_code == 422
+    assert store.pending("api") == []
+
+
+def test_submit_accepts_http_urls(client):
+    response = client.post("/v1/jobs", json={"source": " https://example.com/v "})
+    assert response.status_code == 202
+    assert response.json()["source"] == "https://example.com/v"
+
+
+def test_upload_is_stored_under_a_fixed_name(client, store):
+    response = client.post(
+        "/v1/jobs/upload", files={"file": ("../transcript.json.mp3", b"\0" * 16, "audio/mpeg")},
+    )
+    assert response.status_code == 202
+    job = store.get(response.json()["id"])
+    assert job.source == os.path.join(store.job_dir(job.id), "source.mp3")
+    assert os.listdir(store.job_dir(job.id)) == ["source.mp3"]
+    assert job.title == "transcript.json"
+
+
+@pytest.mark.parametrize("name", ["transcript.json", "summary.json", "noext", "run.sh"])
+def test_upload_rejects_non_media_files(client, store, name):
+    response = client.post("/v1/jobs/upload", files={"file": (name, b"{}", "application/json")})
+    assert response.status_code == 422
+    assert store.pending("api") == []
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from star_summary.audio import plan_chunks
+from star_summary.models import Segment
+from star_summary.transcriber.merge import merge_chunk_segments
+from star_summary.transcriber.paraformer import ParaformerTranscriber
+
+
+def test_short_audio_is_a_single_chunk():
+    assert plan_chunks(140, [], chunk_seconds=100) == [(0.0, 140)]
+
+
+def test_cuts_at_the_nearest_silence_within_the_window():
+    silences = [(50, 52), (95, 97), (108, 110), (190, 194)]
+    plan = plan_chunks(300, silences, chunk_seconds=100)
+    assert plan == [(0.0, 96.0), (96.0, 192.0), (192.0, 300)]
+
+
+def test_hard_cut_overlaps_the_next_chunk():
+    plan = plan_chunks(240, [], chunk_seconds=100, overlap=1.0)
+    assert plan == [(0.0, 100.0), (99.0, 240)]
+
+
+def test_chunks_cover_the_whole_duration():
+    plan = plan_chunks(1000, [(310, 311), (650, 651)], chunk_seconds=100)
+    assert plan[0][0] == 0.0 and plan[-1][1] == 1000
+    for (_, end), (start, _) in zip(plan, plan[1:]):
+        assert start <= end
+
+
+def test_merge_applies_chunk_offsets():
+    merged = merge_chunk_segments([
+        (100.0, [Segment(0, 5, "第二块")]),
+        (0.0, [Segment(0, 5, "第一块")]),
+    ])
+    assert [(seg.start, seg.end, seg.text) for seg in merged] == [(0, 5, "第一块"), (100, 105, "第二块")]
+
+
+def test_merge_drops_duplicates_in_the_overlap():
+    merged = merge_chunk_segments([
+        (0.0, [Segment(90, 99.5, "这是第一句"), Segment(99.5, 100, "第二")]),
+        (99.0, [Segment(0, 2, "第二句话"), Segment(2, 4, "第三句")]),
+    ])
+    # 截断的"第二"被后一块完整的"第二句话"替换
+    assert [seg.text for seg in merged] == ["这是第一句", "第二句话", "第三句"]
+    assert merged[1].start == 99.5
+
+
+def test_merge_keeps_the_earlier_copy_of_a_repeat():
+    merged = merge_chunk_segments([
+        (0.0, [Segment(95, 100, "Hello, world.")]),
+        (99.0, [Segment(0, 1, "world"), Segment(1, 3, "next")]),
+    ])
+    assert [seg.text for seg in merged] == ["Hello, world.", "next"]
+
+
+def test_merge_keeps_repeats_within_a_chunk():
+    segments = [Segment(0, 1, "好"), Segment(0.5, 1.5, "好")]
+    assert len(merge_chunk_segments([(0.0, segments)])) == 2
+
+
+def test_cancel_does_not_wait_for_remaining_chunks(monkeypatch):
+    transcriber = ParaformerTranscriber(api_key="k", parallel=2)
+    started = []
+    release = threading.Event()
+
+    def recognize(path, language_hints):
+        started.append(path)
+        if path != "c0":
+            release.wait(5)
+        return [Segment(0, 1, path)]
+
+    def cancel(segment):
+        raise RuntimeError("cancelled")
+
+    monkeypatch.setattr(transcriber, "_recognize", recognize)
+    chunks = [(i * 100.0, f"c{i}") for i in range(6)]
+    t0 = time.monotonic()
+    with pytest.raises(RuntimeError):
+        transcriber._recognize_chunks(chunks, ["zh"], cancel)
+    assert time.monotonic() - t0 < 2
+    release.set()
+    assert len(started) <= 3
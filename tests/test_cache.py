@@ -0,0 +1,65 @@
+import os
+
+from star_summary.cache import BlobCache
+
+
+def _value(n: int) -> dict:
+    return {"text": str(n) * 50}  # 序列化后约 60 字节
+
+
+def _blob_count(store: BlobCache) -> int:
+    return sum(len(files) for _, _, files in os.walk(os.path.join(store.root, "blobs")))
+
+
+def test_round_trip(tmp_path, clock):
+    store = BlobCache(str(tmp_path), max_bytes=10_000, ttl=0)
+    store.put("ns", "k", {"text": "转录"})
+    assert store.get("ns", "k") == {"text": "转录"}
+    assert store.get("other", "k") is None
+
+
+def test_evicts_least_recently_accessed_over_budget(tmp_path, clock):
+    store = BlobCache(str(tmp_path), max_bytes=150, ttl=0)
+    store.put("ns", "a", _value(1))
+    clock[0] += 1
+    store.put("ns", "b", _value(2))
+    clock[0] += 1
+    store.get("ns", "a")  # a 变为最近访问
+    clock[0] += 1
+    store.put("ns", "c", _value(3))
+
+    assert store.get("ns", "b") is None
+    assert store.get("ns", "a") == _value(1)
+    assert store.get("ns", "c") == _value(3)
+    assert _blob_count(store) == 2
+
+
+def test_expired_entries_miss_and_are_removed(tmp_path, clock):
+    store = BlobCache(str(tmp_path), max_bytes=10_000, ttl=60)
+    store.put("ns", "old", _value(1))
+    clock[0] += 61
+    assert store.get("ns", "old") is None
+    assert _blob_count(store) == 0
+
+
+def test_shared_blob_survives_until_last_reference(tmp_path, clock):
+    store = BlobCache(str(tmp_path), max_bytes=130, ttl=0)
+    store.put("ns", "a", _value(1))
+    clock[0] += 1
+    store.put("ns", "b", _value(1))  # 内容相同，共用一个 blob
+    assert _blob_count(store) == 1
+    clock[0] += 1
+    store.put("ns", "c", _value(2))  # 淘汰 a，blob 仍被 b 引用
+
+    assert store.get("ns", "a") is None
+    assert store.get("ns", "b") == _value(1)
+    assert _blob_count(store) == 2
+
+
+def test_missing_blob_is_a_miss(tmp_path, clock):
+    store = BlobCache(str(tmp_path), max_bytes=10_000, ttl=0)
+    store.put("ns", "k", _value(1))
+    for root, _, files in os.walk(os.path.join(store.root, "blobs")):
+        for name in files:
+            os.remove(os.path.join(root, name))
+    assert store.get("ns", "k") is None
@@ -0,0 +1,30 @@
+from star_summary.models import Segment
+from star_summary.summarizer.chunking import Chunk, chunk_segments, chunk_text
+
+
+def test_segments_are_grouped_up_to_the_limit():
+    segments = [Segment(i * 10, i * 10 + 10, "x" * 9) for i in range(5)]
+    chunks = chunk_segments(segments, max_chars=20)
+    assert [chunk.text for chunk in chunks] == ["x" * 9 + "\n" + "x" * 9, "x" * 9 + "\n" + "x" * 9, "x" * 9]
+    assert [(chunk.start, chunk.end) for chunk in chunks] == [(0, 20), (20, 40), (40, 50)]
+
+
+def test_oversized_segment_is_its_own_chunk():
+    segments = [Segment(0, 1, "短"), Segment(1, 2, "长" * 50), Segment(2, 3, "短")]
+    chunks = chunk_segments(segments, max_chars=10)
+    assert [chunk.text for chunk in chunks] == ["短", "长" * 50, "短"]
+
+
+def test_no_segments_means_no_chunks():
+    assert chunk_segments([], max_chars=100) == []
+
+
+def test_chunk_text_hard_splits_long_lines_and_skips_blank_ones():
+    chunks = chunk_text("a" * 25 + "\n\n   \nb", max_chars=10)
+    assert [chunk.text for chunk in chunks] == ["a" * 10, "a" * 10, "a" * 5 + "\nb"]
+    assert all(chunk.label == "" for chunk in chunks)
+
+
+def test_label_shows_time_range():
+    assert Chunk(text="t", start=0, end=0).label == ""
+    assert "→" in Chunk(text="t", start=60, end=125).label
@@ -0,0 +1,82 @@
+from star_summary.models import Segment, TranscriptResult
+from star_summary.summarizer.compaction import compact_segments, compact_text, compact_transcript
+
+
+def _texts(segments: list[Segment]) -> list[str]:
+    return [seg.text for seg in segments]
+
+
+def test_consecutive_duplicates_collapse():
+    segments = [
+        Segment(0, 2, "谢谢观看"),
+        Segment(2, 4, "谢谢观看"),
+        Segment(4, 6, "谢谢观看。"),
+    ]
+    assert _texts(compact_segments(segments)) == ["谢谢观看"]
+
+
+def test_repeated_sentence_after_other_content_is_kept():
+    segments = [
+        Segment(0, 2, "今天我们来讲一下机器学习"),
+        Segment(10, 12, "先说监督学习"),
+        Segment(20, 22, "再说无监督学习"),
+        Segment(30, 32, "今天我们来讲一下机器学习"),
+    ]
+    assert _texts(compact_segments(segments)) == _texts(segments)
+
+
+def test_fillers_are_stripped_but_words_are_kept():
+    segments = [
+        Segment(0, 2, "嗯，大家好"),
+        Segment(10, 12, "呃 首先是背景"),
+        Segment(20, 22, "额，总额是多少"),
+        Segment(30, 32, "额外的数据"),
+        Segment(40, 42, "Um, so the result is good"),
+        Segment(50, 52, "嗯"),
+    ]
+    assert _texts(compact_segments(segments)) == [
+        "大家好", "首先是背景", "额，总额是多少", "额外的数据", "so the result is good",
+    ]
+
+
+def test_in_segment_loops_collapse_but_numbers_do_not():
+    segments = [
+        Segment(0, 2, "好的好的好的好的好的好的"),
+        Segment(10, 12, "一共 1000000 元"),
+    ]
+    assert _texts(compact_segments(segments)) == ["好的好的", "一共 1000000 元"]
+
+
+def test_close_segments_merge_into_paragraphs():
+    segments = [
+        Segment(0, 2, "第一句，"),
+        Segment(2.2, 4, "第二句。"),
+        Segment(10, 12, "隔了很久"),
+    ]
+    merged = compact_segments(segments)
+    assert _texts(merged) == ["第一句，第二句。", "隔了很久"]
+    assert (merged[0].start, merged[0].end) == (0, 4)
+
+
+def test_unpunctuated_segments_keep_a_boundary():
+    merged = compact_segments([Segment(0, 1, "没有标点"), Segment(1.1, 2, "下一句")])
+    assert _texts(merged) == ["没有标点 下一句"]
+
+
+def test_compact_text_dedupes_lines_and_reports_ratio():
+    result = compact_text("line one\nline one\n\nline two")
+    assert result.text == "line one line two"
+    assert result.segments == []
+    assert 0 < result.tokens < result.original_tokens
+    assert result.ratio < 1
+
+
+def test_compact_text_keeps_non_adjacent_repeats():
+    result = compact_text("今天我们来讲一下机器学习\n第二行\n第三行\n今天我们来讲一下机器学习")
+    assert result.text.count("今天我们来讲一下机器学习") == 2
+
+
+def test_compact_transcript_without_segments_falls_back_to_text():
+    transcript = TranscriptResult(text="嗯\n内容", segments=[])
+    result = compact_transcript(transcript)
+    assert result.text == "内容"
@@ -0,0 +1,62 @@
+import os
+import threading
+
+import pytest
+
+from star_summary import daemon
+from star_summary.cli import _resolve_input
+
+
+def test_resolve_input_keeps_urls_and_resolves_paths():
+    assert _resolve_input("https://example.com/v", "/work") == "https://example.com/v"
+    assert _resolve_input("-", "/work") == "-"
+    assert _resolve_input("www.example.mp4", "/work") == "/work/www.example.mp4"
+    assert _resolve_input("clips/a.mp3", "/work") == "/work/clips/a.mp3"
+    assert _resolve_input("~/a.mp3", "/work") == os.path.expanduser("~/a.mp3")
+
+
+@pytest.fixture
+def running_daemon(tmp_path, monkeypatch):
+    """在线程中运行守护进程，run_args 换成记录调用"""
+    path = str(tmp_path / "d.sock")
+    monkeypatch.setenv("STAR_SUMMARY_DAEMON_SOCKET", path)
+    calls: list[tuple] = []
+    monkeypatch.setattr(daemon, "run_args", lambda args, inputs: calls.append((args, inputs)))
+    server = daemon._Daemon(path, jobs=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if os.path.exists(path):
+            break
+        threading.Event().wait(0.01)
+    yield path, calls
+    server.stop()
+    thread.join(timeout=5)
+
+
+def test_forward_sends_inputs_resolved_by_the_caller(running_daemon):
+    _, calls = running_daemon
+    inputs = ["/caller/a.mp3", "https://example.com/v"]
+    assert daemon.forward(["--input-file", "list.txt"], inputs) == 0
+    (args, received), = calls
+    assert received == inputs
+    assert args.input_file.endswith("list.txt")
+
+
+def test_daemon_declines_callers_with_different_settings(running_daemon):
+    path, calls = running_daemon
+    env = dict(daemon.settings_env(), DEEPSEEK_API_KEY="different")
+    request = {"cmd": "run", "argv": ["a.mp3"], "inputs": ["/a.mp3"], "cwd": "/", "env": env}
+    assert daemon._request(daemon._connect(path), request) is None
+    assert calls == []
+
+
+def test_settings_env_hashes_values_and_skips_daemon_only_settings(monkeypatch):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "sk-secret")
+    monkeypatch.setenv("STAR_SUMMARY_COMPACT", "0")
+    monkeypatch.setenv("STAR_SUMMARY_LOG_FORMAT", "json")
+    env = daemon.settings_env()
+    assert "sk-secret" not in env.values()
+    assert "STAR_SUMMARY_COMPACT" in env and "STAR_SUMMARY_LOG_FORMAT" not in env
+    assert daemon._env_mismatch(env) == []
+    assert daemon._env_mismatch({**env, "STAR_SUMMARY_COMPACT": "x"}) == ["STAR_SUMMARY_COMPACT"]
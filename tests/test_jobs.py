@@ -0,0 +1,142 @@
+import os
+
+import pytest
+
+from star_summary import jobs
+from star_summary.jobs import DONE, QUEUED, TRANSCRIBING, JobStore
+from star_summary.models import Segment, SummaryResult, TranscriptResult
+
+
+@pytest.fixture
+def store(tmp_path) -> JobStore:
+    return JobStore(str(tmp_path))
+
+
+def test_create_update_and_reload(store):
+    job = store.create("url", "https://example.com/v", owner="web", user_id=7)
+    assert store.get(job.id) == job
+    assert job.state == QUEUED
+
+    job = store.update(job, state=TRANSCRIBING, title="标题")
+    reloaded = store.get(job.id)
+    assert (reloaded.state, reloaded.title, reloaded.user_id) == (TRANSCRIBING, "标题", 7)
+    assert store.get("missing") is None
+
+
+def test_pending_lists_undelivered_jobs_in_order(store):
+    first = store.create("url", "a", owner="web")
+    second = store.create("url", "b", owner="web")
+    store.create("url", "c", owner="telegram")
+    store.mark_delivered(store.update(first, state=DONE))
+    assert [job.id for job in store.pending("web")] == [second.id]
+
+
+def test_checkpoints_survive_a_new_store(store):
+    job = store.create("url", "a", owner="web")
+    transcript = TranscriptResult(text="你好", segments=[Segment(0, 1, "你好")], engine="whisper")
+    store.save_transcript(job, transcript)
+    store.save_summary(job, SummaryResult(text="总结", model="m", summarize_time=1.0))
+
+    reopened = JobStore(store.root)
+    assert reopened.load_transcript(job) == transcript
+    assert reopened.load_summary(job).text == "总结"
+
+
+def test_mark_delivered_keeps_only_results(store):
+    job = store.create("url", "a", owner="web")
+    audio = os.path.join(store.job_dir(job.id), "audio.m4a")
+    with open(audio, "wb") as f:
+        f.write(b"\0")
+    store.save_transcript(job, TranscriptResult(text="t", segments=[]))
+
+    job = store.mark_delivered(store.update(job, audio_path=audio))
+    assert job.delivered and job.audio_path == ""
+    assert os.listdir(store.job_dir(job.id)) == ["transcript.json"]
+
+
+def test_purge_removes_old_delivered_jobs(store):
+    old = store.mark_delivered(store.create("url", "a", owner="web"))
+    kept = store.create("url", "b", owner="web")
+    assert store.purge(-1) == 1
+    assert store.get(old.id) is None and not os.path.exists(store.job_dir(old.id))
+    assert store.get(kept.id) is not None
+
+
+def test_claim_takes_oldest_job_and_leases_it(store, clock):
+    first = store.create("url", "a", owner="api")
+    clock[0] += 1
+    second = store.create("url", "b", owner="api")
+    store.create("url", "c", owner="web")
+
+    assert store.claim("api", "w1", lease_seconds=60).id == first.id
+    assert store.claim("api", "w2", lease_seconds=60).id == second.id
+    assert store.claim("api", "w3", lease_seconds=60) is None
+    assert store.counts("api") == (0, 2)
+
+
+def test_claim_skips_finished_jobs(store, clock):
+    store.update(store.create("url", "a", owner="api"), state=DONE)
+    assert store.claim("api", "w1", lease_seconds=60) is None
+
+
+def test_renewed_lease_is_not_taken_over(store, clock):
+    job = store.create("url", "a", owner="api")
+    store.claim("api", "w1", lease_seconds=60)
+    clock[0] += 50
+    assert store.renew(job.id, "w1", lease_seconds=60)
+    clock[0] += 50
+    assert store.claim("api", "w2", lease_seconds=60) is None
+
+
+def test_expired_lease_moves_to_another_worker(store, clock):
+    job = store.create("url", "a", owner="api")
+    store.claim("api", "w1", lease_seconds=60)
+    clock[0] += 61
+    assert store.counts("api") == (1, 0)
+    assert store.claim("api", "w2", lease_seconds=60).id == job.id
+    # 原工作进程已失去租约，续租和释放都不生效
+    assert not store.renew(job.id, "w1", lease_seconds=60)
+    store.release(job.id, "w1")
+    assert store.claim("api", "w3", lease_seconds=60) is None
+
+
+def test_release_makes_job_claimable_again(store, clock):
+    job = store.create("url", "a", owner="api")
+    store.claim("api", "w1", lease_seconds=60)
+    store.release(job.id, "w1")
+    assert store.claim("api", "w2", lease_seconds=60).id == job.id
+
+
+def test_cancel_request_reaches_the_running_worker(store, clock):
+    job = store.create("url", "a", owner="api")
+    assert not store.request_cancel(job.id)  # 无人处理
+    store.claim("api", "w1", lease_seconds=60)
+    assert store.request_cancel(job.id)
+    assert store.report(job.id, 0.5, "下载中")
+    assert store.progress(job.id) == (0.5, "下载中")
+
+
+def test_transcribe_stage_streams_segments(store, monkeypatch):
+    from star_summary import cache, transcriber
+    from star_summary.transcriber.base import AbstractTranscriber
+
+    class Streaming(AbstractTranscriber):
+        def transcribe(self, audio_path, language=None, on_segment=None):
+            raise AssertionError("the stage should stream segments")
+
+        def transcribe_iter(self, audio_path, language=None):
+            segments = [Segment(0, 1, "第一句"), Segment(1, 2, "第二句")]
+            yield from segments
+            return TranscriptResult(text="第一句\n第二句", segments=segments, engine="fake")
+
+    monkeypatch.setattr(transcriber, "get_transcriber", lambda **kwargs: Streaming())
+    monkeypatch.setattr(cache, "prepare_audio", lambda config, path, source_id: path)
+    monkeypatch.setattr(cache, "get_transcript_cache", lambda config: None)
+    job = store.create("file", "a.wav", owner="web", duration=2.0)
+    store.update(job, state=TRANSCRIBING, audio_path="a.wav")
+
+    reports = []
+    job = jobs.advance_job(store.root, job.id, lambda fraction, desc: reports.append((fraction, desc)))
+    assert job.state == DONE
+    assert reports == [(0.5, "转录中：已识别 1 段｜第一句"), (1.0, "转录中：已识别 2 段｜第二句")]
+    assert store.load_transcript(job).engine == "fake"
@@ -0,0 +1,30 @@
+import threading
+
+from star_summary import utils
+
+
+def test_flush_logs_keeps_prints_after_queued_logs(capsys):
+    utils.setup_logging(fmt="plain")
+    try:
+        for i in range(200):
+            utils.log_info(f"line {i}")
+        utils.flush_logs()
+        print("All done")
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[-1] == "All done"
+        assert lines[-2].endswith("line 199")
+    finally:
+        utils.setup_logging()
+
+
+def test_concurrent_first_use_configures_once(monkeypatch):
+    calls = []
+    original = utils.setup_logging
+    monkeypatch.setattr(utils, "_configured", False)
+    monkeypatch.setattr(utils, "setup_logging", lambda: (calls.append(1), original()))
+    threads = [threading.Thread(target=utils.log_info, args=("x",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
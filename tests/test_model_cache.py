@@ -0,0 +1,62 @@
+import sys
+import threading
+import types
+
+import pytest
+
+from star_summary.transcriber.model_cache import WhisperModelCache
+
+
+@pytest.fixture
+def loads(monkeypatch) -> types.SimpleNamespace:
+    """用假的 WhisperModel 代替 faster_whisper，记录每次加载的模型；gate 放行前加载一直阻塞"""
+    loads = types.SimpleNamespace(models=[], gate=threading.Event())
+
+    class FakeModel:
+        def __init__(self, model_size: str, **kwargs) -> None:
+            loads.gate.wait(5)
+            loads.models.append(model_size)
+
+    monkeypatch.setitem(sys.modules, "faster_whisper", types.SimpleNamespace(WhisperModel=FakeModel))
+    return loads
+
+
+def test_concurrent_requests_load_once_and_drop_the_lock(loads):
+    cache = WhisperModelCache(budget_mb=4096)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("tiny"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    loads.gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert loads.models == ["tiny"]
+    assert len({id(model) for model in results}) == 1
+    assert cache._loading == {}
+
+
+def test_failed_load_releases_the_lock(monkeypatch):
+    class BrokenModel:
+        def __init__(self, *args, **kwargs) -> None:
+            raise RuntimeError("download failed")
+
+    monkeypatch.setitem(sys.modules, "faster_whisper", types.SimpleNamespace(WhisperModel=BrokenModel))
+    cache = WhisperModelCache()
+    with pytest.raises(RuntimeError):
+        cache.get("tiny")
+    assert cache._loading == {}
+
+
+def test_evicts_least_recently_used_over_budget(loads):
+    loads.gate.set()
+    cache = WhisperModelCache(budget_mb=700)
+    cache.get("small")
+    cache.get("base")
+    cache.get("small")
+    cache.get("tiny")  # 500 + 150 + 75 > 700，淘汰最久未用的 base
+
+    stats = cache.stats()
+    assert stats.evictions == 1
+    assert stats.resident_mb == 575
+    assert cache.get("small") is not None and loads.models == ["small", "base", "tiny"]
@@ -0,0 +1,19 @@
+import asyncio
+
+from star_summary.pool import WorkerPool
+
+
+def test_running_counts_acquired_slots_only():
+    async def scenario() -> list[tuple[int, int]]:
+        pool = WorkerPool(workers=1)
+        counts = []
+        async with pool.job(1) as first:
+            await first.wait()
+            async with pool.job(2) as second:
+                counts.append((pool.running, pool.queued))
+                assert second.position == 1
+            counts.append((pool.running, pool.queued))
+        counts.append((pool.running, pool.queued))
+        return counts
+
+    assert asyncio.run(scenario()) == [(1, 1), (1, 0), (0, 0)]
@@ -0,0 +1,17 @@
+from star_summary.models import PlaylistEntry, PlaylistInfo
+from star_summary.sync import SyncStore
+
+
+def test_entries_without_id_are_tracked_by_url(tmp_path):
+    store = SyncStore(str(tmp_path / "sync.sqlite3"))
+    with_id = PlaylistEntry(url="https://example.com/a", source_id="youtube:a")
+    without_id = PlaylistEntry(url="https://example.com/b")
+    playlist = PlaylistInfo(playlist_id="youtube:list", entries=[with_id, without_id])
+
+    assert store.pending(playlist) == [with_id, without_id]
+
+    store.mark(with_id, playlist.playlist_id)
+    store.mark(without_id, playlist.playlist_id)
+
+    assert store.pending(playlist) == []
+    assert store.count(playlist.playlist_id) == 2
@@ -0,0 +1,41 @@
+import pytest
+
+from star_summary.models import Segment, TranscriptResult
+from star_summary.transcriber.base import AbstractTranscriber, drain
+
+
+class _Fake(AbstractTranscriber):
+    def __init__(self) -> None:
+        self.closed = False
+
+    def transcribe(self, audio_path, language=None, on_segment=None):
+        segments = [Segment(0, 1, "一"), Segment(1, 2, "二")]
+        return TranscriptResult(text="一\n二", segments=segments, language="zh", engine="fake")
+
+
+class _Streaming(_Fake):
+    def transcribe_iter(self, audio_path, language=None):
+        try:
+            yield Segment(0, 1, "一")
+            yield Segment(1, 2, "二")
+        finally:
+            self.closed = True
+        return TranscriptResult(text="一\n二", segments=[], engine="stream")
+
+
+def test_default_transcribe_iter_returns_the_full_result():
+    seen = []
+    result = drain(_Fake().transcribe_iter("a.wav"), seen.append)
+    assert [s.text for s in seen] == ["一", "二"]
+    assert (result.engine, result.language) == ("fake", "zh")
+
+
+def test_callback_error_closes_the_stream():
+    transcriber = _Streaming()
+
+    def cancel(segment):
+        raise RuntimeError("cancelled")
+
+    with pytest.raises(RuntimeError):
+        drain(transcriber.transcribe_iter("a.wav"), cancel)
+    assert transcriber.closed
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from star_summary import jobs, worker
+from star_summary.jobs import DOWNLOADING, JobStore, LeaseLost
+from star_summary.worker import API_OWNER, Worker
+
+
+@pytest.fixture
+def store(tmp_path) -> JobStore:
+    return JobStore(str(tmp_path))
+
+
+def test_stage_aborts_when_lease_renewal_fails(store, monkeypatch):
+    job = store.create("url", "https://example.com/v", API_OWNER)
+    store.claim(API_OWNER, "w1", lease_seconds=60)
+    monkeypatch.setattr(worker, "_LEASE_SECONDS", 0.03)
+    # 另一个工作进程已接管：续租失败
+    monkeypatch.setattr(store, "renew", lambda *args: False)
+
+    progress_calls = 0
+
+    def fake_download_stage(store, job, on_progress):
+        nonlocal progress_calls
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            progress_calls += 1
+            on_progress(None, "下载中")
+            time.sleep(0.01)
+        raise AssertionError("stage was not aborted")
+
+    monkeypatch.setattr(jobs, "_download_stage", fake_download_stage)
+    Worker(store, "w1").run_job(job.id)
+
+    assert progress_calls > 0
+    job = store.get(job.id)
+    # 不改写任务状态，也不清理任务目录，留给接管的工作进程
+    assert job.state == DOWNLOADING and not job.delivered and job.error == ""
+
+
+def test_lease_lost_is_not_recorded_as_a_failure(store, monkeypatch):
+    job = store.create("url", "https://example.com/v", API_OWNER)
+
+    def lost(store, job, on_progress):
+        raise LeaseLost()
+
+    monkeypatch.setattr(jobs, "_download_stage", lost)
+    with pytest.raises(LeaseLost):
+        jobs.advance_job(store.root, job.id)
+    assert store.get(job.id).error == ""